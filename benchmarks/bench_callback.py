@@ -0,0 +1,77 @@
+"""
+回调通知验签性能基准
+对比逐个调用 verify_callback 与批量重放 verify_callbacks_batch 的吞吐量
+
+用法：python benchmarks/bench_callback.py [通知数]
+"""
+
+import base64
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import padding as sym_padding
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from tools.callback_verifier import verify_callback, verify_callbacks_batch
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _seal(data: str, merchant_public, platform_key) -> str:
+    signature = platform_key.sign(data.encode(), padding.PKCS1v15(), hashes.SHA256())
+    padder = sym_padding.PKCS7(128).padder()
+    plain = padder.update(f"{data}${_b64url(signature)}".encode()) + padder.finalize()
+    random_key = os.urandom(16)
+    encryptor = Cipher(algorithms.AES(random_key), modes.ECB()).encryptor()
+    encrypted = encryptor.update(plain) + encryptor.finalize()
+    encrypted_key = merchant_public.encrypt(random_key, padding.PKCS1v15())
+    return f"{_b64url(encrypted_key)}${_b64url(encrypted)}$AES$SHA256"
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    merchant_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    platform_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_key = base64.b64encode(
+        merchant_key.private_bytes(
+            serialization.Encoding.DER,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    ).decode()
+    platform_cert = base64.b64encode(
+        platform_key.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    ).decode()
+    notifications = [
+        _seal(f'{{"orderId":"ORDER-{i}"}}', merchant_key.public_key(), platform_key)
+        for i in range(count)
+    ]
+
+    started = time.perf_counter()
+    for notification in notifications:
+        verify_callback(notification, private_key, platform_cert)
+    seconds = time.perf_counter() - started
+    print(f"逐个验签  {count:>6} 次  {seconds:8.3f} 秒  {count / seconds:10.1f} 次/秒")
+
+    started = time.perf_counter()
+    verify_callbacks_batch(
+        notifications, private_key=private_key, platform_cert=platform_cert
+    )
+    seconds = time.perf_counter() - started
+    print(f"批量验签  {count:>6} 次  {seconds:8.3f} 秒  {count / seconds:10.1f} 次/秒")
+
+
+if __name__ == "__main__":
+    main()
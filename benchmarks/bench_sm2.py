@@ -0,0 +1,87 @@
+"""
+SM2签名/验签性能基准
+对比原有路径（cryptography 的 secp256k1 ECDSA-SHA256 替代实现）、gmssl CryptSM2
+及SM2引擎（预计算倍点表 + 公钥点表缓存）的吞吐量
+
+用法：python benchmarks/bench_sm2.py [签名数]
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from gmssl import func, sm2
+
+from tools import sm2_engine
+
+
+def _report(name: str, count: int, seconds: float) -> None:
+    print(f"{name:<24} {count:>6} 次  {seconds:8.3f} 秒  {count / seconds:10.1f} 次/秒")
+
+
+def _timed(name: str, count: int, action) -> None:
+    started = time.perf_counter()
+    for i in range(count):
+        action(i)
+    _report(name, count, time.perf_counter() - started)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    messages = [
+        f"yop-auth-v3/app/2025-07-01T08:00:00Z/1800\nPOST\n/{i}".encode()
+        for i in range(count)
+    ]
+
+    # 原有路径：secp256k1 ECDSA-SHA256（并非SM2）
+    ec_key = ec.generate_private_key(ec.SECP256K1())
+    ec_signatures = [ec_key.sign(m, ec.ECDSA(hashes.SHA256())) for m in messages]
+    _timed(
+        "原有路径 签名(secp256k1)",
+        count,
+        lambda i: ec_key.sign(messages[i], ec.ECDSA(hashes.SHA256())),
+    )
+    _timed(
+        "原有路径 验签(secp256k1)",
+        count,
+        lambda i: ec_key.public_key().verify(
+            ec_signatures[i], messages[i], ec.ECDSA(hashes.SHA256())
+        ),
+    )
+
+    # gmssl CryptSM2
+    engine_key = sm2_engine.generate_private_key()
+    engine_public = engine_key.public_key()
+    crypt = sm2.CryptSM2(
+        private_key=f"{engine_key.d:064x}",
+        public_key=engine_public.to_bytes()[1:].hex(),
+    )
+    gmssl_signatures = [crypt.sign_with_sm3(m, func.random_hex(64)) for m in messages]
+    _timed(
+        "gmssl 签名",
+        count,
+        lambda i: crypt.sign_with_sm3(messages[i], func.random_hex(64)),
+    )
+    _timed(
+        "gmssl 验签",
+        count,
+        lambda i: crypt.verify_with_sm3(gmssl_signatures[i], messages[i]),
+    )
+
+    # SM2引擎
+    signatures = [engine_key.sign(m) for m in messages]
+    _timed("SM2引擎 签名", count, lambda i: engine_key.sign(messages[i]))
+    _timed(
+        "SM2引擎 验签",
+        count,
+        lambda i: engine_public.verify(signatures[i], messages[i]),
+    )
+
+
+if __name__ == "__main__":
+    main()
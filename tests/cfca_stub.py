@@ -0,0 +1,90 @@
+"""
+CFCA证书下载接口的本地替身，供测试使用
+
+以测试CA签发证书请求(P10)中的公钥，按CFCA接口格式返回证书；通过 transport() 获得
+httpx.MockTransport，可直接传给 httpx.Client / httpx.AsyncClient
+"""
+
+import base64
+import datetime
+import json
+from typing import Dict, List, Optional
+
+import httpx
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from tools.cert_utils import CertUtils
+
+
+class CfcaStub:
+    """CFCA证书下载接口替身"""
+
+    def __init__(self) -> None:
+        self.ca_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.ca_name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "Test CA")])
+        self.requests: List[httpx.Request] = []
+        # 序列号 -> 需要返回的错误（code, message）
+        self.errors: Dict[str, tuple] = {}
+        # 序列号 -> 以该HTTP状态码失败的剩余次数
+        self.http_failures: Dict[str, List[int]] = {}
+        # 序列号 -> 连接失败的剩余次数
+        self.connect_failures: Dict[str, int] = {}
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if (
+            request.headers.get("Authorization")
+            != CertUtils.cfca_auth_header()["Authorization"]
+        ):
+            return httpx.Response(401)
+        params = request.url.params
+        serial_no = params.get("serialNo", "")
+        if self.connect_failures.get(serial_no):
+            self.connect_failures[serial_no] -= 1
+            raise httpx.ConnectError("connection refused", request=request)
+        failures = self.http_failures.get(serial_no)
+        if failures:
+            return httpx.Response(failures.pop(0))
+        if serial_no in self.errors:
+            code, message = self.errors[serial_no]
+            return self._json({"code": code, "message": message})
+        if not params.get("authCode"):
+            return self._json({"code": "100001", "message": "授权码错误"})
+        cert = self.issue(params["certReq"], serial_no)
+        return self._json({"code": "000000", "data": {"cert": cert}})
+
+    def issue(self, cert_req: str, serial_no: Optional[str] = None) -> str:
+        """签发证书，返回Base64编码的DER证书"""
+        csr = x509.load_der_x509_csr(base64.b64decode(cert_req))
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(
+                x509.Name(
+                    [x509.NameAttribute(NameOID.COMMON_NAME, serial_no or "test")]
+                )
+            )
+            .issuer_name(self.ca_name)
+            .public_key(csr.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now)
+            .not_valid_after(now + datetime.timedelta(days=365))
+            .sign(self.ca_key, hashes.SHA256())
+        )
+        return base64.b64encode(cert.public_bytes(serialization.Encoding.DER)).decode(
+            "ascii"
+        )
+
+    @staticmethod
+    def _json(data: dict) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=json.dumps(data, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json;charset=UTF-8"},
+        )
@@ -0,0 +1,95 @@
+"""
+测试API路径模糊解析模块
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.api_resolver import ApiPathResolver, loose_key, resolve_api_uri
+from yop_mcp.main import yeepay_yop_api_detail
+
+
+class TestApiResolver:
+    """测试API路径的规范化、前缀补全及模糊匹配"""
+
+    def test_resolve(self):
+        """测试缺少版本号、分隔符及前缀错误、拼写错误及截断的路径"""
+        assert loose_key("/yos/aggpay/prepay/") == "aggpay/prepay"
+        for uri in (
+            "/rest/v1.0/aggpay/prepay/",
+            "rest/aggpay/pre-pay",
+            "/yos/v1.0//aggpay/pre_pay",
+        ):
+            result = resolve_api_uri(uri)
+            assert result["path"] == "/rest/v1.0/aggpay/pre-pay"
+            assert result["matchedBy"] == "normalized"
+
+        result = resolve_api_uri("/rest/v1.0/trade/refund/qeury")
+        assert (result["path"], result["matchedBy"]) == (
+            "/rest/v1.0/trade/refund/query",
+            "fuzzy",
+        )
+        assert (
+            resolve_api_uri("/rest/v1.0/aggpay/tutelage/pre")["matchedBy"] == "prefix"
+        )
+
+        result = resolve_api_uri("/rest/v1.0/trade/ord")
+        assert result["path"] is None
+        assert result["suggestions"][0]["path"] == "/rest/v1.0/trade/order"
+        assert resolve_api_uri("/rest/v1.0/test")["suggestions"] == []
+
+    def test_prefers_matching_version(self):
+        """测试多个版本的规范化路径相同时，优先与输入版本及前缀一致的路径"""
+        resolver = ApiPathResolver(
+            SimpleNamespace(path=path, method="POST", title="")
+            for path in (
+                "/rest/v1.0/trade/order",
+                "/rest/v2.0/trade/order",
+                "/yos/v1.0/trade/order",
+            )
+        )
+        assert resolver.resolve("/rest/v2.0/trade/order/")["matchedBy"] == "exact"
+        assert resolver.resolve("/rest/v2.0/trade/order_")["path"] == (
+            "/rest/v2.0/trade/order"
+        )
+        result = resolver.resolve("/yos/trade/order")
+        assert result["path"] == "/yos/v1.0/trade/order"
+        assert len(result["suggestions"]) == 2
+
+        # 写明的版本号不会被更正为其他版本，其他版本只作为候选
+        result = resolver.resolve("/rest/v3.0/trade/order")
+        assert result["path"] is None
+        assert result["suggestions"][0]["path"] == "/rest/v1.0/trade/order"
+        assert resolver.resolve("/rest/v3.0/trade/ordr")["path"] is None
+
+    @patch("yop_mcp.main.HttpUtils.download_content")
+    def test_api_detail_resolves_before_request(self, mock_download):
+        """测试路径有误时只请求更正后的文档地址，无法确定时按原路径获取并附加相近的API"""
+        mock_download.return_value = "# 聚合支付统一下单"
+        result = yeepay_yop_api_detail("/rest/aggpay/prepay/")
+        mock_download.assert_called_once_with(
+            "https://open.yeepay.com/docs-v3/api/post_rest_v1.0_aggpay_pre-pay.md"
+        )
+        assert "已返回最相近的API /rest/v1.0/aggpay/pre-pay" in result
+        assert result.endswith("# 聚合支付统一下单")
+
+        mock_download.reset_mock()
+        mock_download.return_value = "# 新接口"
+        result = yeepay_yop_api_detail("/rest/v1.0/trade/ord")
+        mock_download.assert_called_once_with(
+            "https://open.yeepay.com/docs-v3/api/_rest_v1.0_trade_ord.md"
+        )
+        assert result.startswith("# 新接口")
+        assert "未能确定API /rest/v1.0/trade/ord，相近的API" in result
+        assert "/rest/v1.0/trade/order" in result
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,131 @@
+"""
+测试API文档结构化解析模块
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.api_spec import api_spec, parse_api_spec
+from tools.metrics import Metrics
+from yop_mcp.main import yeepay_yop_api_detail
+
+API_DOC = """# 聚合支付统一下单
+
+> 商户通过该接口完成聚合支付下单
+
+## 基本信息
+
+| 名称 | 内容 |
+| --- | --- |
+| 请求方式 | POST |
+| 请求地址 | /rest/v1.0/aggpay/pre-pay |
+| Content-Type | application/x-www-form-urlencoded |
+| 安全需求 | YOP-RSA2048-SHA256 |
+
+## 请求参数
+
+| 参数名称 | 类型 | 是否必填 | 描述 | 示例值 |
+| --- | --- | --- | --- | --- |
+| parentMerchantNo | string | 是 | 发起方商户编号<br>标准商户收付款方案中此参数与收款商户编号一致 | 10080009498 |
+| orderAmount | string | 是 | 订单金额，单位：元 | 0.01 |
+| notifyUrl | string | 否 | 支付结果通知地址 | |
+
+## 请求示例
+
+```json
+{"parentMerchantNo": "10080009498", "orderAmount": "0.01"}
+```
+
+## 响应参数
+
+| 参数名称 | 类型 | 描述 |
+| --- | --- | --- |
+| code | string | 返回码 |
+| bankOrderInfo | object | 银行订单信息 |
+| &nbsp;&nbsp;└ bankOrderId | string | 银行订单号 |
+| &nbsp;&nbsp;└ prePayTn | string | 预支付标识\\|支付链接 |
+
+## 错误码
+
+| 错误码 | 子错误码 | 描述 | 解决方案 |
+| --- | --- | --- | --- |
+| 40044 | isp.code.order-closed | 订单已关闭 | 请使用新的订单号下单 |
+
+## 示例代码
+
+| 参数名称 | 类型 |
+| --- | --- |
+| ignored | string |
+"""
+
+
+class TestApiSpec:
+    """测试API文档解析及缓存"""
+
+    def test_parse(self):
+        """测试解析基本信息、参数表、嵌套参数及错误码"""
+        spec = parse_api_spec(API_DOC)
+        assert spec["title"] == "聚合支付统一下单"
+        assert spec["description"] == "商户通过该接口完成聚合支付下单"
+        assert (spec["method"], spec["path"]) == ("POST", "/rest/v1.0/aggpay/pre-pay")
+        assert spec["contentType"] == "application/x-www-form-urlencoded"
+
+        params = spec["requestParams"]
+        assert [p["name"] for p in params] == [
+            "parentMerchantNo",
+            "orderAmount",
+            "notifyUrl",
+        ]
+        assert params[0]["required"] is True and params[2]["required"] is False
+        assert params[0]["example"] == "10080009498"
+        assert "收款商户编号一致" in params[0]["description"]
+
+        response = spec["responseParams"]
+        assert response[2] == {
+            "name": "bankOrderId",
+            "type": "string",
+            "required": None,
+            "description": "银行订单号",
+            "level": 1,
+            "parent": "bankOrderInfo",
+        }
+        assert response[3]["description"] == "预支付标识|支付链接"
+        assert spec["errorCodes"] == [
+            {
+                "code": "40044",
+                "subCode": "isp.code.order-closed",
+                "description": "订单已关闭",
+                "solution": "请使用新的订单号下单",
+            }
+        ]
+        assert json.loads(spec["requestExample"])["orderAmount"] == "0.01"
+
+    def test_endpoint_fallback(self):
+        """测试基本信息缺失时从正文中识别请求方式及路径"""
+        spec = parse_api_spec(
+            "# 查询订单\n\n调用方式：GET /rest/v1.0/trade/order/query\n"
+        )
+        assert (spec["method"], spec["path"]) == ("GET", "/rest/v1.0/trade/order/query")
+
+    @patch("yop_mcp.main.HttpUtils.download_content")
+    def test_json_format_cached(self, mock_download):
+        """测试 format="json" 返回结构化定义，同一文档只解析一次"""
+        mock_download.return_value = API_DOC + "\n<!-- json format -->\n"
+        Metrics.reset("api_spec.")
+        first = yeepay_yop_api_detail("/rest/v1.0/aggpay/pre-pay", format="json")
+        second = yeepay_yop_api_detail("/rest/v1.0/aggpay/pre-pay", format="json")
+        assert first == second
+        assert json.loads(first)["errorCodes"][0]["code"] == "40044"
+        assert Metrics.get("api_spec.parses") == 1
+        assert api_spec(mock_download.return_value)["docHash"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,130 @@
+"""
+测试YOP回调通知验签及解密模块
+"""
+
+import base64
+import json
+import os
+import sys
+from urllib.parse import urlencode
+
+import pytest
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import padding as sym_padding
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.callback_verifier import verify_callback, verify_callbacks_batch
+from tools.config import Config
+
+MERCHANT_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+PLATFORM_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _seal(data, platform_key=PLATFORM_KEY):
+    """按YOP数字信封格式加密并签名通知数据"""
+    signature = platform_key.sign(data.encode(), padding.PKCS1v15(), hashes.SHA256())
+    plain = f"{data}${_b64url(signature)}".encode()
+    padder = sym_padding.PKCS7(128).padder()
+    plain = padder.update(plain) + padder.finalize()
+    random_key = os.urandom(16)
+    encryptor = Cipher(algorithms.AES(random_key), modes.ECB()).encryptor()
+    encrypted = encryptor.update(plain) + encryptor.finalize()
+    encrypted_key = MERCHANT_KEY.public_key().encrypt(random_key, padding.PKCS1v15())
+    return f"{_b64url(encrypted_key)}${_b64url(encrypted)}$AES$SHA256"
+
+
+@pytest.fixture
+def keys():
+    private_key = _b64(
+        MERCHANT_KEY.private_bytes(
+            serialization.Encoding.DER,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    platform_public = _b64(
+        PLATFORM_KEY.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    return {"private_key": private_key, "platform_cert": platform_public}
+
+
+class TestVerifyCallback:
+    """测试单个回调通知验签"""
+
+    def test_form_notification(self, keys):
+        """测试表单格式的通知解密并验签成功"""
+        data = json.dumps({"orderId": "ORDER-1", "status": "SUCCESS"})
+        notification = urlencode(
+            {"response": _seal(data), "customerIdentification": "app_100"}
+        )
+        result = verify_callback(notification, **keys)
+        assert result["verified"] is True
+        assert result["data"] == {"orderId": "ORDER-1", "status": "SUCCESS"}
+
+    def test_wrong_platform_key(self, keys):
+        """测试平台证书不匹配时验签失败，但仍返回解密后的数据"""
+        other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        result = verify_callback(_seal('{"a":1}', platform_key=other), **keys)
+        assert result["verified"] is False
+        assert result["data"] == {"a": 1}
+
+    def test_malformed_notification(self, keys):
+        """测试格式错误的通知"""
+        result = verify_callback("not-an-envelope", **keys)
+        assert result["data"] is None
+        assert "通知解密失败" in result["message"]
+
+    def test_platform_cert_file_missing(self, keys, tmp_path):
+        """测试平台证书文件不存在"""
+        result = verify_callback(
+            "x", keys["private_key"], str(tmp_path / "platform.cer")
+        )
+        assert "平台证书文件不存在" in result["message"]
+
+    def test_default_platform_cert_missing(self, keys, tmp_path, monkeypatch):
+        """测试未配置平台证书时提示设置 YOP_MCP_PLATFORM_CERT"""
+        monkeypatch.setattr(
+            Config, "YOP_PLATFORM_CERT_PATH", str(tmp_path / "platform.cer")
+        )
+        result = verify_callback("x", keys["private_key"])
+        assert "YOP_MCP_PLATFORM_CERT" in result["message"]
+
+
+class TestVerifyCallbacksBatch:
+    """测试批量重放通知"""
+
+    def test_batch_from_log(self, keys, tmp_path):
+        """测试从通知日志及列表批量验签"""
+        log_path = tmp_path / "notify.log"
+        lines = [urlencode({"response": _seal(f'{{"i":{i}}}')}) for i in range(5)]
+        log_path.write_text("\n".join(lines + ["", "broken"]), encoding="utf-8")
+
+        result = verify_callbacks_batch(
+            [json.dumps({"response": _seal('{"i":-1}')})], str(log_path), **keys
+        )
+        assert result["stats"] == {"verified": 6, "invalid": 0, "failed": 1}
+        assert [r["data"] for r in result["results"][:2]] == [{"i": -1}, {"i": 0}]
+
+    def test_empty_batch(self, keys):
+        """测试未提供通知"""
+        assert verify_callbacks_batch(**keys)["message"] == "未提供需要验证的通知"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,136 @@
+"""
+测试CFCA证书批量下载模块
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.cfca_stub import CfcaStub
+from tools.cert_batch import download_certs_batch, load_items
+from tools.cert_inventory import get_cert_inventory
+from tools.cert_utils import gen_key_pair
+from tools.metrics import Metrics
+
+PWD = "qwertyuiop12"
+
+
+@pytest.fixture(scope="module")
+def key_pairs():
+    return [gen_key_pair("RSA", "pkcs8", "string") for _ in range(3)]
+
+
+def _item(serial_no, key_pair, auth_code="AUTH"):
+    return {
+        "serialNo": serial_no,
+        "authCode": auth_code,
+        "privateKey": key_pair["privateKey"],
+        "publicKey": key_pair["publicKey"],
+        "pwd": PWD,
+    }
+
+
+class TestDownloadCertsBatch:
+    """测试批量下载证书"""
+
+    def test_batch_download_and_resume(self, tmp_path, monkeypatch, key_pairs):
+        """测试批量下载逐项返回结果，重新执行时跳过已完成的证书"""
+        monkeypatch.chdir(tmp_path)
+        stub = CfcaStub()
+        stub.errors["1003"] = ("100002", "证书已被激活")
+        items = [_item(f"100{i + 1}", pair) for i, pair in enumerate(key_pairs)]
+        progress = []
+
+        async def report(done, total):
+            progress.append((done, total))
+
+        result = asyncio.run(
+            download_certs_batch(
+                items, progress=report, concurrency=2, transport=stub.transport()
+            )
+        )
+
+        assert result["stats"] == {"success": 2, "skipped": 0, "failed": 1}
+        assert [r["serialNo"] for r in result["results"]] == ["1001", "1002", "1003"]
+        assert result["results"][2]["message"] == "证书已被激活"
+        assert os.path.exists(tmp_path / "certs" / "rsa" / "1001.pfx")
+        assert os.path.exists(tmp_path / "certs" / "rsa" / "1002.cer")
+        assert progress[-1] == (3, 3)
+        assert len(stub.requests) == 3
+
+        # 修复失败条目后重新执行，仅处理未完成的证书
+        del stub.errors["1003"]
+        result = asyncio.run(download_certs_batch(items, transport=stub.transport()))
+
+        assert result["stats"] == {"success": 1, "skipped": 2, "failed": 0}
+        assert len(stub.requests) == 4
+        # 下载完成的证书直接写入本地证书清单
+        certificates = get_cert_inventory().query()
+        assert sorted(cert["serialNo"] for cert in certificates) == [
+            "1001",
+            "1002",
+            "1003",
+        ]
+
+    def test_invalid_and_duplicate_items(self, tmp_path, monkeypatch, key_pairs):
+        """测试参数错误及重复序列号的条目单独失败，不影响其他条目"""
+        monkeypatch.chdir(tmp_path)
+        stub = CfcaStub()
+        items = [
+            _item("2001", key_pairs[0]),
+            _item("2001", key_pairs[1]),
+            _item("2002", key_pairs[1], auth_code=""),
+        ]
+
+        result = asyncio.run(download_certs_batch(items, transport=stub.transport()))
+
+        statuses = [(r["status"], r["message"]) for r in result["results"]]
+        assert statuses == [
+            ("success", "CFCA证书激活并下载成功"),
+            ("failed", "重复的证书序列号"),
+            ("failed", "授权码不能为空"),
+        ]
+        assert len(stub.requests) == 1
+
+    def test_cert_reqs_pregenerated(self, tmp_path, monkeypatch):
+        """测试证书请求批量预生成后，准备阶段全部命中服务进程中的缓存"""
+        monkeypatch.chdir(tmp_path)
+        stub = CfcaStub()
+        pairs = [gen_key_pair("RSA", "pkcs8", "string") for _ in range(2)]
+        items = [_item(f"400{i + 1}", pair) for i, pair in enumerate(pairs)]
+        Metrics.reset("p10.")
+
+        result = asyncio.run(download_certs_batch(items, transport=stub.transport()))
+
+        assert result["stats"]["success"] == 2
+        assert Metrics.get("p10.cache_misses") == 2
+        assert Metrics.get("p10.cache_hits") == 2
+
+    def test_load_items_from_csv(self, tmp_path):
+        """测试从CSV文件读取条目"""
+        csv_path = tmp_path / "certs.csv"
+        csv_path.write_text(
+            "serialNo,authCode,privateKey,publicKey,pwd,algorithm\n"
+            "3001,AUTH,pri,pub,qwertyuiop12,SM2\n",
+            encoding="utf-8",
+        )
+
+        (item,) = load_items(csv_path=str(csv_path))
+
+        assert item == {
+            "algorithm": "SM2",
+            "serial_no": "3001",
+            "auth_code": "AUTH",
+            "private_key": "pri",
+            "public_key": "pub",
+            "pwd": "qwertyuiop12",
+        }
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,126 @@
+"""
+测试本地证书清单模块
+"""
+
+import datetime
+import os
+import sys
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cert_inventory import CertInventory
+
+KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _write_cert(directory, serial_no, days, pfx=True):
+    name = x509.Name(
+        [
+            x509.NameAttribute(NameOID.COMMON_NAME, f"merchant-{serial_no}"),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "YOP"),
+        ]
+    )
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "CFCA")]))
+        .public_key(KEY.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=365))
+        .not_valid_after(now + datetime.timedelta(days=days))
+        .sign(KEY, hashes.SHA256())
+    )
+    path = directory / f"{serial_no}.cer"
+    path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    if pfx:
+        (directory / f"{serial_no}.pfx").write_bytes(b"pfx")
+    return path
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    rsa_dir = tmp_path / "certs" / "rsa"
+    sm2_dir = tmp_path / "certs" / "sm2"
+    rsa_dir.mkdir(parents=True)
+    _write_cert(rsa_dir, "1001", 10)
+    _write_cert(rsa_dir, "1002", 200)
+    _write_cert(rsa_dir, "1003", -5, pfx=False)
+    return CertInventory(
+        str(tmp_path / "cache" / "inventory.sqlite3"),
+        {"RSA": str(rsa_dir), "SM2": str(sm2_dir)},
+    )
+
+
+class TestCertInventoryQuery:
+    """测试证书清单查询"""
+
+    def test_query_all_sorted_by_expiry(self, inventory):
+        """测试按到期时间升序返回全部证书"""
+        inventory.rescan()
+        certificates = inventory.query()
+        assert [cert["serialNo"] for cert in certificates] == ["1003", "1001", "1002"]
+        expired = certificates[0]
+        assert expired["expired"] is True
+        assert expired["pfxCert"] is None
+        assert "CN=merchant-1003" in expired["subject"]
+        assert expired["issuer"] == "CN=CFCA"
+
+    def test_query_expiring_within(self, inventory):
+        """测试按到期天数过滤（含已过期证书）"""
+        inventory.rescan()
+        serials = [cert["serialNo"] for cert in inventory.query(expiring_within=30)]
+        assert serials == ["1003", "1001"]
+
+    def test_query_keyword(self, inventory):
+        """测试按序列号、主题关键字过滤"""
+        inventory.rescan()
+        assert [cert["serialNo"] for cert in inventory.query("1002")] == ["1002"]
+        assert len(inventory.query("merchant")) == 3
+        assert inventory.query("SM2") == []
+        # _ 及 % 按字面匹配，不作为通配符
+        assert inventory.query("10_2") == []
+        assert inventory.query("%") == []
+
+
+class TestCertInventoryUpdate:
+    """测试证书清单的增量更新"""
+
+    def test_incremental_rescan(self, inventory, tmp_path):
+        """测试只更新新增、变化及删除的证书"""
+        rsa_dir = tmp_path / "certs" / "rsa"
+        assert inventory.rescan() == {"files": 3, "updated": 3, "removed": 0}
+        assert inventory.rescan() == {"files": 3, "updated": 0, "removed": 0}
+
+        (rsa_dir / "1003.pfx").write_bytes(b"pfx")
+        os.remove(rsa_dir / "1002.cer")
+        assert inventory.rescan() == {"files": 2, "updated": 1, "removed": 1}
+        assert inventory.query("1003")[0]["pfxCert"].endswith("1003.pfx")
+
+    def test_record_downloaded_cert(self, inventory, tmp_path):
+        """测试下载证书后直接写入清单"""
+        sm2_dir = tmp_path / "certs" / "sm2"
+        sm2_dir.mkdir()
+        path = _write_cert(sm2_dir, "2001", 60)
+        inventory.record(str(path), "SM2")
+        certificates = inventory.query("SM2")
+        assert [cert["serialNo"] for cert in certificates] == ["2001"]
+
+    def test_unparsable_cert(self, inventory, tmp_path):
+        """测试无法解析的证书文件记录错误信息"""
+        (tmp_path / "certs" / "rsa" / "bad.cer").write_bytes(b"not a cert")
+        inventory.rescan()
+        bad = inventory.query("bad")[0]
+        assert bad["notAfter"] is None
+        assert "证书解析失败" in bad["error"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
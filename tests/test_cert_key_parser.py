@@ -0,0 +1,126 @@
+"""
+测试证书密钥解析模块
+"""
+
+import datetime
+import hashlib
+import os
+import sys
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.x509.oid import NameOID
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import cert_key_parser
+from tools.cert_key_parser import parse_certificates, parse_certificates_dir
+from tools.metrics import Metrics
+
+PWD = "qwertyuiop12"
+
+
+def _write_cert_pair(directory, serial_no):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, serial_no)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=30))
+        .sign(key, hashes.SHA256())
+    )
+    (directory / f"{serial_no}.cer").write_bytes(
+        cert.public_bytes(serialization.Encoding.PEM)
+    )
+    (directory / f"{serial_no}.pfx").write_bytes(
+        pkcs12.serialize_key_and_certificates(
+            serial_no.encode(),
+            key,
+            cert,
+            None,
+            serialization.BestAvailableEncryption(PWD.encode()),
+        )
+    )
+
+
+@pytest.fixture
+def cert_dir(tmp_path):
+    cert_key_parser._parse_cache.clear()
+    Metrics.reset("cert_parse.")
+    for serial_no in ("1001", "1002"):
+        _write_cert_pair(tmp_path, serial_no)
+    (tmp_path / "readme.txt").write_text("ignored", encoding="utf-8")
+    return tmp_path
+
+
+class TestParseCertificatesDir:
+    """测试目录批量解析及结果缓存"""
+
+    def test_parse_dir_and_rescan_from_cache(self, cert_dir):
+        """测试并行解析目录，重复扫描时全部命中缓存"""
+        result = parse_certificates_dir(str(cert_dir), PWD)
+
+        assert result["stats"] == {"files": 4, "parsed": 4, "cached": 0, "failed": 0}
+        by_path = {os.path.basename(c["path"]): c for c in result["certificates"]}
+        assert by_path["1001.pfx"]["privateKey"]
+        assert by_path["1001.pfx"]["publicKey"] == by_path["1001.cer"]["publicKey"]
+        assert by_path["1002.cer"]["keyType"] == "RSA"
+
+        rescan = parse_certificates_dir(str(cert_dir), PWD)
+
+        assert rescan["stats"] == {"files": 4, "parsed": 0, "cached": 4, "failed": 0}
+        assert rescan["certificates"] == result["certificates"]
+
+    def test_cache_invalidated_by_mtime_and_password(self, cert_dir):
+        """测试文件修改或密码变化时重新解析"""
+        parse_certificates_dir(str(cert_dir), PWD)
+        pfx_path = cert_dir / "1001.pfx"
+        stat = os.stat(pfx_path)
+        os.utime(pfx_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert parse_certificates_dir(str(cert_dir), PWD)["stats"]["parsed"] == 1
+
+        wrong = parse_certificates_dir(str(cert_dir), "wrong-password")
+        assert wrong["stats"]["parsed"] == 2
+        assert wrong["stats"]["failed"] == 2
+
+    def test_missing_dir(self, tmp_path):
+        """测试目录不存在"""
+        result = parse_certificates_dir(str(tmp_path / "missing"))
+
+        assert result["message"].startswith("证书目录不存在")
+        assert result["certificates"] == []
+
+    def test_parse_certificates_uses_cache(self, cert_dir):
+        """测试单个证书解析同样复用缓存"""
+        pfx = str(cert_dir / "1001.pfx")
+        first = parse_certificates("RSA", pfx_cert=pfx, pwd=PWD)
+        second = parse_certificates("RSA", pfx_cert=pfx, pwd=PWD)
+
+        assert first == second
+        assert Metrics.get("cert_parse.parsed") == 1
+        assert Metrics.get("cert_parse.cache_hits") == 1
+
+    def test_cache_holds_no_plaintext(self, cert_dir):
+        """测试缓存中不保存Base64私钥及密码的无盐哈希"""
+        pfx = str(cert_dir / "1001.pfx")
+        private_key = parse_certificates("RSA", pfx_cert=pfx, pwd=PWD)["privateKey"]
+
+        ((key, (result, key_object, _)),) = cert_key_parser._parse_cache.items()
+        assert hashlib.sha256(PWD.encode()).hexdigest() not in key
+        assert result["private_key"] is None
+        assert isinstance(key_object, rsa.RSAPrivateKey)
+        assert private_key not in repr(cert_key_parser._parse_cache)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,101 @@
+"""
+测试证书到期监控模块
+"""
+
+import datetime
+import os
+import sys
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cert_monitor import CertExpiryMonitor, cert_expiry_status
+from tools.config import Config
+from tools.metrics import Metrics
+
+KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _write_cert(directory, serial_no, days):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, serial_no)])
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(KEY.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=365))
+        .not_valid_after(now + datetime.timedelta(days=days))
+        .sign(KEY, hashes.SHA256())
+    )
+    (directory / f"{serial_no}.cer").write_bytes(
+        cert.public_bytes(serialization.Encoding.PEM)
+    )
+
+
+@pytest.fixture
+def cert_dir(tmp_path, monkeypatch):
+    rsa_dir = tmp_path / "certs" / "rsa"
+    rsa_dir.mkdir(parents=True)
+    monkeypatch.setattr(Config, "RSA_CERT_SAVE_PATH", str(rsa_dir))
+    monkeypatch.setattr(Config, "SM2_CERT_SAVE_PATH", str(tmp_path / "certs" / "sm2"))
+    monkeypatch.setattr(
+        Config, "CERT_INVENTORY_PATH", str(tmp_path / "cache" / "inventory.sqlite3")
+    )
+    monkeypatch.setattr(Config, "CERT_MONITOR_INTERVAL", 0)
+    _write_cert(rsa_dir, "2001", 10)
+    _write_cert(rsa_dir, "2002", 200)
+    _write_cert(rsa_dir, "2003", -1)
+    return rsa_dir
+
+
+class TestCertExpiryMonitor:
+    """测试证书到期检查"""
+
+    def test_check_flags_expiring(self, cert_dir, capsys):
+        """测试标记预警期内及已过期的证书，只告警一次且告警不写入stdout"""
+        monitor = CertExpiryMonitor(interval=0, warn_days=30)
+        result = monitor.check()
+        assert [c["serialNo"] for c in result["certificates"]] == ["2003", "2001"]
+        assert (result["expired"], result["expiring"]) == (1, 1)
+        assert 9 < result["certificates"][1]["daysLeft"] <= 10
+        assert Metrics.get("cert_monitor.expiring") == 1
+        captured = capsys.readouterr()
+        assert "证书已过期：2003" in captured.err
+        assert captured.out == ""
+
+        # 证书文件未变化时不重新解析，也不重复告警
+        result = monitor.check()
+        assert result["stats"]["updated"] == 0
+        assert capsys.readouterr().err == ""
+
+    def test_background_thread(self, cert_dir):
+        """测试后台线程启动后执行检查并可停止"""
+        monitor = CertExpiryMonitor(interval=3600, warn_days=30)
+        monitor.start()
+        try:
+            for _ in range(100):
+                if monitor.last_result() is not None:
+                    break
+                monitor._stop.wait(0.05)
+            assert monitor.last_result()["expired"] == 1
+        finally:
+            monitor.stop()
+        assert monitor._thread is None
+
+    def test_status_without_monitor(self, cert_dir):
+        """测试未启用后台监控时按指定天数立即检查"""
+        result = cert_expiry_status(warn_days=365)
+        assert result["monitor"] is False
+        assert len(result["certificates"]) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
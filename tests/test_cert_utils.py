@@ -0,0 +1,109 @@
+"""
+测试证书工具模块
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import cert_utils
+from tools.cert_utils import CertUtils, KeyType, gen_key_pair, gen_key_pairs_batch
+from tools.metrics import Metrics
+
+
+class TestCertChainCache:
+    """测试CFCA证书链缓存"""
+
+    def setup_method(self):
+        cert_utils._cert_chain_cache.clear()
+        Metrics.reset("cert_chain.")
+
+    def test_chain_parsed_once(self):
+        """测试重复加载时复用解析结果"""
+        first = CertUtils.load_cert_chain(KeyType.RSA2048)
+        second = CertUtils.load_cert_chain(KeyType.RSA2048)
+
+        assert len(first) == 2
+        assert first == second
+        assert first is not second
+        assert Metrics.get("cert_chain.loads") == 1
+        assert Metrics.get("cert_chain.cache_hits") == 1
+
+    def test_chain_reloaded_when_mtime_changes(self):
+        """测试证书文件修改时间变化时重新加载"""
+        CertUtils.load_cert_chain(KeyType.SM2)
+        key = (KeyType.SM2, False)
+        mtimes, certs = cert_utils._cert_chain_cache[key]
+        cert_utils._cert_chain_cache[key] = (tuple(m - 1 for m in mtimes), certs)
+
+        CertUtils.load_cert_chain(KeyType.SM2)
+
+        assert Metrics.get("cert_chain.loads") == 2
+
+    def test_chain_cached_per_environment(self):
+        """测试生产与QA环境分别缓存"""
+        prod = CertUtils.load_cert_chain(KeyType.RSA2048)
+        with patch("tools.cert_utils.os.path.exists", return_value=True):
+            qa = CertUtils.load_cert_chain(KeyType.RSA2048)
+
+        assert prod[0].subject != qa[0].subject
+        assert set(cert_utils._cert_chain_cache) == {
+            (KeyType.RSA2048, False),
+            (KeyType.RSA2048, True),
+        }
+
+    def test_preload(self):
+        """测试预加载全部密钥类型的证书链"""
+        CertUtils.preload_cert_chains()
+
+        assert Metrics.get("cert_chain.loads") == len(KeyType)
+
+
+class TestGenKeyPairsBatch:
+    """测试批量生成密钥对"""
+
+    def test_batch_writes_unique_files(self, tmp_path, monkeypatch):
+        """测试批量生成的密钥对互不相同，并以唯一文件名保存、逐个上报进度"""
+        monkeypatch.chdir(tmp_path)
+        progress = []
+
+        async def report(done, total):
+            progress.append((done, total))
+
+        result = asyncio.run(gen_key_pairs_batch(3, "RSA", "pkcs8", "file", report))
+
+        assert result["count"] == 3
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+        assert len({pair["privateKey"] for pair in result["keyPairs"]}) == 3
+        assert len(os.listdir(tmp_path / "keys")) == 6
+        for pair in result["keyPairs"]:
+            with open(pair["privateCert"], "r", encoding="utf-8") as f:
+                assert f.read() == pair["privateKey"]
+            assert CertUtils.check_key(
+                pair["privateKey"], pair["publicKey"], KeyType.RSA2048
+            )
+
+    def test_batch_invalid_arguments(self):
+        """测试生成数量或算法参数无效时直接返回"""
+        assert asyncio.run(gen_key_pairs_batch(0))["count"] == 0
+        result = asyncio.run(gen_key_pairs_batch(2, "SM2", "pkcs1"))
+        assert result["message"] == "SM2密钥只支持生成PKCS8格式"
+        assert result["keyPairs"] == []
+
+    def test_single_key_pair_format(self):
+        """测试单个密钥对的PKCS1格式输出不含PEM头尾"""
+        result = gen_key_pair("RSA", "pkcs1", "string")
+
+        assert result["privateKey"].startswith("MII")
+        assert "-----" not in result["privateKey"]
+        assert result["privateCert"] is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+"""
+测试CFCA证书下载客户端
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.cfca_stub import CfcaStub
+from tools.cert_utils import CertUtils, KeyType, gen_key_pair
+from tools.cfca_client import CfcaClient, CfcaError
+
+
+@pytest.fixture(scope="module")
+def cert_req():
+    key_pair = gen_key_pair("RSA", "pkcs8", "string")
+    return CertUtils.gen_p10(
+        key_pair["privateKey"], key_pair["publicKey"], KeyType.RSA2048
+    )
+
+
+def _client(stub, **kwargs):
+    return CfcaClient(backoff=0, transport=stub.transport(), **kwargs)
+
+
+class TestCfcaClient:
+    """测试CFCA客户端的连接复用、错误分类及重试"""
+
+    def test_retry_resends_same_request(self, cert_req):
+        """测试可重试的失败（5xx、连接失败）重发相同请求，并复用同一连接"""
+        stub = CfcaStub()
+        stub.http_failures["3001"] = [503, 502]
+        stub.connect_failures["3001"] = 1
+
+        async def run():
+            async with _client(stub) as client:
+                cert = await client.fetch("3001", "AUTH", cert_req)
+                http = client._client()
+                await client.fetch("3002", "AUTH", cert_req)
+                assert client._client() is http
+                return cert
+
+        assert asyncio.run(run()).startswith("-----BEGIN CERTIFICATE-----")
+        first = [r for r in stub.requests if r.url.params["serialNo"] == "3001"]
+        assert len(first) == 4
+        assert len({str(r.url) for r in first}) == 1
+
+    def test_terminal_errors_not_retried(self, cert_req):
+        """测试认证失败及业务错误不重试"""
+        stub = CfcaStub()
+        stub.http_failures["3003"] = [401]
+        stub.errors["3004"] = ("100002", "证书已被激活")
+
+        async def run():
+            async with _client(stub) as client:
+                with pytest.raises(CfcaError) as error:
+                    await client.fetch("3003", "AUTH", cert_req)
+                assert error.value.retryable is False
+                result = await client.download("3004", "AUTH", cert_req)
+                assert result.error_msg == "证书已被激活"
+
+        asyncio.run(run())
+        assert len(stub.requests) == 2
+
+    def test_client_per_event_loop(self, cert_req):
+        """测试每个事件循环使用各自的连接，已关闭事件循环上的客户端被丢弃"""
+        stub = CfcaStub()
+        client = _client(stub)
+
+        async def fetch(serial_no):
+            await client.fetch(serial_no, "AUTH", cert_req)
+            return client._client()
+
+        first_loop = asyncio.new_event_loop()
+        first = first_loop.run_until_complete(fetch("3006"))
+        first_loop.close()
+        second_loop = asyncio.new_event_loop()
+        try:
+            second = second_loop.run_until_complete(fetch("3007"))
+
+            assert first is not second
+            assert list(client._states) == [second_loop]
+            second_loop.run_until_complete(client.aclose())
+            assert len(client._states) == 0
+        finally:
+            second_loop.close()
+
+    def test_retries_exhausted(self, cert_req):
+        """测试重试次数用完后返回最后一次的错误"""
+        stub = CfcaStub()
+        stub.http_failures["3005"] = [503] * 5
+
+        async def run():
+            async with _client(stub, max_retries=2) as client:
+                return await client.download("3005", "AUTH", cert_req)
+
+        assert asyncio.run(run()).error_msg == "下载证书失败: HTTP请求失败: HTTP 503"
+        assert len(stub.requests) == 3
+
+    def test_idempotent_per_serial(self, cert_req):
+        """测试同一序列号的并发请求合并，成功后重复调用不再请求CFCA"""
+        stub = CfcaStub()
+        stub.http_failures["3006"] = [503]
+
+        async def run():
+            async with _client(stub) as client:
+                certs = await asyncio.gather(
+                    *(client.fetch("3006", "AUTH", cert_req) for _ in range(5))
+                )
+                certs.append(await client.fetch("3006", "AUTH", cert_req))
+                with pytest.raises(CfcaError):
+                    other = asyncio.ensure_future(client.fetch("3007", "AUTH", "A"))
+                    await asyncio.sleep(0)
+                    await client.fetch("3007", "AUTH", "B")
+                await asyncio.gather(other, return_exceptions=True)
+                return certs
+
+        certs = asyncio.run(run())
+        assert len(set(certs)) == 1
+        assert [r.url.params["serialNo"] for r in stub.requests].count("3006") == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
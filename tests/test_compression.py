@@ -0,0 +1,65 @@
+"""
+测试压缩编解码模块
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import compression
+from tools.compression import StreamDecoder
+
+
+class TestCompression:
+    """测试压缩编解码工具"""
+
+    @pytest.mark.parametrize("encoding", compression.available_encodings())
+    def test_round_trip(self, encoding):
+        """测试各可用编码压缩后可还原"""
+        data = "易宝支付开放平台 llms.txt\n".encode("utf-8") * 500
+        compressed = compression.compress(data, encoding)
+
+        assert len(compressed) < len(data)
+        assert compression.decompress(compressed, encoding) == data
+
+    def test_stream_decoder_chunked(self):
+        """测试逐字节喂入时的流式解压"""
+        data = b"markdown body " * 1000
+        compressed = compression.compress(data, "gzip")
+
+        decoder = StreamDecoder("gzip")
+        output = b"".join(
+            decoder.decompress(compressed[i : i + 1]) for i in range(len(compressed))
+        )
+        output += decoder.flush()
+
+        assert output == data
+
+    def test_stream_decoder_multiple_encodings(self):
+        """测试多重编码按相反顺序解压"""
+        data = b"nested encoding"
+        encoded = compression.compress(compression.compress(data, "gzip"), "gzip")
+
+        decoder = StreamDecoder("gzip, gzip")
+
+        assert decoder.decompress(encoded) + decoder.flush() == data
+
+    def test_accept_encoding(self):
+        """测试Accept-Encoding按优先级声明"""
+        header = compression.accept_encoding()
+
+        assert header.split(",")[0].strip() == compression.available_encodings()[0]
+        assert "gzip" in header
+
+    def test_unsupported_encoding(self):
+        """测试不支持的编码"""
+        with pytest.raises(ValueError):
+            StreamDecoder("compress")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
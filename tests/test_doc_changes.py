@@ -0,0 +1,142 @@
+"""
+测试文档变更检测模块
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.doc_changes import (
+    DocChangeTracker,
+    api_doc_id,
+    doc_changes,
+    load_history_hints,
+    parse_since,
+)
+from tools.doc_store import DocStore, get_doc_store
+from tools.http_utils import HttpUtils
+
+API_URL = "https://open.yeepay.com/docs-v3/api/post_rest_v1.0_aggpay_pre-pay.md"
+PAGE_URL = "https://open.yeepay.com/docs-v3/platform/201.md"
+
+
+def _response(status, content=None, validators=None):
+    return {
+        "status": status,
+        "content": content,
+        "validators": validators or {},
+        "error": None,
+    }
+
+
+class TestDocChanges:
+    """测试文档变更检测"""
+
+    def test_not_modified_uses_conditional_request(self, tmp_path):
+        """测试有ETag的文档使用条件请求，304时不下载内容"""
+        store = DocStore(str(tmp_path))
+        store.put(PAGE_URL, "v1", etag='"abc"')
+        fetch = MagicMock(return_value=_response(304))
+
+        stats = DocChangeTracker(store, fetch=fetch, hints={}).check()
+
+        fetch.assert_called_once_with(PAGE_URL, etag='"abc"', last_modified=None)
+        assert stats["notModified"] == 1
+        assert stats["changed"] == 0
+
+    def test_changed_document_has_diff(self, tmp_path):
+        """测试文档变更时记录变更并生成diff"""
+        store = DocStore(str(tmp_path))
+        store.put(PAGE_URL, "line1\nline2\n", etag='"v1"')
+        fetch = MagicMock(
+            return_value=_response(200, "line1\nline2 changed\n", {"etag": '"v2"'})
+        )
+        tracker = DocChangeTracker(store, fetch=fetch, hints={})
+
+        stats = tracker.check()
+        changes = tracker.changes_since(None)
+
+        assert stats["changed"] == 1
+        assert len(changes) == 1
+        assert "-line2\n+line2 changed" in changes[0]["diff"]
+        assert store.entry(PAGE_URL)["etag"] == '"v2"'
+
+    def test_reverted_document_keeps_each_diff(self, tmp_path):
+        """测试文档改回旧内容后，每条变更记录的diff仍对应各自的旧版本"""
+        store = DocStore(str(tmp_path))
+        store.put(PAGE_URL, "A\n")
+        fetch = MagicMock()
+        tracker = DocChangeTracker(store, fetch=fetch, hints={})
+        for content in ("B\n", "C\n", "B\n"):
+            fetch.return_value = _response(200, content)
+            tracker.check()
+
+        diffs = [change["diff"] for change in tracker.changes_since(None)]
+
+        assert len(diffs) == 3
+        assert "-A\n+B" in diffs[0]
+        assert "-B\n+C" in diffs[1]
+        assert "-C\n+B" in diffs[2]
+
+    def test_history_count_hint(self, tmp_path):
+        """测试historyCount未变化时仍以条件请求校验，变化时不带校验信息重新获取"""
+        store = DocStore(str(tmp_path))
+        store.put(API_URL, "v1", history_count=2, etag='"v1"')
+        doc_id = api_doc_id(API_URL)
+        fetch = MagicMock(return_value=_response(304))
+
+        unchanged = DocChangeTracker(store, fetch=fetch, hints={doc_id: 2}).check()
+        fetch.assert_called_once_with(API_URL, etag='"v1"', last_modified=None)
+        assert unchanged["notModified"] == 1
+
+        fetch.reset_mock()
+        fetch.return_value = _response(200, "v2")
+        changed = DocChangeTracker(store, fetch=fetch, hints={doc_id: 3}).check()
+        fetch.assert_called_once_with(API_URL, etag=None, last_modified=None)
+        assert changed["changed"] == 1
+        assert store.entry(API_URL)["history_count"] == 3
+
+    def test_no_validators_compares_hash(self, tmp_path):
+        """测试首次缓存时记录historyCount；无校验信息的文档重新获取后按内容哈希判断是否变更"""
+        with patch("tools.config.Config.DOC_CACHE_PATH", str(tmp_path)):
+            HttpUtils.cache_document(API_URL, "v1")
+            store = get_doc_store()
+        hints = load_history_hints()
+        assert store.entry(API_URL)["history_count"] == hints[api_doc_id(API_URL)]
+
+        fetch = MagicMock(return_value=_response(200, "v1"))
+        tracker = DocChangeTracker(store, fetch=fetch, hints=hints)
+        assert tracker.check()["notModified"] == 1
+        fetch.return_value = _response(200, "v2")
+        assert tracker.check()["changed"] == 1
+        assert fetch.call_count == 2
+
+    def test_load_history_hints(self):
+        """测试从产品目录树读取historyCount"""
+        hints = load_history_hints()
+
+        assert hints["options_yos_v1.0_sys_merchant_qual_upload"] >= 1
+        assert "post_yos_v1.0_sys_merchant_qual_upload" in hints
+
+    def test_parse_since(self):
+        """测试起始时间解析"""
+        assert parse_since("") is None
+        assert parse_since("1700000000") == 1700000000.0
+        assert parse_since("2025-07-01") > 0
+
+    def test_doc_changes_requires_cache(self):
+        """测试未启用文档缓存时的提示"""
+        with patch("tools.config.Config.DOC_CACHE_PATH", ""):
+            result = doc_changes()
+
+        assert "YOP_MCP_DOC_CACHE_PATH" in result["message"]
+        assert result["changes"] == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,130 @@
+"""
+测试文档缓存存储模块
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import compression
+from tools.doc_store import DocStore, content_hash, get_doc_store
+
+
+class TestDocStore:
+    """测试内容寻址文档存储"""
+
+    def test_put_and_get(self, tmp_path):
+        """测试保存后可按URL和哈希读取，且落盘内容为压缩格式"""
+        store = DocStore(str(tmp_path))
+        content = "# 聚合支付预下单\n" * 100
+
+        digest = store.put("https://open.yeepay.com/docs-v3/api/a.md", content)
+
+        assert digest == content_hash(content)
+        assert store.get("https://open.yeepay.com/docs-v3/api/a.md") == content
+        assert store.get_by_hash(digest) == content
+        object_path = tmp_path / "objects" / digest[:2] / digest
+        assert object_path.stat().st_size < len(content.encode("utf-8"))
+        assert compression.decompress(
+            object_path.read_bytes(), compression.storage_encoding()
+        ) == content.encode("utf-8")
+
+    def test_identical_content_shares_storage(self, tmp_path):
+        """测试不同URL的相同内容共享同一对象"""
+        store = DocStore(str(tmp_path))
+        content = "same body"
+
+        store.put("https://open.yeepay.com/docs-v2/apis/x/index.html", content)
+        store.put("https://open.yeepay.com/docs-v3/api/x.md", content)
+
+        stats = store.stats()
+        assert stats["urls"] == 2
+        assert stats["objects"] == 1
+
+    def test_manifest_persisted(self, tmp_path):
+        """测试清单持久化后可重新加载"""
+        DocStore(str(tmp_path)).put("u", "persisted")
+
+        assert DocStore(str(tmp_path)).get("u") == "persisted"
+
+    def test_lru_eviction(self, tmp_path):
+        """测试超过字节上限时淘汰最久未访问的对象"""
+        store = DocStore(str(tmp_path), max_bytes=10**9)
+        bodies = {url: os.urandom(2000).hex() for url in ("a", "b", "c")}
+        for url, body in bodies.items():
+            store.put(url, body)
+        store.get("a")  # a 成为最近访问
+        store.max_bytes = store.stats()["storedBytes"] - 1
+
+        store.put("a", bodies["a"])
+
+        assert store.get("b") is None
+        assert store.get("a") == bodies["a"]
+        assert store.stats()["storedBytes"] <= store.max_bytes
+
+    def test_compact(self, tmp_path):
+        """测试整理时删除孤立文件和未引用对象"""
+        store = DocStore(str(tmp_path))
+        store.put("u", "first")
+        store.put("u", "second")
+        orphan = tmp_path / "objects" / "zz" / "orphan"
+        orphan.parent.mkdir(parents=True)
+        orphan.write_bytes(b"x")
+
+        result = store.compact()
+
+        assert result["removedObjects"] == 1
+        assert result["removedFiles"] == 1
+        assert store.stats()["objects"] == 1
+        assert store.get("u") == "second"
+
+    def test_manifest_writes_coalesced(self, tmp_path):
+        """测试连续写入时清单合并写入，flush 后重新加载的清单与内存一致"""
+        store = DocStore(str(tmp_path))
+        with patch.object(
+            DocStore, "_write_atomic", wraps=DocStore._write_atomic
+        ) as write:
+            for i in range(20):
+                store.put(f"u{i}", f"body {i}")
+            manifest_writes = [
+                c for c in write.call_args_list if c.args[0].endswith("manifest.json")
+            ]
+            assert len(manifest_writes) <= 1
+            store.flush()
+
+        reloaded = DocStore(str(tmp_path))
+        assert reloaded.get("u19") == "body 19"
+        assert reloaded.stats()["storedBytes"] == store.stats()["storedBytes"]
+
+    def test_eviction_drops_all_references(self, tmp_path):
+        """测试淘汰对象时同时删除引用它的URL及派生内容，总字节数保持准确"""
+        store = DocStore(str(tmp_path), max_bytes=10**9)
+        body = os.urandom(2000).hex()
+        store.put("a", body)
+        store.put("a2", body)
+        store.put_derived("markdown", "src", body)
+        store.put("b", os.urandom(2000).hex())
+        store.get("b")
+        store.max_bytes = store.stats()["storedBytes"] - 1
+
+        store.put("c", "small")
+
+        assert store.urls() == ["b", "c"]
+        assert store.get_derived("markdown", "src") is None
+        assert store.stats()["storedBytes"] == sum(
+            o["stored"] for o in store._objects.values()
+        )
+
+    def test_default_store_disabled(self):
+        """测试未配置缓存目录时不启用缓存"""
+        with patch("tools.config.Config.DOC_CACHE_PATH", ""):
+            assert get_doc_store() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
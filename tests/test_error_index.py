@@ -0,0 +1,112 @@
+"""
+测试全局错误码索引模块
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.test_api_spec import API_DOC
+from tools import error_index
+from tools.api_spec import API_DOC_BASE_URL, api_spec
+from tools.error_index import ErrorCodeIndex, get_error_index
+from yop_mcp.main import yeepay_yop_api_detail, yeepay_yop_lookup_error_code
+
+REFUND_PATH = "/rest/v1.0/trade/refund"
+REFUND_DOC = API_DOC.replace("/rest/v1.0/aggpay/pre-pay", REFUND_PATH).replace(
+    "订单已关闭", "退款订单已关闭"
+)
+
+
+def _spec(path, *errors):
+    return {
+        "path": path,
+        "method": "POST",
+        "title": path,
+        "errorCodes": [
+            {"code": code, "subCode": sub_code, "description": desc, "solution": ""}
+            for code, sub_code, desc in errors
+        ],
+    }
+
+
+class TestErrorCodeIndex:
+    """测试错误码索引的写入、替换及查询"""
+
+    def test_lookup_and_replace(self):
+        """测试按错误码及子错误码精确查询、关键字查询，同一API重新写入时替换旧条目"""
+        index = ErrorCodeIndex()
+        index.add_spec(
+            _spec("/rest/a", ("40044", "isp.code.order-closed", "订单已关闭"))
+        )
+        index.add_spec(_spec("/rest/b", ("40044", "isp.code.amount-error", "金额错误")))
+
+        assert {e["api"] for e in index.lookup("40044")} == {"/rest/a", "/rest/b"}
+        assert [e["api"] for e in index.lookup("ISP.CODE.ORDER-CLOSED")] == ["/rest/a"]
+        assert [e["subCode"] for e in index.lookup("金额")] == ["isp.code.amount-error"]
+
+        index.add_spec(_spec("/rest/a", ("40029", "isp.code.param-error", "参数错误")))
+        assert index.lookup("isp.code.order-closed") == []
+        assert [e["api"] for e in index.lookup("40044")] == ["/rest/b"]
+        assert index.stats() == {"apis": 2, "entries": 2, "codes": 4}
+
+    def test_api_spec_feeds_index(self):
+        """测试解析API文档时错误码自动写入全局索引"""
+        api_spec(API_DOC.replace("40044", "40099"))
+        matches = get_error_index().lookup("40099")
+        assert matches[0]["api"] == "/rest/v1.0/aggpay/pre-pay"
+        assert matches[0]["solution"] == "请使用新的订单号下单"
+
+    @patch("yop_mcp.main.HttpUtils.download_content")
+    def test_markdown_detail_feeds_index(self, mock_download):
+        """测试以markdown格式获取的API文档同样写入全局索引"""
+        mock_download.return_value = API_DOC.replace("40044", "40098")
+
+        yeepay_yop_api_detail("/rest/v1.0/aggpay/pre-pay")
+
+        assert (
+            get_error_index().lookup("40098")[0]["api"] == "/rest/v1.0/aggpay/pre-pay"
+        )
+
+    def test_build_concurrency_clamped(self):
+        """测试批量构建的并发数限制在上限内"""
+        index = ErrorCodeIndex()
+        paths = [f"/rest/v1.0/api{i}" for i in range(100)]
+        with patch.object(
+            error_index, "ThreadPoolExecutor", wraps=error_index.ThreadPoolExecutor
+        ) as pool:
+            stats = index.build(paths, lambda path: _spec(path), max_workers=10000)
+
+        assert pool.call_args.kwargs["max_workers"] == error_index.MAX_BUILD_WORKERS
+        assert stats["indexed"] == 100
+
+    @patch("yop_mcp.main.HttpUtils.download_content")
+    def test_tool_build(self, mock_download):
+        """测试按产品目录批量构建索引，已索引的API再次构建时不重复下载"""
+        refund_url = API_DOC_BASE_URL + "post_rest_v1.0_trade_refund.md"
+        mock_download.side_effect = lambda url: (
+            REFUND_DOC if url == refund_url else "HTTP请求失败: HTTP 404"
+        )
+        get_error_index().clear()
+
+        result = asyncio.run(
+            yeepay_yop_lookup_error_code("退款订单已关闭", build=True, concurrency=4)
+        )
+        assert result["matches"][0]["api"] == REFUND_PATH
+        assert result["build"]["indexed"] >= 1 and result["build"]["failed"] > 0
+        assert result["stats"]["apis"] == result["build"]["indexed"]
+
+        mock_download.reset_mock()
+        again = asyncio.run(yeepay_yop_lookup_error_code("", build=True))
+        assert again["build"]["skipped"] == result["build"]["indexed"]
+        assert refund_url not in [c.args[0] for c in mock_download.call_args_list]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
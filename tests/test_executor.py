@@ -0,0 +1,91 @@
+"""
+测试任务执行层模块
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import executor
+from tools.config import Config
+from tools.executor import ExecutorBusyError, ExecutorTimeoutError, run_blocking
+from tools.metrics import Metrics
+
+
+def _pid_and_sum(a, b):
+    return os.getpid(), a + b
+
+
+class TestRunBlocking:
+    """测试执行器提交、排队上限及超时"""
+
+    def setup_method(self):
+        Metrics.reset("executor.")
+
+    def test_thread_executor(self):
+        """测试在线程池中执行并记录指标"""
+        result = asyncio.run(run_blocking(sum, [1, 2, 3], kind="thread"))
+
+        assert result == 6
+        assert Metrics.get("executor.completed") == 1
+        assert Metrics.get("executor.in_flight") == 0
+
+    def test_process_executor(self):
+        """测试在进程池中执行模块级函数"""
+        pid, total = asyncio.run(run_blocking(_pid_and_sum, 1, b=2, kind="process"))
+
+        assert total == 3
+        assert pid != os.getpid()
+
+    def test_queue_limit_and_timeout(self):
+        """测试排队已满时拒绝新任务，超时任务返回超时错误"""
+        release = threading.Event()
+
+        async def scenario():
+            with patch.object(Config, "EXECUTOR_MAX_QUEUE", 1):
+                slow = asyncio.ensure_future(
+                    run_blocking(release.wait, 5, kind="thread", timeout=0.2)
+                )
+                await asyncio.sleep(0.05)
+                with pytest.raises(ExecutorBusyError):
+                    await run_blocking(time.sleep, 0, kind="thread")
+                with pytest.raises(ExecutorTimeoutError):
+                    await slow
+
+        asyncio.run(scenario())
+        release.set()
+
+        assert Metrics.get("executor.rejected") == 1
+        assert Metrics.get("executor.timeouts") == 1
+
+    def test_event_loop_not_blocked(self):
+        """测试执行CPU密集型任务时事件循环仍可响应"""
+
+        async def scenario():
+            task = asyncio.ensure_future(
+                run_blocking(_pid_and_sum, 1, 2, kind="process")
+            )
+            ticks = 0
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.001)
+            await task
+            return ticks
+
+        assert asyncio.run(scenario()) > 0
+
+    @classmethod
+    def teardown_class(cls):
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
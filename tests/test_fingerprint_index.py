@@ -0,0 +1,177 @@
+"""
+测试密钥/证书指纹索引模块
+"""
+
+import base64
+import datetime
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.x509.oid import NameOID
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fingerprint_index import FingerprintIndex, spki_fingerprint
+
+PWD = "qwertyuiop12"
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("utf-8")
+
+
+def _make_cert(key, serial_no):
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, serial_no)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=30))
+        .sign(key, hashes.SHA256())
+    )
+
+
+def _write_pfx(path, key, cert):
+    path.write_bytes(
+        pkcs12.serialize_key_and_certificates(
+            b"yop",
+            key,
+            cert,
+            None,
+            serialization.BestAvailableEncryption(PWD.encode()),
+        )
+    )
+
+
+@pytest.fixture
+def tree(tmp_path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    keys = tmp_path / "keys"
+    certs = tmp_path / "certs"
+    keys.mkdir()
+    certs.mkdir()
+
+    private_b64 = _b64(
+        key.private_bytes(
+            serialization.Encoding.DER,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    public_b64 = _b64(
+        key.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    (keys / "RSA2048_私钥.txt").write_text(private_b64, encoding="utf-8")
+    (keys / "RSA2048_公钥.txt").write_text(public_b64, encoding="utf-8")
+
+    cert = _make_cert(key, "1001")
+    (certs / "1001.cer").write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    _write_pfx(certs / "1001.pfx", key, cert)
+    # 没有同名 .cer 的PFX，需要密码才能建立索引
+    _write_pfx(certs / "1002.pfx", other, _make_cert(other, "1002"))
+
+    index = FingerprintIndex(
+        str(tmp_path / "cache" / "index.json"), [str(keys), str(certs)]
+    )
+    return {
+        "index": index,
+        "tmp_path": tmp_path,
+        "private_b64": private_b64,
+        "fingerprint": spki_fingerprint(key.public_key()),
+        "other_fingerprint": spki_fingerprint(other.public_key()),
+    }
+
+
+class TestFingerprintLookup:
+    """测试指纹查找"""
+
+    def test_lookup_by_private_key(self, tree):
+        """测试按私钥查找匹配的公钥、证书及PFX"""
+        result = tree["index"].lookup(tree["private_b64"])
+        assert result["fingerprints"] == [tree["fingerprint"]]
+        kinds = sorted(match["kind"] for match in result["matches"])
+        assert kinds == ["certificate", "pfx", "privateKey", "publicKey"]
+
+    def test_lookup_by_serial_and_fingerprint(self, tree):
+        """测试按证书序列号及指纹查找"""
+        by_serial = tree["index"].lookup("1001")
+        by_fingerprint = tree["index"].lookup(tree["fingerprint"].upper())
+        assert by_serial["matches"] == by_fingerprint["matches"]
+        assert len(by_serial["matches"]) == 4
+
+    def test_pfx_without_certificate_needs_password(self, tree):
+        """测试没有同名证书的PFX在提供密码后才建立索引"""
+        assert tree["index"].lookup("1002")["matches"] == []
+        result = tree["index"].lookup("1002", PWD)
+        assert result["fingerprints"] == [tree["other_fingerprint"]]
+        assert [match["kind"] for match in result["matches"]] == ["pfx"]
+
+    def test_unknown_query(self, tree):
+        """测试无法识别的查询条件"""
+        result = tree["index"].lookup("not-a-key")
+        assert result["fingerprints"] == []
+        assert "无法识别" in result["message"]
+
+
+class TestFingerprintRefresh:
+    """测试索引的增量更新及持久化"""
+
+    def test_incremental_refresh(self, tree):
+        """测试未变化的文件不重复索引，删除的文件从索引中移除"""
+        index = tree["index"]
+        assert index.refresh()["indexed"] == 5
+        assert index.refresh()["indexed"] == 0
+
+        os.remove(tree["tmp_path"] / "keys" / "RSA2048_公钥.txt")
+        stats = index.refresh()
+        assert stats["removed"] == 1
+        assert len(index.lookup(tree["fingerprint"])["matches"]) == 3
+
+    def test_pfx_picks_up_later_certificate(self, tree):
+        """测试PFX先于同名证书建立索引时，证书出现后补充指纹"""
+        index = tree["index"]
+        assert index.lookup("1002")["matches"] == []
+        other_pfx = tree["tmp_path"] / "certs" / "1002.pfx"
+        cert = pkcs12.load_key_and_certificates(other_pfx.read_bytes(), PWD.encode())[1]
+        (tree["tmp_path"] / "certs" / "1002.cer").write_bytes(
+            cert.public_bytes(serialization.Encoding.PEM)
+        )
+
+        result = index.lookup("1002")
+        assert result["fingerprints"] == [tree["other_fingerprint"]]
+        assert sorted(m["kind"] for m in result["matches"]) == ["certificate", "pfx"]
+
+    def test_lookup_skips_unchanged_dirs(self, tree):
+        """测试目录没有文件增删时查询不重新扫描"""
+        index = tree["index"]
+        index.lookup("1001")
+        with patch.object(index, "refresh", wraps=index.refresh) as refresh:
+            index.lookup("1001")
+            index.lookup(tree["fingerprint"], refresh=True)
+        assert refresh.call_count == 1
+
+    def test_persisted_index(self, tree):
+        """测试重新加载后直接使用已保存的索引"""
+        tree["index"].refresh()
+        reloaded = FingerprintIndex(tree["index"].index_path, tree["index"].roots)
+        assert reloaded.refresh()["indexed"] == 0
+        assert len(reloaded.lookup(tree["fingerprint"])["matches"]) == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,62 @@
+"""
+测试PKCS#10证书请求生成模块
+"""
+
+import base64
+import os
+import sys
+
+import pytest
+from cryptography import x509
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cert_utils import CertUtils, KeyType, gen_key_pair
+from tools.gen_p10 import CFCA_SUBJECT, gen_p10, gen_p10_batch
+from tools.metrics import Metrics
+
+
+@pytest.fixture(scope="module")
+def rsa_keys():
+    return [gen_key_pair("RSA", "pkcs8", "string")["privateKey"] for _ in range(2)]
+
+
+class TestGenP10:
+    """测试证书请求的缓存及批量生成"""
+
+    def setup_method(self):
+        Metrics.reset("p10.")
+
+    def test_cached_per_key_and_subject(self, rsa_keys):
+        """测试同一私钥及主题只签名一次，不同主题分别生成"""
+        cert_req = CertUtils.gen_p10(rsa_keys[0], "", KeyType.RSA2048)
+        assert CertUtils.gen_p10(rsa_keys[0], "", KeyType.RSA2048) == cert_req
+        assert Metrics.get("p10.cache_misses") == 1
+        assert Metrics.get("p10.cache_hits") == 1
+
+        csr = x509.load_der_x509_csr(base64.b64decode(cert_req))
+        assert csr.is_signature_valid
+        assert csr.subject == CFCA_SUBJECT
+        assert gen_p10(rsa_keys[0], "", KeyType.RSA2048) != cert_req
+        assert Metrics.get("p10.cache_misses") == 2
+
+    def test_batch(self, rsa_keys):
+        """测试批量生成结果与输入顺序一致，重复私钥只生成一次并写回缓存"""
+        results = gen_p10_batch(
+            [rsa_keys[1], "bad-key", rsa_keys[1]],
+            KeyType.RSA2048,
+            CFCA_SUBJECT,
+            max_workers=2,
+        )
+        assert results[0]["certReq"] == results[2]["certReq"]
+        assert results[1]["certReq"] is None and results[1]["message"]
+        assert Metrics.get("p10.cache_misses") == 2
+
+        cert_req = CertUtils.gen_p10(rsa_keys[1], "", KeyType.RSA2048)
+        assert cert_req == results[0]["certReq"]
+        assert Metrics.get("p10.cache_hits") == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
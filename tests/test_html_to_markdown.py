@@ -0,0 +1,85 @@
+"""
+测试HTML转markdown模块
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.html_to_markdown import convert_chunks, html_to_markdown, looks_like_html
+from yop_mcp.main import yeepay_yop_link_detail
+
+SAMPLE_HTML = """<!DOCTYPE html><html><head><title>SDK</title>
+<style>body { color: red; }</style><script>var a = 1 < 2;</script></head>
+<body><nav><a href="/">首页</a></nav><div class="sidebar"><div>目录</div></div>
+<main><h1>Java SDK 使用说明</h1>
+<p>引入   <b>yop-java-sdk</b> 后参考<a href="/docs/201.md">接入指南</a>。</p>
+<ul><li>步骤一</li><li>步骤二<ol><li>子步骤</li></ol></li></ul>
+<pre><code>YopClient client = YopClientBuilder.builder().build();
+</code></pre>
+<table><tr><th>参数</th><th>类型</th></tr><tr><td>merchantNo</td><td>String</td></tr></table>
+</main><footer>版权所有</footer></body></html>"""
+
+
+class TestHtmlToMarkdown:
+    """测试HTML转markdown"""
+
+    def test_convert_drops_chrome(self):
+        """测试转换时去除脚本、样式和导航等内容"""
+        markdown = html_to_markdown(SAMPLE_HTML, "https://open.yeepay.com/a/b.html")
+
+        assert "# Java SDK 使用说明" in markdown
+        assert "**yop-java-sdk**" in markdown
+        assert "[接入指南](https://open.yeepay.com/docs/201.md)" in markdown
+        assert "  1. 子步骤" in markdown
+        assert "```\nYopClient client" in markdown
+        assert "| merchantNo | String |" in markdown
+        for dropped in ("color: red", "var a", "首页", "目录", "版权所有"):
+            assert dropped not in markdown
+        assert len(markdown) < len(SAMPLE_HTML) / 2
+
+    def test_stream_matches_whole_document(self):
+        """测试分块输入与整体输入结果一致"""
+        chunks = [SAMPLE_HTML[i : i + 13] for i in range(0, len(SAMPLE_HTML), 13)]
+
+        assert "".join(convert_chunks(chunks)) == "".join(convert_chunks([SAMPLE_HTML]))
+
+    def test_chrome_markers_match_whole_words(self):
+        """测试只按完整的class单词识别页面框架，正文中的 header 保留"""
+        markdown = html_to_markdown(
+            '<html><body><header class="site">站点导航</header><article>'
+            "<header><h1>退款查询</h1></header>"
+            '<div class="stock-info">库存</div><div id="photocopy">复印件</div>'
+            '<div class="page-toc">目录</div><div class="menu_left">菜单</div>'
+            "</article></body></html>"
+        )
+
+        assert "# 退款查询" in markdown
+        assert "库存" in markdown and "复印件" in markdown
+        for dropped in ("站点导航", "目录", "菜单"):
+            assert dropped not in markdown
+
+    def test_looks_like_html(self):
+        """测试HTML识别"""
+        assert looks_like_html("  <!doctype html><html></html>")
+        assert not looks_like_html("# 标题\n正文")
+
+    @patch("tools.http_utils.HttpUtils.download_content")
+    def test_link_detail_converts_html(self, mock_download):
+        """测试子页面为HTML时默认转换，raw模式返回原文"""
+        mock_download.return_value = SAMPLE_HTML
+
+        converted = yeepay_yop_link_detail("https://open.yeepay.com/a/b.html")
+        raw = yeepay_yop_link_detail("https://open.yeepay.com/a/b.html", raw=True)
+
+        assert converted.startswith("# Java SDK 使用说明")
+        assert raw == SAMPLE_HTML
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -12,7 +12,10 @@ import pytest
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from tools import compression
+from tools.compression import accept_encoding
 from tools.http_utils import HttpUtils
+from tools.metrics import Metrics
 
 
 class TestHttpUtils:
@@ -23,11 +26,13 @@ class TestHttpUtils:
         """测试成功下载内容"""
         # 设置mock
         mock_response = MagicMock()
-        mock_response.text = "Test content"
+        mock_response.headers = {}
+        mock_response.encoding = "utf-8"
+        mock_response.iter_raw.return_value = [b"Test ", b"content"]
         mock_response.raise_for_status.return_value = None
 
         mock_client_instance = MagicMock()
-        mock_client_instance.get.return_value = mock_response
+        mock_client_instance.stream.return_value.__enter__.return_value = mock_response
         mock_client.return_value.__enter__.return_value = mock_client_instance
 
         # 执行测试
@@ -35,7 +40,34 @@ class TestHttpUtils:
 
         # 验证结果
         assert result == "Test content"
-        mock_client_instance.get.assert_called_once_with("https://example.com/test")
+        mock_client_instance.stream.assert_called_once_with(
+            "GET",
+            "https://example.com/test",
+            headers={"Accept-Encoding": accept_encoding()},
+        )
+
+    @patch("httpx.Client")
+    def test_download_content_compressed(self, mock_client):
+        """测试流式解压压缩后的响应并记录字节数指标"""
+        body = "# 文档\n".encode("utf-8") * 200
+        compressed = compression.compress(body, "gzip")
+
+        mock_response = MagicMock()
+        mock_response.headers = {"Content-Encoding": "gzip"}
+        mock_response.encoding = "utf-8"
+        mock_response.iter_raw.return_value = [compressed[:10], compressed[10:]]
+        mock_response.raise_for_status.return_value = None
+
+        mock_client_instance = MagicMock()
+        mock_client_instance.stream.return_value.__enter__.return_value = mock_response
+        mock_client.return_value.__enter__.return_value = mock_client_instance
+
+        Metrics.reset("http.")
+        result = HttpUtils.download_content("https://example.com/llms.txt")
+
+        assert result == body.decode("utf-8")
+        assert Metrics.get("http.bytes_compressed") == len(compressed)
+        assert Metrics.get("http.bytes_decompressed") == len(body)
 
     @patch("httpx.Client")
     def test_download_content_http_error(self, mock_client):
@@ -45,7 +77,7 @@ class TestHttpUtils:
         mock_response.status_code = 404
 
         mock_client_instance = MagicMock()
-        mock_client_instance.get.side_effect = httpx.HTTPStatusError(
+        mock_client_instance.stream.side_effect = httpx.HTTPStatusError(
             "404 Not Found", request=MagicMock(), response=mock_response
         )
         mock_client.return_value.__enter__.return_value = mock_client_instance
@@ -61,7 +93,7 @@ class TestHttpUtils:
         """测试一般错误情况"""
         # 设置mock
         mock_client_instance = MagicMock()
-        mock_client_instance.get.side_effect = Exception("Connection error")
+        mock_client_instance.stream.side_effect = Exception("Connection error")
         mock_client.return_value.__enter__.return_value = mock_client_instance
 
         # 执行测试
@@ -0,0 +1,100 @@
+"""
+测试密钥解析缓存模块
+"""
+
+import base64
+import os
+import sys
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.key_cache import KeyCache
+from tools.metrics import Metrics
+
+
+def _rsa_key_pair():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pri = base64.b64encode(
+        private_key.private_bytes(
+            serialization.Encoding.DER,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    ).decode("utf-8")
+    pub = base64.b64encode(
+        private_key.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    ).decode("utf-8")
+    return pri, pub
+
+
+@pytest.fixture(scope="module")
+def key_pairs():
+    return [_rsa_key_pair() for _ in range(3)]
+
+
+class TestKeyCache:
+    """测试有界LRU密钥缓存"""
+
+    def setup_method(self):
+        Metrics.reset("key_cache.")
+
+    def test_hit_returns_same_object(self, key_pairs):
+        """测试重复解析同一密钥时命中缓存并返回同一对象"""
+        cache = KeyCache(max_size=4)
+        pri, pub = key_pairs[0]
+
+        first = cache.load_private_key(pri)
+        second = cache.load_private_key(pri)
+
+        assert first is second
+        assert isinstance(first, rsa.RSAPrivateKey)
+        assert isinstance(cache.load_public_key(pub), rsa.RSAPublicKey)
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["size"] == 2
+
+    def test_lru_eviction(self, key_pairs):
+        """测试超过容量时淘汰最久未使用的密钥"""
+        cache = KeyCache(max_size=2)
+        a, b, c = (pair[0] for pair in key_pairs)
+
+        key_a = cache.load_private_key(a)
+        cache.load_private_key(b)
+        cache.load_private_key(a)  # a 变为最近使用
+        cache.load_private_key(c)  # 淘汰 b
+
+        assert Metrics.get("key_cache.evictions") == 1
+        assert cache.load_private_key(a) is key_a
+        misses = Metrics.get("key_cache.misses")
+        cache.load_private_key(b)
+        assert Metrics.get("key_cache.misses") == misses + 1
+
+    def test_cache_key_is_digest(self, key_pairs):
+        """测试缓存中不保存明文密钥字符串"""
+        cache = KeyCache(max_size=2)
+        pri, _ = key_pairs[0]
+        cache.load_private_key(pri)
+
+        (cache_key,) = list(cache._entries)  # pylint: disable=protected-access
+        assert len(cache_key) == 64
+        assert pri not in cache_key
+
+    def test_invalid_key(self):
+        """测试无效密钥解析失败且不写入缓存"""
+        cache = KeyCache(max_size=2)
+        with pytest.raises(ValueError):
+            cache.load_private_key(base64.b64encode(b"invalid").decode("utf-8"))
+        assert cache.stats()["size"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,111 @@
+"""
+测试RSA密钥预生成池模块
+"""
+
+import itertools
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import cert_utils
+from tools.key_pool import RsaKeyPool
+from tools.metrics import Metrics
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def fake_keys():
+    """以递增整数代替真实RSA密钥，加快测试"""
+    counter = itertools.count()
+    with patch.object(RsaKeyPool, "_generate", side_effect=lambda: next(counter)):
+        yield
+
+
+class TestRsaKeyPool:
+    """测试RSA密钥预生成池"""
+
+    def setup_method(self):
+        Metrics.reset("key_pool.")
+
+    def test_fill_and_take_once(self, fake_keys):
+        """测试后台填满至容量上限，且每个密钥只被取出一次"""
+        pool = RsaKeyPool(size=4, low_water=2)
+        pool.start()
+        try:
+            _wait_until(lambda: pool.stats()["available"] == 4)
+            taken = [pool.take() for _ in range(4)]
+            assert len(set(taken)) == 4
+            # 低于低水位后自动补充，新密钥与已取出的不重复
+            _wait_until(lambda: pool.stats()["available"] == 4)
+            assert not set(taken) & {pool.take() for _ in range(4)}
+            assert Metrics.get("key_pool.generated") >= 8
+        finally:
+            pool.stop()
+
+    def test_refill_retries_after_failure(self):
+        """测试生成失败后按退避间隔重试，后台线程继续补充"""
+        counter = itertools.count()
+
+        def flaky_generate():
+            value = next(counter)
+            if value < 2:
+                raise RuntimeError("生成进程异常退出")
+            return value
+
+        pool = RsaKeyPool(size=2)
+        with (
+            patch.object(RsaKeyPool, "_generate", side_effect=flaky_generate),
+            patch("tools.key_pool.RETRY_DELAY", 0.01),
+        ):
+            pool.start()
+            try:
+                _wait_until(lambda: pool.stats()["available"] == 2)
+            finally:
+                pool.stop()
+
+        assert Metrics.get("key_pool.errors") == 2
+
+    def test_generate_in_subprocess(self):
+        """测试在子进程中生成真实RSA密钥"""
+        pool = RsaKeyPool(size=1)
+        pool.start()
+        try:
+            _wait_until(lambda: pool.stats()["available"] == 1, timeout=30)
+            assert isinstance(pool.take(), cert_utils.rsa.RSAPrivateKey)
+        finally:
+            pool.stop()
+
+    def test_empty_pool_returns_none(self):
+        """测试池为空时返回None，由调用方同步生成"""
+        pool = RsaKeyPool(size=2)
+
+        assert pool.take() is None
+        assert Metrics.get("key_pool.misses") == 1
+
+    def test_gen_key_pair_uses_pool(self):
+        """测试生成单个RSA密钥对时取用池中的密钥"""
+        private_key = cert_utils.rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+        with patch("tools.cert_utils.take_rsa_key", return_value=private_key):
+            result = cert_utils.gen_key_pair("RSA", "pkcs8", "string")
+
+        expected, _ = cert_utils._serialize_rsa_key_pair(private_key, "pkcs8")
+        assert result["privateKey"] == expected
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
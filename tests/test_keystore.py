@@ -0,0 +1,121 @@
+"""
+测试加密密钥库模块
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import keystore as keystore_module
+from tools.cert_utils import gen_key_pair
+from tools.config import Config
+from tools.keystore import Keystore, KeystoreError, get_keystore, list_keystore
+from tools.metrics import Metrics
+from tools.yop_signer import sign_request
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    """使用临时密钥库文件，并降低scrypt参数以加快测试"""
+    path = str(tmp_path / "keys" / "keystore.json")
+    monkeypatch.setattr(Config, "KEYSTORE_PATH", path)
+    monkeypatch.setattr(Config, "KEYSTORE_PASSWORD", "")
+    monkeypatch.setattr(keystore_module, "SCRYPT_N", 2**10)
+    Metrics.reset("keystore.")
+    yield path
+    get_keystore().lock()
+
+
+@pytest.fixture(scope="module")
+def rsa_pair():
+    return gen_key_pair("RSA", "pkcs8", "string")
+
+
+class TestKeystore:
+    """测试密钥库的加密保存、解锁及私钥缓存"""
+
+    def test_encrypted_roundtrip(self, store_path, rsa_pair):
+        """测试私钥加密保存，口令错误时拒绝解锁，重新打开后可解密"""
+        store = Keystore(store_path)
+        store.unlock("secret-1")
+        entry = store.add(rsa_pair["privateKey"], rsa_pair["publicKey"], "RSA")
+        assert entry["alias"] == "RSA_" + entry["fingerprint"][:16]
+        with open(store_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        assert rsa_pair["privateKey"] not in content
+        assert json.loads(content)["entries"][entry["alias"]]["publicKey"]
+
+        reopened = Keystore(store_path)
+        assert reopened.entries()[0]["fingerprint"] == entry["fingerprint"]
+        with pytest.raises(KeystoreError, match="未解锁"):
+            reopened.export_private_key(entry["alias"])
+        with pytest.raises(KeystoreError, match="口令错误"):
+            reopened.unlock("wrong")
+        reopened.unlock("secret-1")
+        assert (
+            reopened.export_private_key(entry["fingerprint"][:12])
+            == rsa_pair["privateKey"]
+        )
+        with pytest.raises(KeystoreError, match="别名已存在"):
+            reopened.add(rsa_pair["privateKey"], rsa_pair["publicKey"], "RSA")
+
+    def test_tampered_entry_rejected(self, store_path, rsa_pair):
+        """测试条目被篡改（如替换别名）时解密失败"""
+        store = Keystore(store_path)
+        store.unlock("secret-1")
+        store.add(rsa_pair["privateKey"], rsa_pair["publicKey"], "RSA", alias="a")
+        with open(store_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["entries"]["b"] = data["entries"].pop("a")
+        with open(store_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        tampered = Keystore(store_path)
+        tampered.unlock("secret-1")
+        with pytest.raises(KeystoreError, match="篡改"):
+            tampered.export_private_key("b")
+
+    def test_key_objects_cached(self, store_path):
+        """测试解锁一次后私钥对象按别名缓存，缓存容量有界"""
+        store = Keystore(store_path, cache_size=1)
+        store.unlock("secret-1")
+        pairs = [gen_key_pair("SM2", "pkcs8", "string") for _ in range(2)]
+        store.add_many(
+            [
+                (p["privateKey"], p["publicKey"], f"sm2-{i}")
+                for i, p in enumerate(pairs)
+            ],
+            "SM2",
+        )
+        key = store.load_private_key("keystore:sm2-0")
+        assert store.load_private_key("sm2-0") is key
+        assert Metrics.get("keystore.decrypts") == 1
+        assert Metrics.get("keystore.unlocks") == 1
+        # 容量为1，加载 sm2-1 后 sm2-0 被淘汰，需重新解密
+        store.load_private_key("sm2-1")
+        store.load_private_key("sm2-0")
+        assert Metrics.get("keystore.decrypts") == 3
+
+    def test_gen_key_pair_and_sign(self, store_path):
+        """测试生成密钥对保存到密钥库，并以密钥库引用签名"""
+        result = gen_key_pair("RSA", "pkcs8", "keystore")
+        assert "未解锁" in result["message"]
+
+        get_keystore().unlock("secret-1")
+        result = gen_key_pair("SM2", "pkcs8", "keystore", alias="merchant")
+        assert result["privateKey"] is None
+        assert result["privateKeyRef"] == "keystore:merchant"
+        signed = sign_request(
+            "app", "GET", "/rest/v1.0/test", result["privateKeyRef"], algorithm="SM2"
+        )
+        assert signed["headers"]["Authorization"].startswith("YOP-SM2-SM3 ")
+        assert list_keystore()["keys"][0]["alias"] == "merchant"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
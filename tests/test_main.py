@@ -2,19 +2,24 @@
 测试主模块功能
 """
 
+import asyncio
 import os
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from tools.cert_utils import gen_key_pair
+from tools.config import Config
+from tools.metrics import Metrics
 from yop_mcp.main import (
     yeepay_yop_api_detail,
     yeepay_yop_download_cert,
     yeepay_yop_gen_key_pair,
+    yeepay_yop_gen_key_pairs_batch,
     yeepay_yop_java_sdk_user_guide,
     yeepay_yop_link_detail,
     yeepay_yop_overview,
@@ -22,6 +27,7 @@ from yop_mcp.main import (
     yeepay_yop_product_detail_and_associated_apis,
     yeepay_yop_product_overview,
     yeepay_yop_sdk_and_tools_guide,
+    yeepay_yop_sign_request,
 )
 
 
@@ -137,6 +143,7 @@ class TestYOPMCPFunctions:
         # 应该转换为完整URL
         mock_download.assert_called_once()
 
+    @patch.object(Config, "EXECUTOR_KIND", "thread")
     @patch("yop_mcp.main.gen_key_pair")
     def test_yeepay_yop_gen_key_pair(self, mock_gen_key_pair):
         """测试生成密钥对"""
@@ -146,34 +153,80 @@ class TestYOPMCPFunctions:
             "public_key": "test_public_key",
         }
 
-        result = yeepay_yop_gen_key_pair("RSA", "pkcs8", "file")
+        result = asyncio.run(yeepay_yop_gen_key_pair("RSA", "pkcs8", "file"))
 
         assert result["message"] == "密钥对生成成功"
         mock_gen_key_pair.assert_called_once_with(
-            algorithm="RSA", format="pkcs8", storage_type="file"
+            algorithm="RSA", format="pkcs8", storage_type="file", alias=""
         )
 
-    @patch("yop_mcp.main.download_cert")
-    def test_yeepay_yop_download_cert(self, mock_download_cert):
-        """测试下载证书"""
-        mock_download_cert.return_value = {
+    @patch("yop_mcp.main.gen_key_pairs_batch", new_callable=AsyncMock)
+    def test_yeepay_yop_gen_key_pairs_batch(self, mock_batch):
+        """测试批量生成密钥对并上报进度"""
+        ctx = MagicMock()
+        ctx.report_progress = AsyncMock()
+
+        async def fake_batch(count, **kwargs):
+            await kwargs["progress"](count, count)
+            return {"message": "批量生成密钥对完成", "count": count, "keyPairs": []}
+
+        mock_batch.side_effect = fake_batch
+
+        result = asyncio.run(
+            yeepay_yop_gen_key_pairs_batch(2, "RSA", "pkcs8", "string", ctx=ctx)
+        )
+
+        assert result["count"] == 2
+        assert mock_batch.call_args.kwargs["storage_type"] == "string"
+        ctx.report_progress.assert_awaited_once_with(2, 2)
+
+    @patch.object(Config, "EXECUTOR_KIND", "thread")
+    @patch("yop_mcp.main.complete_cert_download")
+    @patch("yop_mcp.main.get_cfca_client")
+    @patch("yop_mcp.main.prepare_cert_download")
+    def test_yeepay_yop_download_cert(self, mock_prepare, mock_client, mock_complete):
+        """测试下载证书：准备阶段、CFCA下载及完成阶段依次执行"""
+        mock_prepare.return_value = {"certReq": "CSR", "cert": None}
+        downloaded = MagicMock(error_msg=None, cert="CERT")
+        mock_client.return_value.download = AsyncMock(return_value=downloaded)
+        mock_complete.return_value = {
             "message": "证书下载成功",
             "pfxCert": "/path/to/cert.pfx",
             "pubCert": "/path/to/cert.cer",
         }
 
-        result = yeepay_yop_download_cert(
-            algorithm="RSA",
-            serial_no="123456",
-            auth_code="AUTH123",
-            private_key="test_private_key",
-            public_key="test_public_key",
-            pwd="password123456",  # 使用符合长度要求的密码
+        result = asyncio.run(
+            yeepay_yop_download_cert(
+                algorithm="RSA",
+                serial_no="123456",
+                auth_code="AUTH123",
+                private_key="test_private_key",
+                public_key="test_public_key",
+                pwd="password123456",  # 使用符合长度要求的密码
+            )
         )
 
         assert result["message"] == "证书下载成功"
-        mock_download_cert.assert_called_once()
+        mock_client.return_value.download.assert_awaited_once_with(
+            "123456", "AUTH123", "CSR"
+        )
+        assert mock_complete.call_args.kwargs["cert"] == "CERT"
+
+    def test_offloaded_tool_shares_server_cache(self):
+        """测试默认执行器中运行的工具复用服务进程中的私钥缓存"""
+        private_key = gen_key_pair("RSA", "pkcs8", "string")["privateKey"]
+        Metrics.reset("key_cache.")
+
+        for _ in range(2):
+            result = asyncio.run(
+                yeepay_yop_sign_request("app", "GET", "/rest/v1.0/a", private_key)
+            )
+            assert result["message"] == "签名成功"
+
+        assert Metrics.get("key_cache.misses") == 1
+        assert Metrics.get("key_cache.hits") == 1
 
+    @patch.object(Config, "EXECUTOR_KIND", "thread")
     @patch("yop_mcp.main.parse_certificates")
     def test_yeepay_yop_parse_certificates(self, mock_parse_certificates):
         """测试解析证书"""
@@ -183,11 +236,13 @@ class TestYOPMCPFunctions:
             "publicKey": "parsed_public_key",
         }
 
-        result = yeepay_yop_parse_certificates(
-            algorithm="RSA",
-            pfx_cert="/path/to/cert.pfx",
-            pub_cert="/path/to/cert.cer",
-            pwd="password123",
+        result = asyncio.run(
+            yeepay_yop_parse_certificates(
+                algorithm="RSA",
+                pfx_cert="/path/to/cert.pfx",
+                pub_cert="/path/to/cert.cer",
+                pwd="password123",
+            )
         )
 
         assert result["message"] == "证书解析成功"
@@ -0,0 +1,99 @@
+"""
+测试产品目录树模块
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.config import Config
+from tools.product_tree import ProductTree
+
+
+def _raw_items():
+    with open(Config.PRODUCT_TREE_PATH, "r", encoding="utf-8") as f:
+        stack = list(json.load(f))
+    items = []
+    while stack:
+        node = stack.pop()
+        items.extend(node["items"])
+        stack.extend(node["children"])
+    return items
+
+
+class TestProductTree:
+    """测试紧凑产品目录树"""
+
+    def test_from_json_matches_source(self):
+        """测试推导出的 uri/location 与原始JSON一致"""
+        tree = ProductTree.from_json(Config.PRODUCT_TREE_PATH)
+        raw_items = {item["location"]: item for item in _raw_items()}
+
+        assert len(tree.apis) == len(_raw_items())
+        for api in tree.apis:
+            assert api.to_dict() == raw_items[api.location]
+
+    def test_strings_interned(self):
+        """测试重复字符串共享同一对象"""
+        tree = ProductTree.from_json(Config.PRODUCT_TREE_PATH)
+        methods = {id(api.method) for api in tree.apis if api.method == "POST"}
+
+        assert len(methods) == 1
+
+    def test_snapshot_round_trip(self, tmp_path):
+        """测试二进制快照写出后读取结果一致"""
+        tree = ProductTree.from_json(Config.PRODUCT_TREE_PATH)
+        snapshot = str(tmp_path / "tree.bin")
+
+        tree.write_snapshot(snapshot)
+        loaded = ProductTree.from_snapshot(snapshot)
+
+        assert [a.to_dict() for a in loaded.apis] == [a.to_dict() for a in tree.apis]
+        assert [n.location for n in loaded.nodes] == [n.location for n in tree.nodes]
+        assert len(loaded.roots) == len(tree.roots)
+
+    def test_load_prefers_fresh_snapshot(self, tmp_path):
+        """测试快照不早于JSON文件时优先读取快照，损坏时回退到JSON"""
+        json_path = tmp_path / "tree.json"
+        json_path.write_text(
+            open(Config.PRODUCT_TREE_PATH, encoding="utf-8").read(), encoding="utf-8"
+        )
+        snapshot = tmp_path / "tree.bin"
+        ProductTree.from_json(str(json_path)).write_snapshot(str(snapshot))
+
+        assert ProductTree.load(str(json_path)).find_by_path(
+            "/rest/v1.0/aggpay/pre-pay"
+        )
+
+        snapshot.write_bytes(b"broken")
+        assert len(ProductTree.load(str(json_path)).apis) > 0
+
+    def test_doc_ids(self):
+        """测试docs-v3文档标识"""
+        tree = ProductTree.from_json(Config.PRODUCT_TREE_PATH)
+        api = tree.find_by_path("/rest/v1.0/aggpay/pre-pay")
+
+        assert "post_rest_v1.0_aggpay_pre-pay" in api.doc_ids()
+
+    def test_duplicate_paths_keep_all_records(self):
+        """测试同一路径的多条记录全部保留，文档标识合并全部记录"""
+        tree = ProductTree.from_json(Config.PRODUCT_TREE_PATH)
+        records = tree.find_all_by_path("/rest/v1.0/aggpay/pre-pay")
+        assert len(records) > 1
+        assert tree.find_by_path("/rest/v1.0/aggpay/pre-pay") is records[0]
+
+        records[1].method = "GET"
+        doc_ids = tree.doc_ids_for_path("/rest/v1.0/aggpay/pre-pay")
+        assert doc_ids[0] == "post_rest_v1.0_aggpay_pre-pay"
+        assert "get_rest_v1.0_aggpay_pre-pay" in doc_ids
+        assert len(doc_ids) == len(set(doc_ids))
+        assert tree.doc_ids_for_path("/rest/v1.0/unknown") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
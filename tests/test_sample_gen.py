@@ -0,0 +1,77 @@
+"""
+测试SDK调用示例生成模块
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.test_api_spec import API_DOC
+from tools.api_spec import API_DOC_BASE_URL, parse_api_spec
+from tools.config import Config
+from tools.doc_store import get_doc_store
+from tools.sample_gen import render_sample
+from yop_mcp.main import yeepay_yop_api_detail, yeepay_yop_gen_sample
+
+
+class TestSampleGen:
+    """测试示例代码生成"""
+
+    def test_render_form_and_json(self):
+        """测试表单请求按参数逐个添加，JSON请求使用请求体或JSON调用方法"""
+        spec = parse_api_spec(API_DOC)
+        result = render_sample(spec, "Java")
+        assert result["sdk"] == "yop-java-sdk"
+        assert 'new YopRequest("/rest/v1.0/aggpay/pre-pay", "POST")' in result["code"]
+        assert (
+            'request.addParameter("orderAmount", "0.01"); // 必填 订单金额，单位：元'
+            in result["code"]
+        )
+
+        spec["contentType"] = "application/json"
+        java = render_sample(spec, "java")["code"]
+        assert 'request.setContent("{\\"parentMerchantNo\\"' in java
+        python = render_sample(spec, "py")["code"]
+        assert 'yop_client.post_json("/rest/v1.0/aggpay/pre-pay", params)' in python
+        assert '    "orderAmount": "0.01",  # 必填' in python
+        assert "@" not in render_sample(spec, "go")["code"]
+
+    def test_unsupported_language(self):
+        """测试不支持的语言返回可选值"""
+        result = render_sample(parse_api_spec(API_DOC), "ruby")
+        assert "不支持的语言: ruby" in result["message"]
+        assert "code" not in result
+
+    @patch("yop_mcp.main.HttpUtils.download_content")
+    def test_tool_uses_cached_spec(self, mock_download):
+        """测试获取过的API直接使用缓存的定义，不再发起请求"""
+        mock_download.return_value = API_DOC + "\n<!-- gen sample -->\n"
+        yeepay_yop_api_detail("/rest/v1.0/aggpay/pre-pay/", format="json")
+        calls = mock_download.call_count
+
+        result = yeepay_yop_gen_sample("/rest/v1.0/aggpay/pre-pay", "typescript")
+        assert result["cached"] is True
+        assert "yopClient.post('/rest/v1.0/aggpay/pre-pay', params)" in result["code"]
+        assert mock_download.call_count == calls
+
+    @patch("yop_mcp.main.HttpUtils.download_content")
+    def test_tool_reads_doc_store(self, mock_download, tmp_path, monkeypatch):
+        """测试本地文档缓存中已有API文档时离线生成"""
+        monkeypatch.setattr(Config, "DOC_CACHE_PATH", str(tmp_path / "docs"))
+        get_doc_store().put(
+            API_DOC_BASE_URL + "post_rest_v1.0_trade_order.md",
+            API_DOC.replace("/rest/v1.0/aggpay/pre-pay", "/rest/v1.0/trade/order"),
+        )
+        result = yeepay_yop_gen_sample("/rest/v1.0/trade/order", "go")
+        assert result["cached"] is True
+        assert "constants.POST_HTTP_METHOD" in result["code"]
+        mock_download.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
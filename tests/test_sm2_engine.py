@@ -0,0 +1,114 @@
+"""
+测试SM2签名引擎
+"""
+
+import base64
+import os
+import sys
+
+import pytest
+from Cryptodome.Util.asn1 import DerBitString, DerSequence
+from gmssl import func, sm2
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import sm2_engine
+from tools.cert_utils import CertUtils, KeyType, gen_key_pair
+from tools.gen_p10 import KeyType as P10KeyType
+from tools.gen_p10 import gen_p10
+from tools.yop_signer import sign_request
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return sm2_engine.generate_private_key()
+
+
+def _gmssl(private_key):
+    return sm2.CryptSM2(
+        private_key=f"{private_key.d:064x}",
+        public_key=private_key.public_key().to_bytes()[1:].hex(),
+    )
+
+
+class TestSm2Engine:
+    """测试SM2密钥、签名及验签"""
+
+    def test_base_multiply_matches_gmssl(self, private_key):
+        """测试预计算表的基点倍乘结果与gmssl一致"""
+        crypt = _gmssl(private_key)
+        expected = crypt._kg(private_key.d, crypt.ecc_table["g"])
+        assert private_key.public_key().to_bytes()[1:].hex() == expected
+
+    def test_sign_and_verify(self, private_key):
+        """测试签名验签及篡改数据"""
+        public_key = private_key.public_key()
+        signature = private_key.sign(b"hello")
+        assert public_key.verify(signature, b"hello")
+        assert not public_key.verify(signature, b"hell0")
+        assert (
+            not sm2_engine.generate_private_key()
+            .public_key()
+            .verify(signature, b"hello")
+        )
+
+    def test_gmssl_interop(self, private_key):
+        """测试与gmssl互相验签（SM3withSM2，默认ID）"""
+        crypt = _gmssl(private_key)
+        r, s = sm2_engine.decode_signature(private_key.sign(b"data"))
+        assert crypt.verify_with_sm3(f"{r:064x}{s:064x}", b"data")
+        gmssl_signature = crypt.sign_with_sm3(b"data", func.random_hex(64))
+        assert private_key.public_key().verify(bytes.fromhex(gmssl_signature), b"data")
+
+    def test_der_round_trip(self, private_key):
+        """测试PKCS8私钥及SubjectPublicKeyInfo公钥的编解码"""
+        loaded = sm2_engine.load_private_key(private_key.to_base64())
+        assert loaded.d == private_key.d
+        public_key = sm2_engine.load_public_key(private_key.public_key().to_base64())
+        assert public_key.point == private_key.public_key().point
+        with pytest.raises(ValueError):
+            sm2_engine.load_private_key(base64.b64encode(b"\x30\x00").decode())
+
+
+class TestSm2Integration:
+    """测试SM2引擎在密钥生成、证书请求及请求签名中的使用"""
+
+    def test_gen_key_pair(self):
+        """测试生成的SM2密钥对为SM2曲线密钥且相互匹配"""
+        result = gen_key_pair("SM2", "pkcs8", "string")
+        assert CertUtils.check_key(
+            result["privateKey"], result["publicKey"], KeyType.SM2
+        )
+        other = gen_key_pair("SM2", "pkcs8", "string")
+        assert not CertUtils.check_key(
+            result["privateKey"], other["publicKey"], KeyType.SM2
+        )
+
+    def test_csr(self, private_key):
+        """测试SM3withSM2证书请求的签名可验证"""
+        for csr_b64 in (
+            gen_p10(private_key.to_base64(), "", P10KeyType.SM2),
+            CertUtils.gen_p10(private_key.to_base64(), "", KeyType.SM2),
+        ):
+            request = DerSequence()
+            request.decode(base64.b64decode(csr_b64))
+            signature = DerBitString().decode(request[2]).value
+            assert private_key.public_key().verify(signature, request[0])
+
+    def test_sign_request(self, private_key):
+        """测试YOP-SM2-SM3请求签名"""
+        result = sign_request(
+            "app", "POST", "/rest/v1.0/x", private_key.to_base64(), algorithm="SM2"
+        )
+        authorization = result["headers"]["Authorization"]
+        assert authorization.startswith("YOP-SM2-SM3 yop-auth-v3/app/")
+        encoded = authorization.rsplit("/", 1)[1][: -len("$SM3")]
+        signature = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        assert private_key.public_key().verify(
+            signature, result["canonicalRequest"].encode("utf-8")
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,150 @@
+"""
+测试YOP请求签名模块
+"""
+
+import base64
+import hashlib
+import os
+import sys
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import yop_signer
+from tools.cert_utils import gen_key_pair
+from tools.yop_signer import (
+    canonical_query_string,
+    sign_request,
+    sign_requests_batch,
+)
+
+TIMESTAMP = "2025-07-01T08:00:00Z"
+
+
+@pytest.fixture(scope="module")
+def key_pair():
+    return gen_key_pair("RSA", "pkcs8", "string")
+
+
+def _verify(key_pair, result):
+    """使用公钥验证 Authorization 中的签名"""
+    public_key = serialization.load_der_public_key(
+        base64.b64decode(key_pair["publicKey"])
+    )
+    signature = result["headers"]["Authorization"].rsplit("/", 1)[1]
+    assert signature.endswith("$SHA256")
+    encoded = signature[: -len("$SHA256")]
+    raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+    public_key.verify(
+        raw,
+        result["canonicalRequest"].encode("utf-8"),
+        padding.PKCS1v15(),
+        hashes.SHA256(),
+    )
+
+
+class TestCanonicalization:
+    """测试规范请求串"""
+
+    def test_canonical_query_string(self):
+        """测试参数编码及排序"""
+        query = canonical_query_string(
+            {"b": "2 3", "a": "中", "c": None, "d": ["y", "x"]}
+        )
+        assert query == "a=%E4%B8%AD&b=2%203&d=x&d=y"
+
+    def test_values_not_cached(self):
+        """测试参数值不进入URI编码缓存，只缓存参数名"""
+        yop_signer._uri_encode_cached.cache_clear()
+        canonical_query_string({"cardNo": "6222020000000000"})
+
+        assert yop_signer._uri_encode_cached.cache_info().currsize == 1
+
+    def test_post_form_request(self, key_pair):
+        """测试POST表单请求的规范请求串及签名"""
+        params = {"merchantNo": "10080000001", "orderId": "ORDER-1"}
+        result = sign_request(
+            "app_10080000001",
+            "post",
+            "/rest/v1.0/trade/order",
+            key_pair["privateKey"],
+            params=params,
+            request_id="req-1",
+            timestamp=TIMESTAMP,
+        )
+        digest = hashlib.sha256(b"merchantNo=10080000001&orderId=ORDER-1").hexdigest()
+        assert result["message"] == "签名成功"
+        assert result["canonicalRequest"] == "\n".join(
+            [
+                f"yop-auth-v3/app_10080000001/{TIMESTAMP}/1800",
+                "POST",
+                "/rest/v1.0/trade/order",
+                "",
+                "x-yop-appkey:app_10080000001",
+                f"x-yop-content-sha256:{digest}",
+                "x-yop-request-id:req-1",
+            ]
+        )
+        assert result["headers"]["Authorization"].startswith(
+            f"YOP-RSA2048-SHA256 yop-auth-v3/app_10080000001/{TIMESTAMP}/1800/"
+            "x-yop-appkey;x-yop-content-sha256;x-yop-request-id/"
+        )
+        _verify(key_pair, result)
+
+    def test_get_and_json_request(self, key_pair):
+        """测试GET请求使用规范查询串，JSON请求对报文体计算摘要"""
+        get = sign_request(
+            "app", "GET", "/rest/v1.0/query", key_pair["privateKey"], {"id": "1"}
+        )
+        assert get["canonicalRequest"].split("\n")[3] == "id=1"
+        _verify(key_pair, get)
+
+        body = '{"orderId":"1"}'
+        post = sign_request(
+            "app", "POST", "/rest/v1.0/json", key_pair["privateKey"], body=body
+        )
+        assert (
+            post["headers"]["x-yop-content-sha256"]
+            == hashlib.sha256(body.encode()).hexdigest()
+        )
+
+
+class TestSignRequest:
+    """测试签名工具"""
+
+    def test_private_key_file(self, key_pair, tmp_path):
+        """测试使用私钥文件路径签名"""
+        key_file = tmp_path / "RSA2048_私钥.txt"
+        key_file.write_text(key_pair["privateKey"], encoding="utf-8")
+        result = sign_request("app", "POST", "/rest/v1.0/x", str(key_file))
+        _verify(key_pair, result)
+
+    def test_invalid_input(self, key_pair):
+        """测试无效私钥及不支持的算法"""
+        assert "请求签名失败" in sign_request("app", "POST", "/x", "")["message"]
+        assert "请求签名失败" in sign_request("app", "POST", "/x", "abc")["message"]
+        result = sign_request(
+            "app", "POST", "/x", key_pair["privateKey"], algorithm="DSA"
+        )
+        assert "不支持的签名算法" in result["message"]
+
+    def test_batch(self, key_pair):
+        """测试批量签名逐项返回结果"""
+        requests = [
+            {"method": "POST", "uri": f"/rest/v1.0/order/{i}", "params": {"i": i}}
+            for i in range(20)
+        ]
+        requests.append({"method": "POST"})
+        result = sign_requests_batch("app", requests, key_pair["privateKey"])
+        assert result["message"] == "批量签名完成：成功 20 个，失败 1 个"
+        for item in result["results"][:20]:
+            _verify(key_pair, item)
+        assert "请求路径不能为空" in result["results"][20]["message"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -2,12 +2,34 @@
 YOP MCP Server Tools Package
 
 This package contains utility modules for the YOP MCP Server:
+- api_resolver: Typo-tolerant API path resolution over the product tree
+- api_spec: Structured API definitions parsed from API markdown docs
+- callback_verifier: Decryption and signature verification of YOP callback notifications
+- cert_batch: Concurrent, resumable bulk CFCA certificate download
+- cert_inventory: SQLite inventory of downloaded certificates with expiry queries
 - cert_key_parser: Certificate and key parsing utilities
+- cert_monitor: Background certificate-expiry monitor on the certificate inventory
 - cert_utils: Certificate management and generation utilities
+- cfca_client: Persistent async CFCA download client with classified, idempotent retries
+- compression: gzip/brotli/zstd codecs for HTTP negotiation and cached bodies
 - config: Configuration constants and settings
-- gen_p10: PKCS#10 certificate request generation
+- doc_changes: Incremental documentation change detection with unified diffs
+- doc_store: Compressed, content-addressed document cache with LRU eviction
+- error_index: In-memory error-code index across all API docs
+- executor: Thread/process pool layer for CPU-bound tools with queue limits and timeouts
+- fingerprint_index: Persistent SPKI fingerprint index for matching keys and certificates
+- gen_p10: Memoized and batch PKCS#10 certificate request generation
+- html_to_markdown: HTML-to-markdown conversion for documentation pages
 - http_utils: HTTP client utilities with HTTP/2 support
 - json_utils: JSON processing utilities
+- key_cache: Bounded LRU cache of parsed key objects keyed by key digest
+- key_pool: Background-refilled pool of pre-generated RSA-2048 keys
+- keystore: Encrypted multi-key store with session unlock and key object cache
+- metrics: In-process counters for runtime metrics
+- product_tree: Compact in-memory product tree with optional binary snapshot
+- sample_gen: Offline SDK call samples rendered from cached API specs
+- sm2_engine: SM2/SM3 key generation, signing and CSRs with precomputed point tables
+- yop_signer: yop-auth-v3 request signing with cached keys and batch mode
 """
 
 __version__ = "0.1.3"
@@ -0,0 +1,227 @@
+"""
+API路径模糊解析
+功能：以 docs/docking-product-tree.json 中全部API的请求路径建立索引，在发起HTTP请求前将格式有误的
+API URI（缺少版本号、prepay/pre-pay、rest/yos前缀错误、多余的 / 等）解析为已知路径，无法确定时返回相近的候选。
+输入中写明的版本号不会被更正为其他版本，其他版本的同名API只作为候选返回。
+规范化路径的精确匹配及前缀补全使用字符trie，拼写错误由三元组（trigram）倒排索引召回候选后按编辑相似度排序
+"""
+
+import re
+import threading
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from tools.metrics import Metrics
+from tools.product_tree import ApiRecord, get_product_tree
+
+MATCH_THRESHOLD = 0.85
+SUGGESTION_THRESHOLD = 0.5
+MAX_SUGGESTIONS = 5
+# 前缀补全要求的最短规范化长度，过短的输入只返回候选
+MIN_PREFIX_LENGTH = 8
+# 由三元组召回、参与相似度排序的候选数
+_RECALL_SIZE = 20
+
+_PREFIXES = {"rest", "yos"}
+_VERSION_RE = re.compile(r"^v\d+(?:\.\d+)*$")
+_SEPARATOR_RE = re.compile(r"[-_.\s]+")
+_SLASHES_RE = re.compile(r"/{2,}")
+
+
+def clean_path(api_uri: str) -> str:
+    """去除查询参数、重复及结尾的 /，统一为小写并以 / 开头"""
+    path = api_uri.strip().split("?", 1)[0].split("#", 1)[0].lower()
+    path = _SLASHES_RE.sub("/", "/" + path).rstrip("/")
+    return path or "/"
+
+
+def loose_key(path: str) -> str:
+    """
+    规范化路径：去掉 rest/yos 前缀及版本号，并去掉各段中的 - _ .，
+    如 /rest/v1.0/aggpay/pre-pay 与 /yos/aggpay/prepay 均为 aggpay/prepay
+    """
+    segments = [s for s in clean_path(path).split("/") if s]
+    if segments and segments[0] in _PREFIXES:
+        segments = segments[1:]
+    return "/".join(
+        _SEPARATOR_RE.sub("", s) for s in segments if not _VERSION_RE.match(s)
+    )
+
+
+def path_version(path: str) -> Optional[str]:
+    """路径中的版本号段（如 v1.0），没有版本号时返回None"""
+    for segment in clean_path(path).split("/"):
+        if _VERSION_RE.match(segment):
+            return segment
+    return None
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"^{key}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    """字符trie节点：ids 为以该节点为前缀的全部路径，terminal 为规范化路径恰好到此结束的路径"""
+
+    __slots__ = ("children", "ids", "terminal")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: List[int] = []
+        self.terminal: List[int] = []
+
+
+class ApiPathResolver:
+    """API路径解析器，索引只在创建时构建一次，解析过程不修改索引，可在多线程中共用"""
+
+    def __init__(self, records: Iterable[ApiRecord]):
+        self._records: List[ApiRecord] = []
+        self._keys: List[str] = []
+        self._versions: List[Optional[str]] = []
+        self._exact: Dict[str, int] = {}
+        self._root = _TrieNode()
+        self._grams: Dict[str, List[int]] = {}
+        for record in records:
+            path = clean_path(record.path)
+            if path in self._exact:
+                continue
+            api_id = len(self._records)
+            key = loose_key(path)
+            self._records.append(record)
+            self._keys.append(key)
+            self._versions.append(path_version(path))
+            self._exact[path] = api_id
+            node = self._root
+            node.ids.append(api_id)
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.append(api_id)
+            node.terminal.append(api_id)
+            for gram in _trigrams(key):
+                self._grams.setdefault(gram, []).append(api_id)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _walk(self, key: str) -> Optional[_TrieNode]:
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _ranked(
+        self, path: str, key: str, ids: Iterable[int]
+    ) -> List[Tuple[float, int]]:
+        """按规范化路径的相似度排序，相同时优先版本号、前缀与输入一致的路径"""
+        ranked = []
+        for api_id in ids:
+            score = SequenceMatcher(None, key, self._keys[api_id]).ratio()
+            tie_break = SequenceMatcher(
+                None, path, clean_path(self._records[api_id].path)
+            ).ratio()
+            ranked.append((score, tie_break, api_id))
+        ranked.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        return [(score, api_id) for score, _, api_id in ranked]
+
+    def _result(
+        self,
+        match: Optional[int],
+        matched_by: Optional[str],
+        ranked: List[Tuple[float, int]],
+    ) -> Dict[str, Any]:
+        Metrics.incr(f"api_resolver.{matched_by or 'miss'}")
+        score = next((score for score, api_id in ranked if api_id == match), 0.0)
+        suggestions = [
+            {
+                "path": self._records[api_id].path,
+                "method": self._records[api_id].method,
+                "title": self._records[api_id].title,
+                "score": round(score, 3),
+            }
+            for score, api_id in ranked
+            if api_id != match and score >= SUGGESTION_THRESHOLD
+        ][:MAX_SUGGESTIONS]
+        return {
+            "path": self._records[match].path if match is not None else None,
+            "matchedBy": matched_by,
+            "score": round(score, 3),
+            "suggestions": suggestions,
+        }
+
+    def resolve(self, api_uri: str) -> Dict[str, Any]:
+        """
+        将API URI解析为已知的API路径
+
+        依次尝试：路径精确匹配、规范化路径匹配（忽略前缀、版本号及分隔符，多个版本时优先与输入相近者）、
+        规范化路径的唯一前缀补全、三元组召回加相似度排序的模糊匹配。输入中写明版本号时，
+        后三步只选择版本号相同的API，其他版本的API只作为候选返回
+
+        Args:
+            api_uri: API的URI路径，如 /rest/v1.0/aggpay/prepay/
+
+        Returns:
+            Dict[str, Any]: 包含 path（匹配的路径，无法确定时为None）、matchedBy（exact/normalized/
+                prefix/fuzzy）、score（相似度）及 suggestions（相近的API，含 path、method、title、score）
+        """
+        path = clean_path(api_uri)
+        api_id = self._exact.get(path)
+        if api_id is not None:
+            return self._result(api_id, "exact", [(1.0, api_id)])
+
+        key = loose_key(path)
+        version = path_version(path)
+
+        def compatible(ranked: List[Tuple[float, int]]) -> List[Tuple[float, int]]:
+            return [
+                item
+                for item in ranked
+                if version is None or self._versions[item[1]] == version
+            ]
+
+        node = self._walk(key)
+        if node is not None and node.terminal:
+            ranked = self._ranked(path, key, node.terminal)
+            matches = compatible(ranked)
+            if matches:
+                return self._result(matches[0][1], "normalized", ranked)
+            return self._result(None, None, ranked)
+        if node is not None and len(key) >= MIN_PREFIX_LENGTH:
+            ranked = self._ranked(path, key, node.ids)
+            matches = compatible(ranked)
+            if len(matches) == 1:
+                return self._result(matches[0][1], "prefix", ranked)
+            return self._result(None, None, ranked)
+
+        counts: Dict[int, int] = {}
+        for gram in _trigrams(key):
+            for candidate in self._grams.get(gram, ()):
+                counts[candidate] = counts.get(candidate, 0) + 1
+        recalled = sorted(counts, key=lambda i: (-counts[i], i))[:_RECALL_SIZE]
+        ranked = self._ranked(path, key, recalled)
+        matches = compatible(ranked)
+        if matches and matches[0][0] >= MATCH_THRESHOLD:
+            # 最佳候选与次佳候选过于接近时不自动选择
+            if len(matches) == 1 or matches[0][0] - matches[1][0] >= 0.05:
+                return self._result(matches[0][1], "fuzzy", ranked)
+        return self._result(None, None, ranked)
+
+
+_default_resolver: Optional[ApiPathResolver] = None
+_default_lock = threading.Lock()
+
+
+def get_api_resolver() -> ApiPathResolver:
+    """获取基于默认产品目录树的解析器（进程内只构建一次）"""
+    global _default_resolver  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_resolver is None:
+            _default_resolver = ApiPathResolver(get_product_tree().iter_apis())
+        return _default_resolver
+
+
+def resolve_api_uri(api_uri: str) -> Dict[str, Any]:
+    """使用默认解析器解析API URI，见 ApiPathResolver.resolve"""
+    return get_api_resolver().resolve(api_uri)
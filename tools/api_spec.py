@@ -0,0 +1,400 @@
+"""
+API文档结构化解析
+功能：将 yeepay_yop_api_detail 返回的API markdown文档解析为结构化定义（基本信息、请求参数、
+响应参数、错误码及示例），请求/响应参数包含类型、是否必填、描述及嵌套层级；
+按源文档哈希缓存解析结果于内存及本地文档缓存，同一文档只解析一次；解析出的错误码同时写入全局错误码索引
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tools.doc_store import content_hash, get_doc_store
+from tools.error_index import get_error_index
+from tools.metrics import Metrics
+from tools.product_tree import get_product_tree
+
+SPEC_VERSION = 1
+API_DOC_BASE_URL = "https://open.yeepay.com/docs-v3/api/"
+_CACHE_SIZE = 256
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s*(.+?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)\s*(\S*)")
+_TAG_RE = re.compile(r"<[^>]+>")
+_BR_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_KV_RE = re.compile(r"^[-*\s]*\**([^:：|*]{1,20}?)\**\s*[:：]\s*(.+?)\s*$")
+_ENDPOINT_RE = re.compile(r"\b(GET|POST|PUT|DELETE)\s+(/(?:rest|yos)/[\w./{}-]+)")
+# 嵌套参数名前的层级标记，如 "└"、"&nbsp;&nbsp;"、"- "
+_NEST_RE = re.compile(r"^(?:&nbsp;|&emsp;|[└├│|\-—>\s　])+")
+_INDENT_RE = re.compile(r"&nbsp;&nbsp;|&emsp;|　")
+
+# 章节标题关键字（按顺序匹配，"示例"类章节先于参数章节）
+_SECTIONS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("requestExample", ("请求示例", "请求报文示例", "请求参数示例")),
+    ("responseExample", ("响应示例", "返回示例", "响应报文示例", "响应参数示例")),
+    ("errorCodes", ("错误码",)),
+    ("requestParams", ("请求参数", "请求体", "请求头")),
+    ("responseParams", ("响应参数", "返回参数", "响应体")),
+    ("basic", ("基本信息",)),
+    ("callbacks", ("回调", "结果通知")),
+    ("sampleCode", ("示例代码", "代码示例", "SDK")),
+]
+
+# 表头关键字到字段的映射（按顺序匹配，先匹配更具体的关键字）
+_PARAM_COLUMNS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("type", ("类型", "type")),
+    ("required", ("必填", "必须", "必需", "是否必", "required")),
+    ("example", ("示例", "example")),
+    ("description", ("描述", "说明", "含义", "备注", "description")),
+    ("name", ("参数", "名称", "字段", "name")),
+]
+_ERROR_COLUMNS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("subCode", ("子错误码", "子码", "subcode", "sub_code")),
+    ("solution", ("解决方案", "处理建议", "解决办法", "方案", "solution")),
+    ("description", ("描述", "说明", "含义", "信息", "description", "message")),
+    ("code", ("错误码", "返回码", "code")),
+]
+_BASIC_FIELDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("method", ("请求方式", "请求方法", "method")),
+    ("path", ("请求地址", "请求路径", "接口地址", "uri", "path")),
+    ("contentType", ("content-type", "请求格式", "数据格式", "报文格式")),
+    ("security", ("安全需求", "鉴权", "签名算法", "security")),
+]
+_TRUE_VALUES = {"是", "y", "yes", "true", "必填", "必须", "required", "m"}
+_FALSE_VALUES = {"否", "n", "no", "false", "选填", "可选", "非必填", "optional", "o"}
+
+
+def _match(text: str, mapping: List[Tuple[str, Tuple[str, ...]]]) -> Optional[str]:
+    text = text.strip().lower()
+    for field, keywords in mapping:
+        if any(keyword.lower() in text for keyword in keywords):
+            return field
+    return None
+
+
+def _clean(cell: str) -> str:
+    cell = _BR_RE.sub(" ", cell)
+    cell = _TAG_RE.sub("", cell).replace("&nbsp;", " ").replace("\\|", "|")
+    return " ".join(cell.replace("`", "").replace("**", "").split())
+
+
+def _split_row(line: str) -> List[str]:
+    cells = re.split(r"(?<!\\)\|", line.strip().strip("|"))
+    return [cell.strip() for cell in cells]
+
+
+def _parse_required(value: str) -> Optional[bool]:
+    value = value.strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    return None
+
+
+def _param_rows(header: List[str], rows: List[List[str]]) -> List[Dict[str, Any]]:
+    columns = [_match(_clean(cell), _PARAM_COLUMNS) for cell in header]
+    if "name" not in columns:
+        return []
+    params: List[Dict[str, Any]] = []
+    parents: List[str] = []
+    for row in rows:
+        fields: Dict[str, str] = {}
+        raw_name = ""
+        for column, cell in zip(columns, row):
+            if column is not None and column not in fields:
+                fields[column] = _clean(cell)
+                if column == "name":
+                    raw_name = cell
+        name = _NEST_RE.sub("", fields.get("name", "")).strip()
+        if not name:
+            continue
+        # 层级：名称前的层级标记数量，或以 . 分隔的参数路径
+        nest = _NEST_RE.match(raw_name.strip())
+        marker = nest.group(0) if nest else ""
+        level = len(_INDENT_RE.findall(marker))
+        if "└" in marker or "├" in marker:
+            level = max(level, 1)
+        if level == 0 and "." in name:
+            level = name.count(".")
+        del parents[level:]
+        param: Dict[str, Any] = {
+            "name": name,
+            "type": fields.get("type") or None,
+            "required": _parse_required(fields.get("required", "")),
+            "description": fields.get("description", ""),
+        }
+        if fields.get("example"):
+            param["example"] = fields["example"]
+        if level:
+            param["level"] = level
+            if parents:
+                param["parent"] = parents[-1]
+        parents.append(name)
+        params.append(param)
+    return params
+
+
+def _error_rows(header: List[str], rows: List[List[str]]) -> List[Dict[str, Any]]:
+    columns = [_match(_clean(cell), _ERROR_COLUMNS) for cell in header]
+    if "code" not in columns and "subCode" not in columns:
+        return []
+    codes: List[Dict[str, Any]] = []
+    for row in rows:
+        error: Dict[str, Any] = {
+            "code": "",
+            "subCode": "",
+            "description": "",
+            "solution": "",
+        }
+        for column, cell in zip(columns, row):
+            if column is not None and not error[column]:
+                error[column] = _clean(cell)
+        if error["code"] or error["subCode"]:
+            codes.append(error)
+    return codes
+
+
+def _basic_pairs(lines: List[str], tables: List[List[List[str]]]) -> Dict[str, str]:
+    pairs: List[Tuple[str, str]] = []
+    for line in lines:
+        found = _KV_RE.match(line)
+        if found:
+            pairs.append((found.group(1), found.group(2)))
+    for table in tables:
+        # 两列的键值表格（表头本身也可能是一行键值）
+        for row in table:
+            if len(row) >= 2:
+                pairs.append((row[0], row[1]))
+    basic: Dict[str, str] = {}
+    for key, value in pairs:
+        field = _match(_clean(key), _BASIC_FIELDS)
+        if field is not None and field not in basic and _clean(value):
+            basic[field] = _clean(value)
+    return basic
+
+
+def _iter_blocks(markdown: str) -> List[Tuple[str, Any]]:
+    """将文档切分为 heading / table / code / line 块，代码块中的内容不参与表格解析"""
+    blocks: List[Tuple[str, Any]] = []
+    lines = markdown.splitlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        fence = _FENCE_RE.match(line)
+        if fence:
+            body: List[str] = []
+            index += 1
+            while index < len(lines) and not lines[index].strip().startswith(
+                fence.group(1)
+            ):
+                body.append(lines[index])
+                index += 1
+            blocks.append(("code", (fence.group(2), "\n".join(body))))
+        elif _HEADING_RE.match(line):
+            found = _HEADING_RE.match(line)
+            assert found is not None
+            blocks.append(("heading", (len(found.group(1)), _clean(found.group(2)))))
+        elif line.strip().startswith("|"):
+            table: List[List[str]] = []
+            while index < len(lines) and lines[index].strip().startswith("|"):
+                row = _split_row(lines[index])
+                if not all(re.fullmatch(r":?-{2,}:?", c) or not c for c in row):
+                    table.append(row)
+                index += 1
+            blocks.append(("table", table))
+            continue
+        elif line.strip():
+            blocks.append(("line", line))
+        index += 1
+    return blocks
+
+
+def parse_api_spec(markdown: str) -> Dict[str, Any]:
+    """
+    解析API markdown文档
+
+    Args:
+        markdown: API文档内容
+
+    Returns:
+        Dict[str, Any]: 包含 title、method、path、contentType、security、description、
+            requestParams、responseParams（每项包含 name、type、required、description，
+            嵌套参数另含 level 及 parent）、errorCodes（code、subCode、description、solution）、
+            requestExample、responseExample
+    """
+    spec: Dict[str, Any] = {
+        "title": "",
+        "method": None,
+        "path": None,
+        "contentType": None,
+        "security": None,
+        "description": "",
+        "requestParams": [],
+        "responseParams": [],
+        "errorCodes": [],
+        "requestExample": None,
+        "responseExample": None,
+    }
+    section: Optional[str] = None
+    section_level = 0
+    basic_lines: List[str] = []
+    basic_tables: List[List[List[str]]] = []
+    intro: List[str] = []
+    seen_section = False
+
+    handlers: Dict[str, Callable[[List[str], List[List[str]]], List[Dict[str, Any]]]]
+    handlers = {
+        "requestParams": _param_rows,
+        "responseParams": _param_rows,
+        "errorCodes": _error_rows,
+    }
+    for kind, value in _iter_blocks(markdown):
+        if kind == "heading":
+            level, text = value
+            if level == 1 and not spec["title"]:
+                spec["title"] = text
+                continue
+            seen_section = True
+            matched = _match(text, _SECTIONS)
+            if matched is not None:
+                section, section_level = matched, level
+            elif section is not None and level <= section_level:
+                section = None
+        elif kind == "table" and value:
+            if section in handlers:
+                spec[section].extend(handlers[section](value[0], value[1:]))
+            elif section == "basic" or section is None:
+                basic_tables.append(value)
+                # 文档中未标注章节的错误码表
+                if section is None:
+                    spec["errorCodes"].extend(_error_rows(value[0], value[1:]))
+        elif kind == "code":
+            if section in ("requestExample", "responseExample") and not spec[section]:
+                spec[section] = value[1]
+        elif kind == "line":
+            if section == "basic":
+                basic_lines.append(value)
+            elif section is None:
+                if not seen_section and len(intro) < 5:
+                    intro.append(_clean(value.lstrip("> ")))
+                basic_lines.append(value)
+
+    spec.update(_basic_pairs(basic_lines, basic_tables))
+    if spec["method"]:
+        spec["method"] = spec["method"].split()[0].upper()
+    if not spec["path"] or not str(spec["path"]).startswith("/"):
+        endpoint = _ENDPOINT_RE.search(markdown)
+        if endpoint:
+            spec["method"] = spec["method"] or endpoint.group(1)
+            spec["path"] = endpoint.group(2)
+    spec["description"] = " ".join(line for line in intro if line)
+    return spec
+
+
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+# API路径到最近一次解析结果的映射，供离线查找（数量以API总数为上限）
+_by_path: Dict[str, Dict[str, Any]] = {}
+
+
+def api_spec(markdown: str, path: str = "") -> Dict[str, Any]:
+    """
+    解析API文档，结果按源文档哈希缓存于内存及本地文档缓存
+
+    Args:
+        markdown: API文档内容
+        path: 获取文档时使用的API路径，文档中未写明请求路径时以此登记，供离线查找
+
+    Returns:
+        Dict[str, Any]: 结构化的API定义（见 parse_api_spec），另包含 docHash（源文档哈希）
+    """
+    source_hash = content_hash(markdown)
+    with _cache_lock:
+        spec = _cache.get(source_hash)
+        if spec is not None:
+            _cache.move_to_end(source_hash)
+            Metrics.incr("api_spec.cache_hits")
+            if path:
+                _by_path.setdefault(normalize_api_path(path), spec)
+            return spec
+
+    store = get_doc_store()
+    cached = store.get_derived("api_spec", source_hash) if store else None
+    spec = json.loads(cached) if cached is not None else None
+    if spec is None or spec.get("version") != SPEC_VERSION:
+        spec = {
+            **parse_api_spec(markdown),
+            "docHash": source_hash,
+            "version": SPEC_VERSION,
+        }
+        Metrics.incr("api_spec.parses")
+        if store is not None:
+            try:
+                store.put_derived(
+                    "api_spec", source_hash, json.dumps(spec, ensure_ascii=False)
+                )
+            except (OSError, ValueError) as e:
+                print(f"文档缓存写入失败：{str(e)}")
+    else:
+        Metrics.incr("api_spec.cache_hits")
+
+    with _cache_lock:
+        _cache[source_hash] = spec
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+        for known_path in {
+            spec.get("path"),
+            normalize_api_path(path) if path else None,
+        }:
+            if known_path:
+                _by_path[known_path] = spec
+    # 文档中未写明请求路径时，错误码以获取文档时使用的路径登记
+    get_error_index().add_spec(
+        spec
+        if spec.get("path") or not path
+        else {**spec, "path": normalize_api_path(path)}
+    )
+    return spec
+
+
+def normalize_api_path(api_uri: str) -> str:
+    """将API的URI规范为以 / 开头、不带查询参数及结尾 / 的路径"""
+    path = api_uri.strip().split("?", 1)[0].rstrip("/")
+    return path if path.startswith("/") else "/" + path
+
+
+def cached_spec(api_uri: str) -> Optional[Dict[str, Any]]:
+    """
+    不发起网络请求，查找已解析或已缓存文档的API定义
+
+    依次查找本进程解析过的API定义，及本地文档缓存中该API的docs-v3文档（按产品目录树中的请求方式
+    推断文档地址）
+
+    Args:
+        api_uri: API的URI路径，如 /rest/v1.0/aggpay/pre-pay
+
+    Returns:
+        Optional[Dict[str, Any]]: 结构化的API定义，未缓存时返回None
+    """
+    path = normalize_api_path(api_uri)
+    with _cache_lock:
+        spec = _by_path.get(path)
+    if spec is not None:
+        Metrics.incr("api_spec.cache_hits")
+        return spec
+
+    store = get_doc_store()
+    if store is None:
+        return None
+    suffix = path.replace("/", "_")
+    doc_ids = get_product_tree().doc_ids_for_path(path) or [
+        method + suffix for method in ("post", "get", "options")
+    ]
+    for doc_id in doc_ids:
+        content = store.get(API_DOC_BASE_URL + doc_id + ".md")
+        if content is not None:
+            return api_spec(content)
+    return None
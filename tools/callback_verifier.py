@@ -0,0 +1,247 @@
+"""
+YOP回调通知验签及解密工具
+功能：解密YOP结果通知(回调)中的数字信封 response 参数，并使用平台公钥验证签名。
+数字信封格式为 加密的随机密钥$加密的数据$对称算法$摘要算法：随机密钥使用商户公钥加密(RSA)，
+数据使用随机密钥以 AES/ECB/PKCS5Padding 加密，解密后为 原始数据$签名。
+商户私钥通过密钥缓存复用，平台证书按文件路径及修改时间缓存，批量重放通知时密钥只解析一次
+"""
+
+import base64
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import padding as sym_padding
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from tools import key_cache
+from tools.config import Config
+from tools.metrics import Metrics
+from tools.yop_signer import load_signing_key
+
+MAX_BATCH_CALLBACKS = 10000
+DEFAULT_PRIVATE_KEY_NAME = "应用私钥RSA2048.txt"
+_DIGESTS = {"SHA256": hashes.SHA256, "SHA512": hashes.SHA512}
+
+_platform_keys: Dict[Tuple[str, int], Any] = {}
+_platform_lock = threading.Lock()
+
+
+def _b64decode(value: str) -> bytes:
+    """解码Base64字符串，兼容URL安全字符及缺失的填充"""
+    value = "".join(value.split()).replace("-", "+").replace("_", "/")
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+def load_platform_public_key(platform_cert: str = "") -> Any:
+    """
+    加载YOP平台公钥，支持证书文件路径(.cer/.pem，PEM或DER编码)或Base64编码的公钥，
+    为空时使用 Config.YOP_PLATFORM_CERT_PATH（仓库不附带平台证书，需自行配置）；
+    证书文件按路径及修改时间缓存
+
+    Raises:
+        ValueError: 平台证书不存在或无法解析
+    """
+    if not platform_cert.strip():
+        platform_cert = Config.YOP_PLATFORM_CERT_PATH
+        if not os.path.isfile(platform_cert):
+            raise ValueError(
+                f"平台证书文件不存在: {platform_cert}，"
+                "请设置环境变量 YOP_MCP_PLATFORM_CERT 或传入 platform_cert 参数"
+            )
+    platform_cert = platform_cert.strip()
+    if not os.path.isfile(platform_cert):
+        if platform_cert.lower().endswith((".cer", ".pem", ".crt")):
+            raise ValueError(f"平台证书文件不存在: {platform_cert}")
+        return key_cache.load_public_key("".join(platform_cert.split()))
+
+    cache_key = (os.path.abspath(platform_cert), os.stat(platform_cert).st_mtime_ns)
+    with _platform_lock:
+        if cache_key in _platform_keys:
+            Metrics.incr("callback.platform_cache_hits")
+            return _platform_keys[cache_key]
+    with open(platform_cert, "rb") as f:
+        data = f.read()
+    if data.lstrip().startswith(b"-----BEGIN"):
+        public_key = x509.load_pem_x509_certificate(data).public_key()
+    else:
+        public_key = x509.load_der_x509_certificate(data).public_key()
+    with _platform_lock:
+        # 证书文件更新后旧的缓存项不再命中，直接丢弃
+        for key in [key for key in _platform_keys if key[0] == cache_key[0]]:
+            del _platform_keys[key]
+        _platform_keys[cache_key] = public_key
+    return public_key
+
+
+def extract_response(notification: str) -> str:
+    """从回调通知中提取数字信封：支持表单报文(response=...)、JSON报文或 response 参数值本身"""
+    notification = notification.strip()
+    if notification.startswith("{"):
+        return str(json.loads(notification).get("response", ""))
+    if "response=" in notification:
+        return parse_qs(notification).get("response", [""])[0]
+    return notification
+
+
+def open_envelope(
+    response: str, private_key: Any, platform_key: Any
+) -> Tuple[str, bool]:
+    """
+    解密数字信封并验证签名
+
+    Returns:
+        Tuple[str, bool]: 原始通知数据及签名是否有效
+
+    Raises:
+        ValueError: 信封格式错误或解密失败
+    """
+    parts = response.strip().split("$")
+    if len(parts) != 4:
+        raise ValueError(
+            "通知格式错误，应为 加密的随机密钥$加密的数据$对称算法$摘要算法"
+        )
+    encrypted_key, encrypted_data, cipher_name, digest_name = parts
+    if cipher_name.upper() != "AES":
+        raise ValueError(f"不支持的对称加密算法: {cipher_name}")
+    digest = _DIGESTS.get(digest_name.upper())
+    if digest is None:
+        raise ValueError(f"不支持的摘要算法: {digest_name}")
+    if not isinstance(private_key, rsa.RSAPrivateKey):
+        raise ValueError("商户私钥不是RSA私钥")
+
+    random_key = private_key.decrypt(_b64decode(encrypted_key), padding.PKCS1v15())
+    decryptor = Cipher(algorithms.AES(random_key), modes.ECB()).decryptor()
+    unpadder = sym_padding.PKCS7(128).unpadder()
+    plain = decryptor.update(_b64decode(encrypted_data)) + decryptor.finalize()
+    plain = unpadder.update(plain) + unpadder.finalize()
+
+    source, _, signature = plain.decode("utf-8").rpartition("$")
+    if not source:
+        raise ValueError("解密后的通知数据中缺少签名")
+    try:
+        platform_key.verify(
+            _b64decode(signature),
+            source.encode("utf-8"),
+            padding.PKCS1v15(),
+            digest(),
+        )
+        return source, True
+    except (InvalidSignature, ValueError):
+        return source, False
+
+
+def _load_keys(private_key: str, platform_cert: str) -> Tuple[Any, Any]:
+    private_key = private_key.strip() or os.path.join(
+        Config.KEY_SAVE_PATH, DEFAULT_PRIVATE_KEY_NAME
+    )
+    return load_signing_key(private_key), load_platform_public_key(platform_cert)
+
+
+def _verify_one(notification: str, keys: Tuple[Any, Any]) -> Dict[str, Any]:
+    try:
+        source, verified = open_envelope(extract_response(notification), *keys)
+    except ValueError as e:
+        Metrics.incr("callback.failed")
+        return {"message": f"通知解密失败: {str(e)}", "verified": False, "data": None}
+    try:
+        data: Any = json.loads(source)
+    except ValueError:
+        data = source
+    Metrics.incr("callback.verified" if verified else "callback.invalid_signature")
+    return {
+        "message": (
+            "验签成功" if verified else "验签失败，通知可能被篡改或平台证书不匹配"
+        ),
+        "verified": verified,
+        "data": data,
+    }
+
+
+def verify_callback(
+    notification: str, private_key: str = "", platform_cert: str = ""
+) -> Dict[str, Any]:
+    """
+    解密并验证单个回调通知
+
+    Args:
+        notification: 回调通知报文（表单、JSON或 response 参数值）
+        private_key: Base64编码的商户私钥或私钥文件路径，为空时使用 ./keys/应用私钥RSA2048.txt
+        platform_cert: 平台证书路径或Base64编码的平台公钥，为空时使用 Config.YOP_PLATFORM_CERT_PATH
+            （YOP_MCP_PLATFORM_CERT），仓库不附带该证书，两者须至少配置一个
+
+    Returns:
+        Dict[str, Any]: 包含 message、verified 及 data（解密后的通知内容）
+    """
+    try:
+        keys = _load_keys(private_key, platform_cert)
+    except (ValueError, TypeError, OSError) as e:
+        return {"message": f"加载密钥失败: {str(e)}", "verified": False, "data": None}
+    return _verify_one(notification, keys)
+
+
+def read_notification_log(log_path: str) -> List[str]:
+    """读取通知日志，每行一个通知（表单、JSON或 response 参数值），忽略空行"""
+    with open(log_path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def verify_callbacks_batch(
+    notifications: Optional[List[str]] = None,
+    log_path: str = "",
+    private_key: str = "",
+    platform_cert: str = "",
+) -> Dict[str, Any]:
+    """
+    批量解密并验证回调通知（用于重放日志中的通知），密钥只解析一次
+
+    Args:
+        notifications: 通知报文列表
+        log_path: 通知日志文件路径，每行一个通知，可与 notifications 同时使用
+        private_key: Base64编码的商户私钥或私钥文件路径
+        platform_cert: 平台证书路径或Base64编码的平台公钥
+
+    Returns:
+        Dict[str, Any]: 包含 message、stats（verified/invalid/failed）及 results（与输入顺序一致）
+    """
+    batch = list(notifications or [])
+    try:
+        if log_path:
+            batch.extend(read_notification_log(log_path))
+    except OSError as e:
+        return {"message": f"读取通知日志失败: {str(e)}", "stats": {}, "results": []}
+    if not batch:
+        return {"message": "未提供需要验证的通知", "stats": {}, "results": []}
+    if len(batch) > MAX_BATCH_CALLBACKS:
+        return {
+            "message": f"单批最多验证{MAX_BATCH_CALLBACKS}个通知",
+            "stats": {},
+            "results": [],
+        }
+    try:
+        keys = _load_keys(private_key, platform_cert)
+    except (ValueError, TypeError, OSError) as e:
+        return {"message": f"加载密钥失败: {str(e)}", "stats": {}, "results": []}
+
+    results = [_verify_one(notification, keys) for notification in batch]
+    stats = {
+        "verified": sum(1 for result in results if result["verified"]),
+        "invalid": sum(
+            1
+            for result in results
+            if not result["verified"] and result["data"] is not None
+        ),
+        "failed": sum(1 for result in results if result["data"] is None),
+    }
+    return {
+        "message": f"批量验签完成：成功 {stats['verified']} 个，"
+        f"验签失败 {stats['invalid']} 个，解密失败 {stats['failed']} 个",
+        "stats": stats,
+        "results": results,
+    }
@@ -0,0 +1,279 @@
+"""
+CFCA证书批量下载
+功能：批量激活并下载CFCA证书。证书请求(P10)先由 gen_p10_batch 在进程池中批量生成并写入服务进程的缓存，
+参数校验在线程中执行（命中该缓存），PFX生成在共享执行器（见 executor）中并行执行，
+CFCA下载接口通过共享持久连接的异步CFCA客户端以有限并发调用，可重试的失败自动重试；每个证书单独返回结果，
+已完成的证书记录在状态文件中，重新执行时自动跳过，可断点续传
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from tools.cert_utils import complete_cert_download, prepare_cert_download
+from tools.cfca_client import CfcaClient, get_cfca_client
+from tools.config import Config
+from tools.executor import get_executor
+from tools.gen_p10 import CFCA_SUBJECT, KeyType, gen_p10_batch
+from tools.metrics import Metrics
+
+BATCH_FIELDS = ("serial_no", "auth_code", "private_key", "public_key", "pwd")
+# CSV表头及列表参数中可使用的驼峰字段名
+_FIELD_ALIASES = {
+    "serialNo": "serial_no",
+    "authCode": "auth_code",
+    "privateKey": "private_key",
+    "publicKey": "public_key",
+}
+SUCCESS_MESSAGES = ("CFCA证书激活并下载成功", "本地证书已存在")
+MAX_BATCH_CERTS = 1000
+
+
+def load_items(
+    items: Optional[List[Dict[str, str]]] = None, csv_path: str = ""
+) -> List[Dict[str, str]]:
+    """
+    读取批量下载条目，支持字典列表或CSV文件（表头为字段名，如 serial_no,auth_code,...）
+
+    Returns:
+        List[Dict[str, str]]: 每项包含 algorithm、serial_no、auth_code、private_key、public_key、pwd
+    """
+    raw_items: List[Dict[str, Any]] = list(items or [])
+    if csv_path:
+        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+            raw_items.extend(csv.DictReader(f))
+
+    result = []
+    for raw in raw_items:
+        item = {"algorithm": "RSA", **{field: "" for field in BATCH_FIELDS}}
+        for key, value in raw.items():
+            if key is None:
+                continue
+            key = _FIELD_ALIASES.get(key.strip(), key.strip())
+            if key in item and value is not None:
+                item[key] = str(value).strip()
+        result.append(item)
+    return result
+
+
+class BatchState:
+    """批量下载状态文件：记录每个证书序列号的处理结果（不含密钥及密码）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._records: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._records = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"批量下载状态文件损坏，将重新建立：{str(e)}")
+
+    def completed(self, serial_no: str) -> Optional[Dict[str, Any]]:
+        """返回已成功完成且证书文件仍存在的记录"""
+        record = self._records.get(serial_no)
+        if record is None or record.get("status") != "success":
+            return None
+        # SM2证书不生成PFX，pfxCert 为空时只检查公钥证书
+        if not record.get("pubCert") or not all(
+            os.path.exists(record[key])
+            for key in ("pfxCert", "pubCert")
+            if record.get(key)
+        ):
+            return None
+        return record
+
+    def record(self, result: Dict[str, Any]) -> None:
+        self._records[result["serialNo"]] = dict(result, updatedAt=time.time())
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._records, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def pregenerate_cert_reqs(items: List[Dict[str, str]]) -> None:
+    """
+    按算法批量生成条目的证书请求并写入本进程的证书请求缓存
+
+    生成失败的条目不在此处理，准备阶段（prepare_cert_download）会重新生成并返回具体错误
+    """
+    private_keys: Dict[KeyType, List[str]] = {}
+    for item in items:
+        if item["private_key"]:
+            key_type = (
+                KeyType.SM2 if item["algorithm"].upper() == "SM2" else KeyType.RSA2048
+            )
+            private_keys.setdefault(key_type, []).append(item["private_key"])
+    for key_type, keys in private_keys.items():
+        gen_p10_batch(keys, key_type, CFCA_SUBJECT)
+
+
+async def download_certs_batch(  # pylint: disable=too-many-arguments,too-many-locals
+    items: Optional[List[Dict[str, str]]] = None,
+    csv_path: str = "",
+    concurrency: int = Config.CFCA_DOWNLOAD_CONCURRENCY,
+    state_path: str = Config.CERT_BATCH_STATE_PATH,
+    progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, Any]:
+    """
+    批量激活并下载CFCA证书
+
+    Args:
+        items: 条目列表，每项包含 algorithm、serial_no、auth_code、private_key、public_key、pwd
+        csv_path: CSV文件路径，表头字段同上，可与 items 同时使用
+        concurrency: CFCA下载接口的最大并发请求数
+        state_path: 状态文件路径，已成功的证书在重新执行时跳过
+        progress: 每完成一个条目时调用的异步回调，参数为(已完成数, 总数)
+        transport: 自定义HTTP传输层（用于测试），未指定时使用服务进程共享的CFCA客户端
+
+    Returns:
+        Dict[str, Any]: 包含 message、stats 及 results（与输入顺序一致，每项包含
+            serialNo、status(success/skipped/failed)、message、pfxCert、pubCert）
+    """
+    try:
+        batch = load_items(items, csv_path)
+    except (OSError, csv.Error) as e:
+        return {
+            "message": f"读取批量下载条目失败: {str(e)}",
+            "stats": {},
+            "results": [],
+        }
+    if not batch:
+        return {"message": "未提供需要下载的证书", "stats": {}, "results": []}
+    if len(batch) > MAX_BATCH_CERTS:
+        return {
+            "message": f"单批最多下载{MAX_BATCH_CERTS}个证书",
+            "stats": {},
+            "results": [],
+        }
+
+    state = BatchState(state_path)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    loop = asyncio.get_running_loop()
+    done = 0
+    seen = set()
+
+    async def finish(
+        index: int, status: str, outcome: Dict[str, Any], persist: bool = True
+    ) -> None:
+        nonlocal done
+        result = {
+            "serialNo": batch[index]["serial_no"],
+            "status": status,
+            "message": outcome.get("message"),
+            "pfxCert": outcome.get("pfxCert"),
+            "pubCert": outcome.get("pubCert"),
+        }
+        results[index] = result
+        if persist and result["serialNo"]:
+            state.record(result)
+        Metrics.incr(f"cert_batch.{status}")
+        done += 1
+        if progress is not None:
+            await progress(done, len(batch))
+
+    async def run_one(index: int, executor: Executor, client: CfcaClient) -> None:
+        item = batch[index]
+        prepared = await loop.run_in_executor(
+            get_executor("thread"),
+            prepare_cert_download,
+            item["algorithm"],
+            item["serial_no"],
+            item["auth_code"],
+            item["private_key"],
+            item["public_key"],
+            item["pwd"],
+        )
+        if "message" in prepared:
+            status = "success" if prepared["message"] in SUCCESS_MESSAGES else "failed"
+            await finish(index, status, prepared)
+            return
+
+        cert = prepared["cert"]
+        if cert is None:
+            async with semaphore:
+                downloaded = await client.download(
+                    item["serial_no"], item["auth_code"], prepared["certReq"]
+                )
+            if downloaded.error_msg:
+                await finish(index, "failed", {"message": downloaded.error_msg})
+                return
+            cert = downloaded.cert
+
+        outcome = await loop.run_in_executor(
+            executor,
+            complete_cert_download,
+            item["algorithm"],
+            item["serial_no"],
+            item["private_key"],
+            item["pwd"],
+            cert,
+        )
+        status = "success" if outcome["message"] in SUCCESS_MESSAGES else "failed"
+        await finish(index, status, outcome)
+
+    pending = []
+    for index, item in enumerate(batch):
+        serial_no = item["serial_no"]
+        if serial_no and serial_no in seen:
+            # 重复条目不写入状态文件，以免覆盖首个条目的结果
+            await finish(index, "failed", {"message": "重复的证书序列号"}, False)
+            continue
+        seen.add(serial_no)
+        record = state.completed(serial_no) if serial_no else None
+        if record is not None:
+            await finish(
+                index,
+                "skipped",
+                dict(record, message="已在之前的批次中完成，跳过"),
+                False,
+            )
+            continue
+        pending.append(index)
+
+    if pending:
+        client = (
+            get_cfca_client()
+            if transport is None
+            else CfcaClient(max_connections=concurrency, transport=transport)
+        )
+        # 证书请求预先在进程池中并行生成并写入本进程的缓存，准备阶段在线程中执行以命中该缓存
+        await loop.run_in_executor(
+            get_executor("thread"),
+            pregenerate_cert_reqs,
+            [batch[index] for index in pending],
+        )
+        # PFX生成使用共享执行器：进程池以spawn启动子进程，不会fork复制父进程中的线程状态及内存中的密钥；
+        # 使用线程池时子任务的缓存及指标保留在服务进程中
+        executor = get_executor()
+        try:
+            await asyncio.gather(
+                *(run_one(index, executor, client) for index in pending)
+            )
+        finally:
+            if transport is not None:
+                await client.aclose()
+
+    final = [result for result in results if result is not None]
+    stats = {
+        status: sum(1 for result in final if result["status"] == status)
+        for status in ("success", "skipped", "failed")
+    }
+    return {
+        "message": f"批量下载完成：成功 {stats['success']} 个，"
+        f"跳过 {stats['skipped']} 个，失败 {stats['failed']} 个",
+        "stats": stats,
+        "results": final,
+    }
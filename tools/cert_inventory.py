@@ -0,0 +1,290 @@
+"""
+本地证书清单
+功能：以SQLite保存已下载CFCA证书的元数据（序列号、主题、颁发者、算法、有效期及文件路径），
+下载证书时写入，重新扫描证书目录时按文件大小及修改时间增量更新；
+按关键字及到期时间查询时直接使用索引，无需逐一解析证书文件
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from cryptography import x509
+
+from tools.config import Config
+from tools.metrics import Metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS certs (
+    cer_path TEXT PRIMARY KEY,
+    pfx_path TEXT,
+    serial_no TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    subject TEXT,
+    issuer TEXT,
+    not_before REAL,
+    not_after REAL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_certs_not_after ON certs (not_after);
+CREATE INDEX IF NOT EXISTS idx_certs_serial_no ON certs (serial_no);
+"""
+_COLUMNS = (
+    "cer_path",
+    "pfx_path",
+    "serial_no",
+    "algorithm",
+    "subject",
+    "issuer",
+    "not_before",
+    "not_after",
+    "size",
+    "mtime_ns",
+    "error",
+)
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def read_cert_metadata(cer_path: str, algorithm: str) -> Dict[str, Any]:
+    """
+    解析公钥证书文件(.cer，PEM或DER编码)的元数据
+
+    Returns:
+        Dict[str, Any]: 与清单表字段对应的记录，解析失败时 error 为错误信息
+    """
+    stat = os.stat(cer_path)
+    base = os.path.splitext(cer_path)[0]
+    record: Dict[str, Any] = {
+        "cer_path": os.path.normpath(cer_path),
+        "pfx_path": (
+            os.path.normpath(base + ".pfx") if os.path.exists(base + ".pfx") else None
+        ),
+        "serial_no": os.path.basename(base),
+        "algorithm": algorithm,
+        "subject": None,
+        "issuer": None,
+        "not_before": None,
+        "not_after": None,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "error": None,
+    }
+    try:
+        with open(cer_path, "rb") as f:
+            data = f.read()
+        if data.lstrip().startswith(b"-----BEGIN"):
+            certificate = x509.load_pem_x509_certificate(data)
+        else:
+            certificate = x509.load_der_x509_certificate(data)
+        # 主题、颁发者及有效期不依赖公钥算法，SM2证书同样可以读取
+        record["subject"] = certificate.subject.rfc4514_string()
+        record["issuer"] = certificate.issuer.rfc4514_string()
+        record["not_before"] = certificate.not_valid_before_utc.timestamp()
+        record["not_after"] = certificate.not_valid_after_utc.timestamp()
+    except ValueError as e:
+        record["error"] = f"证书解析失败: {str(e)}"
+    return record
+
+
+class CertInventory:
+    """
+    SQLite证书清单
+
+    Args:
+        db_path: 数据库文件路径
+        roots: 算法到证书保存目录的映射，如 {"RSA": "./certs/rsa/"}
+    """
+
+    def __init__(self, db_path: str, roots: Dict[str, str]):
+        self.db_path = db_path
+        self.roots = roots
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 证书下载可能在进程池中执行，每次操作使用独立连接并依赖SQLite文件锁
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(self, cer_path: str, algorithm: str) -> None:
+        """写入或更新单个公钥证书的记录"""
+        self._upsert([read_cert_metadata(cer_path, algorithm)])
+
+    def _upsert(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO certs ({', '.join(_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                [tuple(record[column] for column in _COLUMNS) for record in records],
+            )
+        Metrics.incr("cert_inventory.recorded", len(records))
+
+    def rescan(self) -> Dict[str, int]:
+        """
+        重新扫描证书目录：只解析新增或大小/修改时间有变化的 .cer 文件，并移除已删除的证书
+
+        Returns:
+            Dict[str, int]: 扫描统计（files/updated/removed）
+        """
+        with self._lock, closing(self._connect()) as conn:
+            known = {
+                row["cer_path"]: row
+                for row in conn.execute(
+                    "SELECT cer_path, pfx_path, size, mtime_ns FROM certs"
+                )
+            }
+
+        seen = set()
+        changed = []
+        for algorithm, root in self.roots.items():
+            if not os.path.isdir(root):
+                continue
+            for name in sorted(os.listdir(root)):
+                if not name.lower().endswith(".cer"):
+                    continue
+                path = os.path.normpath(os.path.join(root, name))
+                seen.add(path)
+                row = known.get(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                pfx_path = os.path.splitext(path)[0] + ".pfx"
+                if (
+                    row is not None
+                    and row["size"] == stat.st_size
+                    and row["mtime_ns"] == stat.st_mtime_ns
+                    and (row["pfx_path"] is not None) == os.path.exists(pfx_path)
+                ):
+                    continue
+                changed.append(read_cert_metadata(path, algorithm))
+
+        removed = [path for path in known if path not in seen]
+        self._upsert(changed)
+        if removed:
+            with self._lock, closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "DELETE FROM certs WHERE cer_path = ?",
+                    [(path,) for path in removed],
+                )
+        return {"files": len(seen), "updated": len(changed), "removed": len(removed)}
+
+    def query(
+        self, keyword: str = "", expiring_within: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        查询证书清单，按到期时间升序排列
+
+        Args:
+            keyword: 按序列号、主题、颁发者或算法模糊匹配，为空时不过滤
+            expiring_within: 只返回在指定天数内到期（含已过期）的证书，为None时不过滤
+
+        Returns:
+            List[Dict[str, Any]]: 每项包含 serialNo、algorithm、subject、issuer、
+                notBefore、notAfter、expired、pubCert、pfxCert、error
+        """
+        conditions = []
+        params: List[Any] = []
+        if keyword:
+            # 转义关键字中的 LIKE 通配符，_ 及 % 按字面匹配
+            escaped = (
+                keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            pattern = f"%{escaped}%"
+            conditions.append(
+                "(serial_no LIKE ? ESCAPE '\\' OR subject LIKE ? ESCAPE '\\'"
+                " OR issuer LIKE ? ESCAPE '\\' OR algorithm LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern] * 4)
+        if expiring_within is not None:
+            conditions.append("not_after <= ?")
+            params.append(time.time() + expiring_within * 86400)
+        sql = "SELECT * FROM certs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY not_after IS NULL, not_after, serial_no"
+
+        now = time.time()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            {
+                "serialNo": row["serial_no"],
+                "algorithm": row["algorithm"],
+                "subject": row["subject"],
+                "issuer": row["issuer"],
+                "notBefore": _iso(row["not_before"]),
+                "notAfter": _iso(row["not_after"]),
+                "expired": row["not_after"] is not None and row["not_after"] < now,
+                "pubCert": row["cer_path"],
+                "pfxCert": row["pfx_path"],
+                "error": row["error"],
+            }
+            for row in rows
+        ]
+
+
+_default_inventory: Optional[CertInventory] = None
+_default_lock = threading.Lock()
+
+
+def get_cert_inventory() -> CertInventory:
+    """获取默认证书清单（覆盖 RSA/SM2 证书保存目录），配置的路径变化时重新创建"""
+    global _default_inventory  # pylint: disable=global-statement
+    roots = {"RSA": Config.RSA_CERT_SAVE_PATH, "SM2": Config.SM2_CERT_SAVE_PATH}
+    with _default_lock:
+        if (
+            _default_inventory is None
+            or _default_inventory.db_path != Config.CERT_INVENTORY_PATH
+            or _default_inventory.roots != roots
+        ):
+            _default_inventory = CertInventory(Config.CERT_INVENTORY_PATH, roots)
+        return _default_inventory
+
+
+def record_cert(cer_path: str, algorithm: str) -> None:
+    """将新下载的证书写入默认证书清单，写入失败不影响证书下载结果"""
+    try:
+        get_cert_inventory().record(cer_path, algorithm)
+    except (OSError, sqlite3.Error) as e:
+        print(f"更新证书清单失败：{str(e)}")
+
+
+def list_certs(
+    keyword: str = "", expiring_within: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    增量扫描证书目录后，从默认证书清单中查询证书
+
+    Returns:
+        Dict[str, Any]: 包含 message、stats（files/updated/removed）及 certificates 列表
+    """
+    inventory = get_cert_inventory()
+    stats = inventory.rescan()
+    certificates = inventory.query(keyword.strip(), expiring_within)
+    if expiring_within is not None:
+        message = (
+            f"共 {len(certificates)} 个证书将在 {expiring_within:g} 天内到期或已过期"
+        )
+    else:
+        message = f"共 {len(certificates)} 个证书"
+    return {"message": message, "stats": stats, "certificates": certificates}
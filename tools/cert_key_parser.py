@@ -1,18 +1,41 @@
 """
 证书密钥解析工具
-功能：根据证书文件（私钥证书（.pfx）、公钥证书（.cer））解析出Base64编码后的公钥或私钥字符串
+功能：根据证书文件（私钥证书（.pfx）、公钥证书（.cer））解析出Base64编码后的公钥或私钥字符串；
+解析结果按（文件标识、大小、修改时间、密码的HMAC）缓存，并支持并行解析整个目录
 """
 
 import base64
+import hashlib
+import hmac
+import multiprocessing
 import os
-from typing import Any, Dict, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
+from cryptography.exceptions import UnsupportedAlgorithm
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import ec, rsa
 from cryptography.hazmat.primitives.serialization import pkcs12
 from cryptography.x509 import load_der_x509_certificate, load_pem_x509_certificate
 
+from tools import sm2_engine
+from tools.config import Config
+from tools.metrics import Metrics
+
+CERT_EXTENSIONS = (".pfx", ".p12", ".cer", ".pem")
+_PARSE_CACHE_SIZE = 128
+# 密码只以进程内随机密钥的HMAC参与缓存键，不保存可离线穷举的无盐哈希
+_PASSWORD_MAC_KEY = os.urandom(32)
+# (绝对路径, 设备号, inode, 文件大小, 修改时间, 密码HMAC)
+_CacheKey = Tuple[str, int, int, int, int, str]
+# (不含私钥的解析结果, 私钥对象, 错误信息)：私钥以解析后的密钥对象缓存，不保存Base64明文
+_CacheEntry = Tuple[Optional[Dict[str, Any]], Any, Optional[str]]
+_parse_cache: "OrderedDict[_CacheKey, _CacheEntry]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
 
 def parse_certificates(
     algorithm: str = "RSA",
@@ -35,7 +58,7 @@ def parse_certificates(
     try:
         # 处理私钥证书
         if pfx_cert and os.path.exists(pfx_cert):
-            pfx_result = parse_key_from_certificate(pfx_cert, pwd)
+            pfx_result = parse_key_from_certificate_cached(pfx_cert, pwd)
             if pfx_result["private_key"]:
                 result["privateKey"] = pfx_result["private_key"]
             if pfx_result["public_key"] and not result.get("publicKey"):
@@ -52,7 +75,7 @@ def parse_certificates(
 
         # 处理公钥证书
         if pub_cert and os.path.exists(pub_cert):
-            pub_result = parse_key_from_certificate(pub_cert)
+            pub_result = parse_key_from_certificate_cached(pub_cert)
             if pub_result["public_key"]:
                 result["publicKey"] = pub_result["public_key"]
 
@@ -198,7 +221,16 @@ def parse_key_from_certificate(
                 certificate = load_der_x509_certificate(cert_data, default_backend())
 
             # 提取公钥
-            public_key = certificate.public_key()
+            try:
+                public_key = certificate.public_key()
+            except UnsupportedAlgorithm:
+                # cryptography 不支持SM2曲线，由SM2引擎从证书DER中提取公钥
+                sm2_public_key = sm2_engine.public_key_from_certificate(
+                    certificate.public_bytes(serialization.Encoding.DER)
+                )
+                result["key_type"] = "SM2"
+                result["public_key"] = sm2_public_key.to_base64()
+                return result
 
             # 判断密钥类型
             if isinstance(public_key, rsa.RSAPublicKey):
@@ -228,6 +260,185 @@ def parse_key_from_certificate(
         raise ValueError(f"解析证书失败: {str(e)}") from e
 
 
+def _cache_key(cert_path: str, password: Optional[str]) -> _CacheKey:
+    path = os.path.abspath(cert_path)
+    stat = os.stat(path)
+    if os.path.splitext(path)[1].lower() not in (".pfx", ".p12"):
+        password = None  # 公钥证书的解析结果与密码无关
+    pwd_mac = hmac.new(
+        _PASSWORD_MAC_KEY, (password or "").encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    return (path, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, pwd_mac)
+
+
+def _cache_get(
+    key: _CacheKey,
+) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    with _parse_cache_lock:
+        entry = _parse_cache.get(key)
+        if entry is not None:
+            _parse_cache.move_to_end(key)
+            Metrics.incr("cert_parse.cache_hits")
+    if entry is None:
+        return None
+    result, private_key, error = entry
+    if result is not None:
+        result = dict(result)
+        if private_key is not None:
+            private_bytes = private_key.private_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption(),
+            )
+            result["private_key"] = base64.b64encode(private_bytes).decode("ascii")
+    return result, error
+
+
+def _cache_put(
+    key: _CacheKey, parsed: Tuple[Optional[Dict[str, Any]], Optional[str]]
+) -> None:
+    Metrics.incr("cert_parse.parsed")
+    result, error = parsed
+    private_key = None
+    if result is not None and result.get("private_key"):
+        private_key = serialization.load_der_private_key(
+            base64.b64decode(result["private_key"]), password=None
+        )
+        result = dict(result, private_key=None)
+    with _parse_cache_lock:
+        _parse_cache[key] = (result, private_key, error)
+        _parse_cache.move_to_end(key)
+        while len(_parse_cache) > _PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+
+
+def _parse_safely(
+    cert_path: str, password: Optional[str]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """解析证书，以 (结果, 错误信息) 形式返回，可在进程池中执行"""
+    try:
+        return parse_key_from_certificate(cert_path, password), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def parse_key_from_certificate_cached(
+    cert_path: str, password: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    带缓存的 parse_key_from_certificate：同一文件（路径、inode）的大小、修改时间及密码均未变化时直接返回上次结果。
+    缓存中的私钥为解析后的密钥对象，命中时重新编码为Base64
+
+    Raises:
+        ValueError: 当证书文件不存在、格式不支持或解析失败时
+    """
+    if not os.path.exists(cert_path):
+        raise ValueError(f"证书文件不存在: {cert_path}")
+    key = _cache_key(cert_path, password)
+    entry = _cache_get(key)
+    if entry is None:
+        entry = _parse_safely(cert_path, password)
+        _cache_put(key, entry)
+    result, error = entry
+    if error is not None:
+        raise ValueError(error)
+    assert result is not None
+    return result
+
+
+def parse_certificates_dir(
+    path: Optional[str] = None,
+    pwd: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    并行解析目录（含子目录）下的全部证书文件（.pfx/.p12/.cer/.pem）
+
+    Args:
+        path: 证书目录，为空时解析 Config.RSA_CERT_SAVE_PATH 及 Config.SM2_CERT_SAVE_PATH
+        pwd: PFX证书的密码（对目录中全部PFX文件使用同一密码）
+        max_workers: 解析进程数，默认为CPU核数
+
+    Returns:
+        Dict[str, Any]: 包含 message、stats（files/parsed/cached/failed）及 certificates
+            （每项包含 path、name、keyType、publicKey、privateKey、error）
+    """
+    roots = [path] if path else [Config.RSA_CERT_SAVE_PATH, Config.SM2_CERT_SAVE_PATH]
+    missing = [root for root in roots if not os.path.isdir(root)]
+    if path and missing:
+        return {"message": f"证书目录不存在: {path}", "stats": {}, "certificates": []}
+
+    files: List[str] = []
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            files.extend(
+                os.path.join(dirpath, name)
+                for name in filenames
+                if os.path.splitext(name)[1].lower() in CERT_EXTENSIONS
+            )
+    files.sort()
+
+    entries: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+    pending: List[Tuple[str, _CacheKey]] = []
+    cached = 0
+    for cert_path in files:
+        try:
+            key = _cache_key(cert_path, pwd)
+        except OSError as e:
+            entries[cert_path] = (None, f"读取证书文件失败: {str(e)}")
+            continue
+        entry = _cache_get(key)
+        if entry is not None:
+            entries[cert_path] = entry
+            cached += 1
+        else:
+            pending.append((cert_path, key))
+
+    if len(pending) > 1:
+        workers = min(len(pending), max_workers or os.cpu_count() or 1)
+        # 使用spawn启动子进程，避免fork复制父进程中的线程状态及内存中的密钥
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            parsed = list(
+                executor.map(
+                    _parse_safely,
+                    [cert_path for cert_path, _ in pending],
+                    [pwd] * len(pending),
+                )
+            )
+    else:
+        parsed = [_parse_safely(cert_path, pwd) for cert_path, _ in pending]
+    for (cert_path, key), entry in zip(pending, parsed):
+        _cache_put(key, entry)
+        entries[cert_path] = entry
+
+    certificates = []
+    for cert_path in files:
+        result, error = entries[cert_path]
+        certificates.append(
+            {
+                "path": cert_path,
+                "name": os.path.splitext(os.path.basename(cert_path))[0],
+                "keyType": result["key_type"] if result else None,
+                "publicKey": result["public_key"] if result else None,
+                "privateKey": result["private_key"] if result else None,
+                "error": error,
+            }
+        )
+    failed = sum(1 for cert in certificates if cert["error"])
+    return {
+        "message": f"共解析 {len(files)} 个证书文件，失败 {failed} 个",
+        "stats": {
+            "files": len(files),
+            "parsed": len(pending),
+            "cached": cached,
+            "failed": failed,
+        },
+        "certificates": certificates,
+    }
+
+
 def main() -> None:
     try:
         # 注意替换为你实际的PFX文件路径和密码
@@ -0,0 +1,193 @@
+"""
+证书到期监控
+功能：在服务进程的后台线程中定期增量扫描本地证书目录（基于证书清单，未变化的证书文件只比较
+大小及修改时间，不会重新解析），标记在预警天数内到期或已过期的证书，并上报为运行指标；
+线程在两次检查之间阻塞等待，空闲时不占用CPU，未配置检查间隔时不启动
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from tools.cert_inventory import get_cert_inventory
+from tools.config import Config
+from tools.metrics import Metrics
+
+
+def _days_left(not_after: Optional[str], now: float) -> Optional[float]:
+    if not_after is None:
+        return None
+    return round((datetime.fromisoformat(not_after).timestamp() - now) / 86400, 1)
+
+
+def check_cert_expiry(warn_days: float) -> Dict[str, Any]:
+    """
+    增量扫描证书目录，并查询在预警天数内到期（含已过期）的证书
+
+    Args:
+        warn_days: 预警天数
+
+    Returns:
+        Dict[str, Any]: 包含 message、checkedAt、warnDays、stats（files/updated/removed）、
+            expired、expiring 数量及 certificates 列表（按到期时间升序，每项附加 daysLeft）
+    """
+    inventory = get_cert_inventory()
+    stats = inventory.rescan()
+    now = time.time()
+    certificates = inventory.query(expiring_within=warn_days)
+    for certificate in certificates:
+        certificate["daysLeft"] = _days_left(certificate["notAfter"], now)
+    expired = sum(1 for certificate in certificates if certificate["expired"])
+
+    Metrics.incr("cert_monitor.checks")
+    Metrics.set("cert_monitor.expired", expired)
+    Metrics.set("cert_monitor.expiring", len(certificates) - expired)
+    Metrics.set("cert_monitor.last_check", now)
+    return {
+        "message": (
+            f"{len(certificates) - expired} 个证书将在 {warn_days:g} 天内到期，"
+            f"{expired} 个证书已过期"
+        ),
+        "checkedAt": datetime.fromtimestamp(now, timezone.utc).isoformat(
+            timespec="seconds"
+        ),
+        "warnDays": warn_days,
+        "stats": stats,
+        "expired": expired,
+        "expiring": len(certificates) - expired,
+        "certificates": certificates,
+    }
+
+
+class CertExpiryMonitor:
+    """
+    后台证书到期监控
+
+    Args:
+        interval: 检查间隔（秒）
+        warn_days: 预警天数，证书在该天数内到期时标记并输出告警
+    """
+
+    def __init__(self, interval: float, warn_days: float):
+        self.interval = interval
+        self.warn_days = warn_days
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last: Optional[Dict[str, Any]] = None
+        # 已输出过告警的证书（公钥证书路径），避免每次检查重复告警
+        self._warned: Set[str] = set()
+
+    def start(self) -> None:
+        """启动后台检查线程（幂等）"""
+        with self._lock:
+            if self._thread is not None or self.interval <= 0:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="yop-cert-monitor", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """停止后台检查线程"""
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def check(self) -> Dict[str, Any]:
+        """立即执行一次检查，并保存为最近一次检查结果"""
+        result = check_cert_expiry(self.warn_days)
+        with self._lock:
+            self._warn(result["certificates"])
+            self._last = result
+        return result
+
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        """返回最近一次检查结果，尚未检查时返回None"""
+        with self._lock:
+            return self._last
+
+    def _warn(self, certificates: List[Dict[str, Any]]) -> None:
+        current = {certificate["pubCert"] for certificate in certificates}
+        for certificate in certificates:
+            if certificate["pubCert"] in self._warned:
+                continue
+            state = "已过期" if certificate["expired"] else "即将到期"
+            # 告警写入stderr：stdio传输模式下stdout为JSON-RPC消息流
+            print(
+                f"证书{state}：{certificate['serialNo']}（{certificate['algorithm']}），"
+                f"到期时间 {certificate['notAfter']}，请及时更新证书",
+                file=sys.stderr,
+            )
+        # 证书更新或删除后移出告警集合，再次进入预警期时重新告警
+        self._warned = current
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except (OSError, sqlite3.Error) as e:
+                Metrics.incr("cert_monitor.errors")
+                print(f"证书到期检查失败：{str(e)}", file=sys.stderr)
+            self._stop.wait(self.interval)
+
+
+_default_monitor: Optional[CertExpiryMonitor] = None
+_default_lock = threading.Lock()
+
+
+def get_cert_monitor() -> Optional[CertExpiryMonitor]:
+    """
+    获取按 Config.CERT_MONITOR_INTERVAL 配置的默认证书监控（首次调用时启动），
+    未启用时返回None
+    """
+    global _default_monitor  # pylint: disable=global-statement
+    if Config.CERT_MONITOR_INTERVAL <= 0:
+        return None
+    with _default_lock:
+        if _default_monitor is None:
+            _default_monitor = CertExpiryMonitor(
+                Config.CERT_MONITOR_INTERVAL, Config.CERT_EXPIRY_WARN_DAYS
+            )
+            _default_monitor.start()
+        return _default_monitor
+
+
+def cert_expiry_status(
+    warn_days: Optional[float] = None, refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    查询证书到期状态：后台监控已启用且未指定预警天数、未要求刷新时直接返回最近一次检查结果，
+    否则立即执行一次增量检查
+
+    Args:
+        warn_days: 预警天数，为None时使用 Config.CERT_EXPIRY_WARN_DAYS
+        refresh: 是否忽略最近一次检查结果，立即重新检查
+
+    Returns:
+        Dict[str, Any]: 检查结果，另包含 monitor（后台监控是否启用）
+    """
+    monitor = get_cert_monitor()
+    try:
+        if monitor is not None and (
+            warn_days is None or warn_days == monitor.warn_days
+        ):
+            result = None if refresh else monitor.last_result()
+            if result is None:
+                result = monitor.check()
+        else:
+            result = check_cert_expiry(
+                Config.CERT_EXPIRY_WARN_DAYS if warn_days is None else warn_days
+            )
+    except (OSError, sqlite3.Error) as e:
+        return {
+            "message": f"证书到期检查失败: {str(e)}",
+            "monitor": monitor is not None,
+        }
+    return {**result, "monitor": monitor is not None}
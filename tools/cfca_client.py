@@ -0,0 +1,332 @@
+"""
+CFCA证书下载客户端
+功能：通过持久的异步HTTP/2连接调用CFCA证书下载接口，Basic认证请求头在创建客户端时构建一次；
+失败按可重试（网络错误、超时、429/5xx）与不可重试（认证失败、业务错误等）分类，
+可重试的失败以指数退避重发完全相同的请求。同一证书序列号的并发请求合并为一次，
+已成功下载的证书按（序列号、证书请求）缓存，重复调用不会再次激活证书。
+httpx 的连接绑定在创建它的事件循环上，因此每个事件循环使用各自的连接池及在途请求表；
+服务进程只有一个事件循环，全部工具调用共用同一连接池
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from tools.config import Config
+from tools.metrics import Metrics
+
+# 可重试的HTTP状态码：请求超时、限流及服务端错误
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+SUCCESS_CODE = "000000"
+_COMPLETED_CACHE_SIZE = 256
+
+
+class CertDownloadResult:
+    def __init__(self, error_msg: Optional[str] = None):
+        self.cert: Optional[str] = None
+        self.error_msg = error_msg
+
+    def with_cert(self, cert: str) -> "CertDownloadResult":
+        self.cert = cert
+        return self
+
+    def with_error_msg(self, error_msg: str) -> "CertDownloadResult":
+        self.error_msg = error_msg
+        return self
+
+
+class _LoopState:
+    """绑定在单个事件循环上的HTTP客户端及在途请求（序列号 -> (证书请求摘要, 请求任务)）"""
+
+    __slots__ = ("http", "inflight")
+
+    def __init__(self, http: httpx.AsyncClient):
+        self.http = http
+        self.inflight: Dict[str, Tuple[str, "asyncio.Task[str]"]] = {}
+
+
+class CfcaError(Exception):
+    """
+    CFCA证书下载失败
+
+    Args:
+        message: 错误信息
+        retryable: 是否可以重试（重试不会产生副作用且可能成功）
+        retry_after: 服务端要求的重试等待时间（秒）
+        code: CFCA接口返回的业务错误码（业务失败时）
+    """
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+        code: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.code = code
+
+
+def basic_auth_header(credentials: str) -> Dict[str, str]:
+    """构建Basic认证请求头"""
+    return {
+        "Authorization": "Basic "
+        + base64.b64encode(credentials.encode("utf-8")).decode("utf-8")
+    }
+
+
+def download_params(serial_no: str, auth_code: str, cert_req: str) -> Dict[str, str]:
+    """CFCA证书下载接口的请求参数"""
+    return {
+        "serialNo": serial_no,
+        "authCode": auth_code,
+        "certReq": cert_req,
+        "toolsVersion": Config.TOOLS_VERSION,
+    }
+
+
+def parse_download_response(text: str) -> str:
+    """
+    解析CFCA证书下载接口的响应，返回PEM格式的证书
+
+    Raises:
+        CfcaError: 响应格式错误或业务失败（不可重试）
+    """
+    try:
+        payload = json.loads(text)
+    except ValueError as e:
+        raise CfcaError(f"CFCA响应格式错误: {str(e)}") from e
+    if not isinstance(payload, dict):
+        raise CfcaError("CFCA响应格式错误")
+    if payload.get("code") != SUCCESS_CODE:
+        code = str(payload.get("code"))
+        raise CfcaError(str(payload.get("message") or f"错误码 {code}"), code=code)
+    cert = (payload.get("data") or {}).get("cert")
+    if not cert:
+        raise CfcaError("CFCA响应中缺少证书")
+    return "-----BEGIN CERTIFICATE-----\n" + cert + "\n-----END CERTIFICATE-----"
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After", "")
+    try:
+        return max(float(value), 0.0) if value else None
+    except ValueError:
+        return None
+
+
+class CfcaClient:
+    """
+    CFCA证书下载接口的异步客户端
+
+    Args:
+        host: 接口主机地址，默认为 Config.HOST
+        max_retries: 可重试失败的最大重试次数
+        backoff: 首次重试的退避时间（秒），之后逐次翻倍
+        timeout: 单次请求超时时间（秒）
+        max_connections: 最大连接数
+        transport: 自定义HTTP传输层（用于测试）
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        host: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        timeout: float = 30,
+        max_connections: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.host = host or Config.HOST
+        self.max_retries = (
+            Config.CFCA_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.backoff = Config.CFCA_RETRY_BACKOFF if backoff is None else backoff
+        self.timeout = timeout
+        self.max_connections = max(
+            max_connections or Config.CFCA_DOWNLOAD_CONCURRENCY, 1
+        )
+        self.transport = transport
+        # 认证请求头只构建一次
+        self.headers = basic_auth_header(Config.BASIC)
+        # 事件循环 -> 该循环上的客户端及在途请求；事件循环被回收时对应条目自动删除
+        self._states: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]"
+        ) = weakref.WeakKeyDictionary()
+        self._states_lock = threading.Lock()
+        self._completed: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    async def __aenter__(self) -> "CfcaClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的连接"""
+        with self._states_lock:
+            state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.http.aclose()
+
+    def _state(self) -> _LoopState:
+        """获取当前事件循环上的客户端及在途请求，首次使用时创建"""
+        loop = asyncio.get_running_loop()
+        with self._states_lock:
+            state = self._states.get(loop)
+            if state is None:
+                # 已关闭的事件循环上的连接无法再异步关闭，连同其在途请求一并丢弃
+                for closed in [other for other in self._states if other.is_closed()]:
+                    del self._states[closed]
+                    Metrics.incr("cfca.clients_discarded")
+                state = _LoopState(
+                    httpx.AsyncClient(
+                        base_url=self.host,
+                        http2=True,
+                        headers=self.headers,
+                        timeout=self.timeout,
+                        limits=httpx.Limits(max_connections=self.max_connections),
+                        transport=self.transport,
+                    )
+                )
+                self._states[loop] = state
+                Metrics.incr("cfca.clients_created")
+            return state
+
+    def _client(self) -> httpx.AsyncClient:
+        return self._state().http
+
+    async def _request_once(self, params: Dict[str, str]) -> str:
+        Metrics.incr("cfca.requests")
+        try:
+            response = await self._client().get(
+                Config.CFCA_CERT_DOWNLOAD_PATH, params=params
+            )
+        except httpx.TransportError as e:
+            # 连接失败、超时及协议错误
+            raise CfcaError(
+                f"HTTP请求失败: {str(e) or type(e).__name__}", retryable=True
+            ) from e
+        if response.status_code in RETRYABLE_STATUS:
+            raise CfcaError(
+                f"HTTP请求失败: HTTP {response.status_code}",
+                retryable=True,
+                retry_after=_retry_after(response),
+            )
+        if response.is_error:
+            raise CfcaError(f"HTTP请求失败: HTTP {response.status_code}")
+        return parse_download_response(response.text)
+
+    async def _request(self, params: Dict[str, str]) -> str:
+        attempt = 0
+        while True:
+            try:
+                return await self._request_once(params)
+            except CfcaError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    Metrics.incr(
+                        "cfca.errors.retryable"
+                        if e.retryable
+                        else "cfca.errors.terminal"
+                    )
+                    raise
+                delay = e.retry_after
+                if delay is None:
+                    # 指数退避并加入抖动，避免批量下载时同时重试
+                    jitter = random.uniform(0.5, 1)  # nosec B311
+                    delay = self.backoff * (2**attempt) * jitter
+                attempt += 1
+                Metrics.incr("cfca.retries")
+                await asyncio.sleep(delay)
+
+    async def fetch(self, serial_no: str, auth_code: str, cert_req: str) -> str:
+        """
+        下载证书，返回PEM格式的证书
+
+        同一序列号只会有一个请求在途，重试时重发相同的证书请求；已成功下载的证书直接返回缓存结果
+
+        Raises:
+            CfcaError: 下载失败（已用完重试次数或不可重试）
+        """
+        req_digest = hashlib.sha256(cert_req.encode("utf-8")).hexdigest()
+        cached = self._completed.get((serial_no, req_digest))
+        if cached is not None:
+            Metrics.incr("cfca.completed_hits")
+            return cached
+
+        inflight_requests = self._state().inflight
+        inflight = inflight_requests.get(serial_no)
+        if inflight is not None:
+            if inflight[0] != req_digest:
+                raise CfcaError(
+                    f"证书 {serial_no} 正在使用其他证书请求下载，请稍后重试"
+                )
+            Metrics.incr("cfca.coalesced")
+            return await asyncio.shield(inflight[1])
+
+        task = asyncio.ensure_future(
+            self._request(download_params(serial_no, auth_code, cert_req))
+        )
+        inflight_requests[serial_no] = (req_digest, task)
+        try:
+            cert = await asyncio.shield(task)
+        finally:
+            if inflight_requests.get(serial_no, (None, None))[1] is task:
+                del inflight_requests[serial_no]
+        self._completed[(serial_no, req_digest)] = cert
+        while len(self._completed) > _COMPLETED_CACHE_SIZE:
+            self._completed.popitem(last=False)
+        return cert
+
+    async def download(
+        self, serial_no: str, auth_code: str, cert_req: str
+    ) -> CertDownloadResult:
+        """下载证书，失败时返回包含错误信息的结果而不抛出异常"""
+        try:
+            return CertDownloadResult().with_cert(
+                await self.fetch(serial_no, auth_code, cert_req)
+            )
+        except CfcaError as e:
+            # CFCA业务错误直接返回接口的错误信息
+            message = str(e) if e.code else f"下载证书失败: {str(e)}"
+            return CertDownloadResult(error_msg=message)
+
+
+_default_client: Optional[CfcaClient] = None
+_default_lock = threading.Lock()
+
+
+def get_cfca_client() -> CfcaClient:
+    """获取服务进程共享的默认CFCA客户端"""
+    global _default_client  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_client is None:
+            _default_client = CfcaClient()
+        return _default_client
+
+
+def download_cert_sync(
+    serial_no: str, auth_code: str, cert_req: str
+) -> CertDownloadResult:
+    """
+    在没有事件循环的线程/进程中下载证书（同样按错误类型重试）
+
+    每次调用在新的事件循环中创建并关闭独立的客户端，不复用连接，也不与其他调用合并在途请求；
+    服务进程内的下载应使用 get_cfca_client() 返回的共享客户端
+    """
+
+    async def _download() -> CertDownloadResult:
+        async with CfcaClient() as client:
+            return await client.download(serial_no, auth_code, cert_req)
+
+    return asyncio.run(_download())
@@ -0,0 +1,140 @@
+"""
+压缩编解码工具
+功能：统一管理 gzip / brotli / zstd 编解码器，用于HTTP内容协商（Accept-Encoding）、
+流式解压下载内容，以及本地缓存内容的压缩存储
+"""
+
+import gzip
+import zlib
+from typing import Any, Callable, List, Optional
+
+try:  # brotli 为可选依赖，兼容 brotli 与 brotlicffi 两种实现
+    import brotli
+except ImportError:  # pragma: no cover - 取决于运行环境
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:  # zstd 为可选依赖
+    import zstandard
+except ImportError:  # pragma: no cover - 取决于运行环境
+    zstandard = None
+
+
+# 内容协商时的编码优先级（从高到低）
+_PREFERENCE = ["zstd", "br", "gzip"]
+
+
+def available_encodings() -> List[str]:
+    """返回当前环境可用的压缩编码，按优先级排序"""
+    encodings = []
+    for encoding in _PREFERENCE:
+        if encoding == "zstd" and zstandard is None:
+            continue
+        if encoding == "br" and brotli is None:
+            continue
+        encodings.append(encoding)
+    return encodings
+
+
+def accept_encoding() -> str:
+    """生成Accept-Encoding请求头的值，按优先级附带q值"""
+    parts = []
+    for index, encoding in enumerate(available_encodings()):
+        quality = round(1.0 - index * 0.1, 1)
+        parts.append(encoding if quality == 1.0 else f"{encoding};q={quality}")
+    return ", ".join(parts)
+
+
+def storage_encoding() -> str:
+    """返回本地缓存落盘时使用的压缩编码（优先zstd，否则gzip）"""
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    按指定编码压缩数据
+
+    Args:
+        data: 原始数据
+        encoding: 压缩编码，可选值为 "zstd"、"br"、"gzip" 或 "identity"
+
+    Returns:
+        bytes: 压缩后的数据
+    """
+    encoding = encoding.lower()
+    if encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.compress(data)
+    if encoding == "br" and brotli is not None:
+        result: bytes = brotli.compress(data)
+        return result
+    if encoding == "zstd" and zstandard is not None:
+        return bytes(zstandard.ZstdCompressor(level=10).compress(data))
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """按指定编码一次性解压数据"""
+    decoder = StreamDecoder(encoding)
+    return decoder.decompress(data) + decoder.flush()
+
+
+class _SingleDecoder:
+    """单一编码的增量解压器"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._flush: Callable[[], bytes] = lambda: b""
+        if encoding == "identity":
+            self._decompress: Callable[[bytes], bytes] = lambda chunk: chunk
+        elif encoding in ("gzip", "x-gzip"):
+            gzip_obj = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            self._decompress = gzip_obj.decompress
+            self._flush = gzip_obj.flush
+        elif encoding == "br" and brotli is not None:
+            br_obj: Any = brotli.Decompressor()
+            # brotlicffi 提供 decompress，brotli 提供 process
+            if hasattr(br_obj, "decompress"):
+                self._decompress = br_obj.decompress
+            else:
+                self._decompress = br_obj.process
+        elif encoding == "zstd" and zstandard is not None:
+            self._decompress = zstandard.ZstdDecompressor().decompressobj().decompress
+        else:
+            raise ValueError(f"不支持的压缩编码: {encoding}")
+
+    def decompress(self, chunk: bytes) -> bytes:
+        return self._decompress(chunk) if chunk else b""
+
+    def flush(self) -> bytes:
+        return self._flush()
+
+
+class StreamDecoder:
+    """
+    流式解压器，支持按 Content-Encoding 声明的多重编码逐块解压
+
+    Content-Encoding 按施加顺序列出编码，解压时需按相反顺序处理
+    """
+
+    def __init__(self, content_encoding: Optional[str] = None):
+        encodings = [
+            value.strip().lower()
+            for value in (content_encoding or "").split(",")
+            if value.strip()
+        ]
+        self._decoders = [_SingleDecoder(encoding) for encoding in reversed(encodings)]
+
+    def decompress(self, chunk: bytes) -> bytes:
+        for decoder in self._decoders:
+            chunk = decoder.decompress(chunk)
+        return chunk
+
+    def flush(self) -> bytes:
+        data = b""
+        for decoder in self._decoders:
+            data = decoder.decompress(data) + decoder.flush()
+        return data
@@ -5,18 +5,75 @@ class Config:
     # 证书保存路径
     RSA_CERT_SAVE_PATH = "./certs/rsa/"
     SM2_CERT_SAVE_PATH = "./certs/sm2/"
+    # 密钥文件保存路径
+    KEY_SAVE_PATH = "./keys/"
+    # 加密密钥库文件及解锁口令（设置口令时服务启动后首次使用自动解锁）
+    KEYSTORE_PATH = os.environ.get("YOP_MCP_KEYSTORE_PATH", "./keys/keystore.json")
+    KEYSTORE_PASSWORD = os.environ.get("YOP_MCP_KEYSTORE_PASSWORD", "")
+    # 密钥/证书指纹索引文件
+    FINGERPRINT_INDEX_PATH = "./cache/fingerprint_index.json"
+    # 本地证书清单数据库
+    CERT_INVENTORY_PATH = "./cache/cert_inventory.sqlite3"
+    # 证书到期监控：后台检查间隔（秒，0表示不启用）及预警天数
+    CERT_MONITOR_INTERVAL = float(os.environ.get("YOP_MCP_CERT_MONITOR_INTERVAL", "0"))
+    CERT_EXPIRY_WARN_DAYS = float(os.environ.get("YOP_MCP_CERT_EXPIRY_DAYS", "30"))
 
     # API主机地址
     HOST = "https://mp.yeepay.com"
 
     # CFCA API相关配置
-    CFCA_CERT_DOWNLOAD_URL = HOST + "/yop-developer-center/apis/cfca/cert/download"
+    CFCA_CERT_DOWNLOAD_PATH = "/yop-developer-center/apis/cfca/cert/download"
+    CFCA_CERT_DOWNLOAD_URL = HOST + CFCA_CERT_DOWNLOAD_PATH
     BASIC = "keytools:keytools"
     TOOLS_VERSION = "mcp"
+    # 批量下载证书时CFCA接口的最大并发请求数及状态文件（用于断点续传）
+    CFCA_DOWNLOAD_CONCURRENCY = int(os.environ.get("YOP_MCP_CFCA_CONCURRENCY", "8"))
+    CERT_BATCH_STATE_PATH = "./certs/batch_state.json"
+    # CFCA接口可重试失败（网络错误、超时、429/5xx）的最大重试次数及首次退避时间（秒）
+    CFCA_MAX_RETRIES = int(os.environ.get("YOP_MCP_CFCA_RETRIES", "3"))
+    CFCA_RETRY_BACKOFF = float(os.environ.get("YOP_MCP_CFCA_RETRY_BACKOFF", "0.5"))
 
     # QA环境配置
     QA_HOST_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
 
+    # YOP平台证书（用于回调通知验签）；仓库不附带该证书，需从易宝开放平台下载后
+    # 放到默认路径，或通过 YOP_MCP_PLATFORM_CERT 指定
+    YOP_PLATFORM_CERT_PATH = os.environ.get(
+        "YOP_MCP_PLATFORM_CERT",
+        os.path.join(QA_HOST_PATH, "yop_platform_rsa_cert_rsa.cer"),
+    )
+
+    # 服务启动时预加载密钥/证书相关资源（CFCA证书链等），设置为0时关闭
+    CRYPTO_PRELOAD = os.environ.get("YOP_MCP_CRYPTO_PRELOAD", "1") != "0"
+
+    # CPU密集型工具的执行器：类型(thread/process)、工作线程/进程数（0表示CPU核数）、
+    # 排队任务数上限及超时时间（秒，0表示不限制）。默认使用线程池，以便复用服务进程中的密钥、
+    # 证书链及证书请求等缓存；进程池中的缓存与指标只存在于各子进程
+    EXECUTOR_KIND = os.environ.get("YOP_MCP_EXECUTOR", "thread")
+    EXECUTOR_WORKERS = int(os.environ.get("YOP_MCP_EXECUTOR_WORKERS", "0"))
+    EXECUTOR_MAX_QUEUE = int(os.environ.get("YOP_MCP_EXECUTOR_MAX_QUEUE", "32"))
+    EXECUTOR_TIMEOUT = float(os.environ.get("YOP_MCP_EXECUTOR_TIMEOUT", "120"))
+
+    # RSA密钥预生成池容量（0表示不启用）及低水位
+    KEY_POOL_SIZE = int(os.environ.get("YOP_MCP_KEY_POOL_SIZE", "0"))
+    KEY_POOL_LOW_WATER = int(
+        os.environ.get("YOP_MCP_KEY_POOL_LOW_WATER", str(KEY_POOL_SIZE // 2))
+    )
+
+    # 已解析密钥对象的LRU缓存容量
+    KEY_CACHE_SIZE = int(os.environ.get("YOP_MCP_KEY_CACHE_SIZE", "64"))
+
+    # 产品目录树（API列表及 historyCount 等信息）
+    PRODUCT_TREE_PATH = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "docs", "docking-product-tree.json"
+    )
+
+    # 文档缓存配置，未设置缓存目录时不启用本地缓存
+    DOC_CACHE_PATH = os.environ.get("YOP_MCP_DOC_CACHE_PATH", "")
+    DOC_CACHE_MAX_BYTES = int(
+        os.environ.get("YOP_MCP_DOC_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+
     @classmethod
     def get_cert_path(cls, algorithm: str) -> str:
         """获取证书保存路径"""
@@ -0,0 +1,227 @@
+"""
+文档变更检测工具
+功能：基于文档缓存中的哈希清单，增量校验已获取的文档是否有更新，返回变更文档及其unified diff。
+已记录ETag/Last-Modified的文档使用条件请求（未变更时服务端返回304，不下载内容）；
+API文档同时参考 docs/docking-product-tree.json 中的 historyCount 作为变更提示
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from tools.doc_store import DocStore, get_doc_store
+from tools.http_utils import HttpUtils
+from tools.metrics import Metrics
+from tools.product_tree import api_doc_id, get_product_tree
+
+CHANGES_NAME = "changes.json"
+MAX_CHANGE_RECORDS = 500
+MAX_DIFF_LINES = 400
+
+_changes_lock = threading.Lock()
+
+
+def load_history_hints() -> Dict[str, int]:
+    """
+    从产品目录树中读取各API的 historyCount，作为文档是否有更新的廉价提示
+
+    Returns:
+        Dict[str, int]: API文档标识到 historyCount 的映射
+    """
+    return get_product_tree().history_hints()
+
+
+def parse_since(since: str) -> Optional[float]:
+    """解析起始时间，支持ISO 8601格式（如 2025-07-01、2025-07-01T08:00:00）及Unix时间戳"""
+    since = since.strip()
+    if not since:
+        return None
+    if re.fullmatch(r"\d+(\.\d+)?", since):
+        return float(since)
+    return datetime.fromisoformat(since).timestamp()
+
+
+def unified_diff(old: str, new: str, url: str, max_lines: int = MAX_DIFF_LINES) -> str:
+    """生成新旧文档的unified diff，超过行数上限时截断"""
+    lines = list(
+        difflib.unified_diff(
+            old.splitlines(keepends=True),
+            new.splitlines(keepends=True),
+            fromfile=f"a/{url}",
+            tofile=f"b/{url}",
+        )
+    )
+    if len(lines) > max_lines:
+        omitted = len(lines) - max_lines
+        lines = lines[:max_lines] + [f"\n... 省略 {omitted} 行差异\n"]
+    return "".join(lines)
+
+
+class DocChangeTracker:
+    """维护文档变更记录，并对文档缓存中的文档做增量校验"""
+
+    def __init__(
+        self,
+        store: DocStore,
+        fetch: Callable[..., Dict[str, Any]] = HttpUtils.revalidate,
+        hints: Optional[Dict[str, int]] = None,
+        max_workers: int = 8,
+    ):
+        self.store = store
+        self.fetch = fetch
+        self.hints = load_history_hints() if hints is None else hints
+        self.max_workers = max_workers
+
+    def check(self) -> Dict[str, int]:
+        """
+        校验文档缓存中全部文档，发现变更时更新缓存并写入变更记录
+
+        Returns:
+            Dict[str, int]: 本次校验的统计信息
+        """
+        urls = [url for url in self.store.urls() if url.startswith("http")]
+        stats = {
+            "checked": 0,
+            "notModified": 0,
+            "skipped": 0,
+            "changed": 0,
+            "failed": 0,
+        }
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for outcome in executor.map(self._check_one, urls):
+                stats[outcome] += 1
+                if outcome != "skipped":
+                    stats["checked"] += 1
+        return stats
+
+    def changes_since(self, since: Optional[float]) -> List[Dict[str, Any]]:
+        """返回指定时间之后检测到的文档变更及其diff"""
+        result = []
+        for record in self._load_changes():
+            if since is not None and record["detected_at"] < since:
+                continue
+            new = self.store.get_by_hash(record["new_hash"])
+            old = self.store.get_derived("previous", record["old_hash"])
+            result.append(
+                {
+                    "url": record["url"],
+                    "detectedAt": datetime.fromtimestamp(
+                        record["detected_at"]
+                    ).isoformat(timespec="seconds"),
+                    "oldHash": record["old_hash"],
+                    "newHash": record["new_hash"],
+                    "diff": (
+                        unified_diff(old, new, record["url"])
+                        if old is not None and new is not None
+                        else "历史版本已被淘汰，无法生成diff"
+                    ),
+                }
+            )
+        return result
+
+    def _check_one(self, url: str) -> str:
+        entry = self.store.entry(url)
+        if entry is None:
+            return "skipped"
+        doc_id = api_doc_id(url)
+        hint = self.hints.get(doc_id) if doc_id else None
+        recorded = entry.get("history_count")
+        # historyCount 变化说明文档确有更新，不使用校验信息直接重新获取；未变化时不能据此认定文档
+        # 未更新（产品目录树随版本发布，不会实时更新），仍以条件请求或内容哈希比较为准
+        hint_changed = hint is not None and recorded is not None and recorded != hint
+        etag = entry.get("etag")
+        last_modified = entry.get("last_modified")
+        if hint_changed:
+            etag = last_modified = None
+        response = self.fetch(url, etag=etag, last_modified=last_modified)
+        Metrics.incr("doc_changes.requests")
+        if response["error"]:
+            return "failed"
+        if response["status"] == 304 or response["content"] is None:
+            if hint is not None and recorded != hint:
+                self.store.update_entry(url, history_count=hint)
+            return "notModified"
+
+        Metrics.incr("doc_changes.downloads")
+        content = response["content"]
+        meta = dict(response["validators"])
+        if hint is not None:
+            meta["history_count"] = hint
+        old_hash = entry["hash"]
+        old_content = self.store.get_by_hash(old_hash)
+        new_hash = self.store.put(url, content, **meta)
+        if new_hash == old_hash:
+            return "notModified"
+
+        if old_content is not None:
+            # 以旧版本自身的哈希为键：文档改回旧内容时不会覆盖其他变更记录的旧版本
+            self.store.put_derived("previous", old_hash, old_content)
+        self._append_change(
+            {
+                "url": url,
+                "old_hash": old_hash,
+                "new_hash": new_hash,
+                "detected_at": time.time(),
+            }
+        )
+        return "changed"
+
+    def _changes_path(self) -> str:
+        return os.path.join(self.store.root, CHANGES_NAME)
+
+    def _load_changes(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self._changes_path(), "r", encoding="utf-8") as f:
+                records: List[Dict[str, Any]] = json.load(f)
+                return records
+        except (OSError, ValueError):
+            return []
+
+    def _append_change(self, record: Dict[str, Any]) -> None:
+        with _changes_lock:
+            records = self._load_changes()
+            records.append(record)
+            records = records[-MAX_CHANGE_RECORDS:]
+            tmp_path = self._changes_path() + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False)
+            os.replace(tmp_path, self._changes_path())
+
+
+def doc_changes(since: str = "") -> Dict[str, Any]:
+    """
+    增量校验已缓存的文档并返回变更
+
+    Args:
+        since: 起始时间（ISO 8601或Unix时间戳），为空时仅返回本次校验发现的变更
+
+    Returns:
+        Dict[str, Any]: 包含 message、stats（校验统计）、changes（变更列表，含diff）
+    """
+    store = get_doc_store()
+    if store is None:
+        return {
+            "message": "未启用文档缓存，请设置环境变量 YOP_MCP_DOC_CACHE_PATH",
+            "stats": {},
+            "changes": [],
+        }
+    try:
+        since_ts = parse_since(since)
+    except ValueError:
+        return {"message": f"无法解析的时间: {since}", "stats": {}, "changes": []}
+
+    started_at = time.time()
+    tracker = DocChangeTracker(store)
+    stats = tracker.check()
+    changes = tracker.changes_since(started_at if since_ts is None else since_ts)
+    return {
+        "message": f"已校验 {stats['checked']} 个文档，发现 {len(changes)} 处变更",
+        "stats": stats,
+        "changes": changes,
+    }
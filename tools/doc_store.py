@@ -0,0 +1,417 @@
+"""
+文档缓存存储
+功能：以内容的SHA-256为键、压缩后落盘保存已获取的文档；通过 URL→哈希 清单使不同URL形式
+获取到的相同内容共享同一份存储，并按总字节上限进行LRU淘汰；清单写入按时间间隔合并，
+进程退出时写入尚未落盘的修改
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Set
+
+from tools import compression
+from tools.config import Config
+from tools.metrics import Metrics
+
+MANIFEST_NAME = "manifest.json"
+OBJECTS_DIR = "objects"
+# 两次清单写入的最短间隔（秒），间隔内的修改合并为一次写入
+MANIFEST_SAVE_INTERVAL = 1.0
+
+_open_stores: "weakref.WeakSet[DocStore]" = weakref.WeakSet()
+
+
+def content_hash(content: str) -> str:
+    """计算文档内容的SHA-256十六进制摘要"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class DocStore:
+    """
+    内容寻址的压缩文档存储
+
+    目录结构:
+        <root>/manifest.json            URL→哈希清单及对象元数据
+        <root>/objects/<前2位>/<哈希>    压缩后的文档内容
+    """
+
+    def __init__(self, root: str, max_bytes: int = Config.DOC_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._urls: Dict[str, Dict[str, Any]] = {}
+        self._objects: Dict[str, Dict[str, Any]] = {}
+        self._derived: Dict[str, str] = {}
+        # 对象哈希 -> 引用该对象的URL及派生内容键，淘汰时无需扫描全部清单
+        self._url_refs: Dict[str, Set[str]] = {}
+        self._derived_refs: Dict[str, Set[str]] = {}
+        self._stored_total = 0
+        self._saved_at: Optional[float] = None
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._load_manifest()
+        _open_stores.add(self)
+
+    # ------------------------------------------------------------------ 读写
+    def put(self, url: str, content: str, **meta: Any) -> str:
+        """
+        保存文档内容，并记录URL到内容哈希的映射
+
+        Args:
+            url: 文档URL
+            content: 文档内容
+            **meta: 需要随URL一起记录的附加元数据
+
+        Returns:
+            str: 文档内容的SHA-256摘要
+        """
+        with self._lock:
+            digest = self._store_object(content)
+            entry = dict(self._urls.get(url, {}))
+            entry.update(meta)
+            if "hash" in entry:
+                self._unref(self._url_refs, entry["hash"], url)
+            entry.update({"hash": digest, "fetched_at": time.time()})
+            self._urls[url] = entry
+            self._url_refs.setdefault(digest, set()).add(url)
+            self._evict()
+            self._save_manifest()
+        return digest
+
+    def update_entry(self, url: str, **meta: Any) -> None:
+        """更新URL对应清单记录的附加元数据（如校验信息），URL不存在时忽略"""
+        with self._lock:
+            if url in self._urls:
+                self._urls[url].update(meta)
+                self._save_manifest()
+
+    def put_derived(self, kind: str, source_hash: str, content: str) -> str:
+        """
+        保存由某份源文档派生的内容（如HTML转换后的markdown），以源文档哈希为键
+
+        Args:
+            kind: 派生内容类型，如 "markdown"
+            source_hash: 源文档内容的SHA-256摘要
+            content: 派生内容
+
+        Returns:
+            str: 派生内容的SHA-256摘要
+        """
+        with self._lock:
+            digest = self._store_object(content)
+            key = f"{kind}:{source_hash}"
+            if key in self._derived:
+                self._unref(self._derived_refs, self._derived[key], key)
+            self._derived[key] = digest
+            self._derived_refs.setdefault(digest, set()).add(key)
+            self._evict()
+            self._save_manifest()
+        return digest
+
+    def get_derived(self, kind: str, source_hash: str) -> Optional[str]:
+        """按源文档哈希读取派生内容，不存在时返回None"""
+        with self._lock:
+            digest = self._derived.get(f"{kind}:{source_hash}")
+            return self.get_by_hash(digest) if digest is not None else None
+
+    def _store_object(self, content: str) -> str:
+        """压缩并写入内容对象（已存在时仅刷新访问时间），返回内容哈希"""
+        digest = content_hash(content)
+        if digest in self._objects:
+            self._objects[digest]["last_access"] = time.time()
+            Metrics.incr("doc_store.dedup_hits")
+            return digest
+        raw = content.encode("utf-8")
+        encoding = compression.storage_encoding()
+        stored = compression.compress(raw, encoding)
+        if len(stored) > self.max_bytes:
+            return digest
+        self._write_atomic(self._object_path(digest), stored)
+        self._objects[digest] = {
+            "size": len(raw),
+            "stored": len(stored),
+            "encoding": encoding,
+            "last_access": time.time(),
+        }
+        self._stored_total += len(stored)
+        Metrics.incr("doc_store.bytes_raw", len(raw))
+        Metrics.incr("doc_store.bytes_stored", len(stored))
+        return digest
+
+    def get(self, url: str) -> Optional[str]:
+        """按URL读取缓存的文档内容，不存在时返回None"""
+        with self._lock:
+            entry = self._urls.get(url)
+            if entry is None:
+                Metrics.incr("doc_store.misses")
+                return None
+            content = self.get_by_hash(entry["hash"])
+            Metrics.incr(
+                "doc_store.hits" if content is not None else "doc_store.misses"
+            )
+            return content
+
+    def get_by_hash(self, digest: str) -> Optional[str]:
+        """按内容哈希读取文档内容，不存在时返回None"""
+        with self._lock:
+            obj = self._objects.get(digest)
+            if obj is None:
+                return None
+            try:
+                with open(self._object_path(digest), "rb") as f:
+                    data = compression.decompress(f.read(), obj["encoding"])
+            except (OSError, ValueError):
+                return None
+            obj["last_access"] = time.time()
+            return data.decode("utf-8")
+
+    def entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """获取URL对应的清单记录（哈希、获取时间及附加元数据）"""
+        with self._lock:
+            entry = self._urls.get(url)
+            return dict(entry) if entry is not None else None
+
+    def urls(self) -> List[str]:
+        """返回清单中记录的全部URL"""
+        with self._lock:
+            return list(self._urls)
+
+    def stats(self) -> Dict[str, int]:
+        """返回存储统计信息"""
+        with self._lock:
+            return {
+                "urls": len(self._urls),
+                "objects": len(self._objects),
+                "derived": len(self._derived),
+                "rawBytes": sum(o["size"] for o in self._objects.values()),
+                "storedBytes": self._stored_bytes(),
+                "maxBytes": self.max_bytes,
+            }
+
+    # ------------------------------------------------------------------ 维护
+    def compact(self) -> Dict[str, int]:
+        """
+        整理存储：删除未被引用的对象、清单外的孤立文件及指向缺失对象的URL，
+        并将非当前落盘编码的对象重新压缩
+
+        Returns:
+            Dict[str, int]: 整理结果统计
+        """
+        removed_objects = 0
+        removed_urls = 0
+        removed_files = 0
+        recompressed = 0
+        with self._lock:
+            referenced = {entry["hash"] for entry in self._urls.values()}
+            referenced.update(self._derived.values())
+            for digest in list(self._objects):
+                if digest not in referenced or not os.path.exists(
+                    self._object_path(digest)
+                ):
+                    self._remove_object(digest)
+                    removed_objects += 1
+
+            for url in [
+                u for u, e in self._urls.items() if e["hash"] not in self._objects
+            ]:
+                del self._urls[url]
+                removed_urls += 1
+            for key in [k for k, d in self._derived.items() if d not in self._objects]:
+                del self._derived[key]
+            self._rebuild_refs()
+
+            objects_root = os.path.join(self.root, OBJECTS_DIR)
+            for dirpath, _, filenames in os.walk(objects_root):
+                for filename in filenames:
+                    if filename not in self._objects:
+                        os.remove(os.path.join(dirpath, filename))
+                        removed_files += 1
+
+            target = compression.storage_encoding()
+            for digest, obj in self._objects.items():
+                if obj["encoding"] == target:
+                    continue
+                path = self._object_path(digest)
+                with open(path, "rb") as f:
+                    raw = compression.decompress(f.read(), obj["encoding"])
+                stored = compression.compress(raw, target)
+                self._write_atomic(path, stored)
+                self._stored_total += len(stored) - obj["stored"]
+                obj.update({"encoding": target, "stored": len(stored)})
+                recompressed += 1
+
+            self._evict()
+            self._save_manifest(force=True)
+        return {
+            "removedObjects": removed_objects,
+            "removedUrls": removed_urls,
+            "removedFiles": removed_files,
+            "recompressed": recompressed,
+        }
+
+    def _evict(self) -> None:
+        """按最近访问时间淘汰对象，直到总存储字节数不超过上限"""
+        if self._stored_total <= self.max_bytes:
+            return
+        for digest in sorted(
+            self._objects, key=lambda d: self._objects[d]["last_access"]
+        ):
+            if self._stored_total <= self.max_bytes:
+                break
+            self._remove_object(digest)
+            for url in self._url_refs.pop(digest, ()):
+                del self._urls[url]
+            for key in self._derived_refs.pop(digest, ()):
+                del self._derived[key]
+            Metrics.incr("doc_store.evictions")
+
+    def _remove_object(self, digest: str) -> None:
+        obj = self._objects.pop(digest, None)
+        if obj is not None:
+            self._stored_total -= obj["stored"]
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _stored_bytes(self) -> int:
+        return self._stored_total
+
+    @staticmethod
+    def _unref(refs: Dict[str, Set[str]], digest: str, ref: str) -> None:
+        owners = refs.get(digest)
+        if owners is not None:
+            owners.discard(ref)
+            if not owners:
+                del refs[digest]
+
+    def _rebuild_refs(self) -> None:
+        """按清单重建对象引用及总存储字节数"""
+        self._url_refs = {}
+        for url, entry in self._urls.items():
+            self._url_refs.setdefault(entry["hash"], set()).add(url)
+        self._derived_refs = {}
+        for key, digest in self._derived.items():
+            self._derived_refs.setdefault(digest, set()).add(key)
+        self._stored_total = sum(o["stored"] for o in self._objects.values())
+
+    # ------------------------------------------------------------------ 持久化
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, OBJECTS_DIR, digest[:2], digest)
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def _load_manifest(self) -> None:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._urls = manifest.get("urls", {})
+            self._objects = manifest.get("objects", {})
+            self._derived = manifest.get("derived", {})
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            print(f"文档缓存清单损坏，将重新建立：{str(e)}")
+        self._rebuild_refs()
+
+    def flush(self) -> None:
+        """立即写入尚未落盘的清单修改"""
+        with self._lock:
+            if self._dirty:
+                self._save_manifest(force=True)
+
+    def _save_manifest(self, force: bool = False) -> None:
+        """写入清单；距上次写入不足 MANIFEST_SAVE_INTERVAL 时只标记修改，由定时器合并写入"""
+        elapsed = (
+            MANIFEST_SAVE_INTERVAL
+            if self._saved_at is None
+            else time.monotonic() - self._saved_at
+        )
+        if not force and elapsed < MANIFEST_SAVE_INTERVAL:
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(
+                    MANIFEST_SAVE_INTERVAL - elapsed, self._timer_flush
+                )
+                self._save_timer.daemon = True
+                self._save_timer.start()
+            return
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        manifest = {
+            "version": 1,
+            "urls": self._urls,
+            "objects": self._objects,
+            "derived": self._derived,
+        }
+        self._write_atomic(
+            self._manifest_path(),
+            json.dumps(manifest, ensure_ascii=False).encode("utf-8"),
+        )
+
+    def _timer_flush(self) -> None:
+        with self._lock:
+            self._save_timer = None
+            if self._dirty:
+                self._save_manifest(force=True)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+@atexit.register
+def _flush_open_stores() -> None:
+    for store in list(_open_stores):
+        try:
+            store.flush()
+        except OSError as e:
+            print(f"文档缓存清单写入失败：{str(e)}")
+
+
+_default_store: Optional[DocStore] = None
+_default_lock = threading.Lock()
+
+
+def get_doc_store() -> Optional[DocStore]:
+    """获取按 Config.DOC_CACHE_PATH 配置的默认文档存储，未配置时返回None"""
+    global _default_store  # pylint: disable=global-statement
+    if not Config.DOC_CACHE_PATH:
+        return None
+    with _default_lock:
+        if _default_store is None or _default_store.root != Config.DOC_CACHE_PATH:
+            if _default_store is not None:
+                _default_store.flush()
+            _default_store = DocStore(Config.DOC_CACHE_PATH, Config.DOC_CACHE_MAX_BYTES)
+        return _default_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="YOP MCP 文档缓存维护工具")
+    parser.add_argument("command", choices=["compact", "stats"])
+    parser.add_argument("--path", default=Config.DOC_CACHE_PATH or "./cache/docs/")
+    parser.add_argument("--max-bytes", type=int, default=Config.DOC_CACHE_MAX_BYTES)
+    args = parser.parse_args()
+
+    store = DocStore(args.path, args.max_bytes)
+    if args.command == "compact":
+        print(json.dumps(store.compact(), ensure_ascii=False))
+    print(json.dumps(store.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+全局错误码索引
+功能：建立错误码/子错误码到所属API、描述及解决方案的倒排索引。API文档解析时（见 api_spec）增量写入，
+也可按 docs/docking-product-tree.json 中的全部API以有界并发批量构建；查询只读内存，不发起网络请求
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from tools.metrics import Metrics
+
+DEFAULT_LIMIT = 20
+# 批量构建的最大并发数，避免调用方传入过大的值时创建大量线程并同时发起请求
+MAX_BUILD_WORKERS = 32
+
+
+def _key(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+class ErrorCodeIndex:
+    """错误码倒排索引：以API路径为单位整体替换，同一API文档更新后不会残留旧错误码"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # API路径 -> 该API的错误码条目
+        self._by_api: Dict[str, List[Dict[str, Any]]] = {}
+        # 错误码或子错误码（小写） -> 包含该错误码的API路径
+        self._postings: Dict[str, Set[str]] = {}
+
+    def add_spec(self, spec: Dict[str, Any]) -> int:
+        """
+        写入一个API定义中的错误码，替换该API此前的条目
+
+        Args:
+            spec: 结构化的API定义（见 api_spec.parse_api_spec）
+
+        Returns:
+            int: 写入的错误码条数
+        """
+        path = spec.get("path")
+        if not path:
+            return 0
+        entries = [
+            {
+                "code": error.get("code", ""),
+                "subCode": error.get("subCode", ""),
+                "description": error.get("description", ""),
+                "solution": error.get("solution", ""),
+                "api": path,
+                "method": spec.get("method", ""),
+                "title": spec.get("title", ""),
+            }
+            for error in spec.get("errorCodes") or []
+        ]
+        with self._lock:
+            self._remove(path)
+            self._by_api[path] = entries
+            for entry in entries:
+                for key in {_key(entry["code"]), _key(entry["subCode"])}:
+                    if key:
+                        self._postings.setdefault(key, set()).add(path)
+        Metrics.incr("error_index.apis_indexed")
+        return len(entries)
+
+    def _remove(self, path: str) -> None:
+        for entry in self._by_api.pop(path, []):
+            for key in {_key(entry["code"]), _key(entry["subCode"])}:
+                paths = self._postings.get(key)
+                if paths is not None:
+                    paths.discard(path)
+                    if not paths:
+                        del self._postings[key]
+
+    def contains(self, path: str) -> bool:
+        """该API是否已建立索引（包括没有错误码的API）"""
+        with self._lock:
+            return path in self._by_api
+
+    def lookup(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        查找错误码，优先精确匹配错误码或子错误码；没有精确匹配时按子错误码及描述中的关键字查找
+
+        Args:
+            query: 错误码、子错误码或关键字，如 40044、isp.code.order-closed、订单已关闭
+            limit: 最多返回的条数
+
+        Returns:
+            List[Dict[str, Any]]: 匹配的条目，包含 code、subCode、description、solution、api、method、title
+        """
+        key = _key(query)
+        if not key:
+            return []
+        Metrics.incr("error_index.lookups")
+        with self._lock:
+            paths = self._postings.get(key)
+            if paths:
+                return [
+                    entry
+                    for path in sorted(paths)
+                    for entry in self._by_api[path]
+                    if key in (_key(entry["code"]), _key(entry["subCode"]))
+                ][:limit]
+            matches = []
+            for path in sorted(self._by_api):
+                for entry in self._by_api[path]:
+                    if key in _key(entry["subCode"]) or key in _key(
+                        entry["description"]
+                    ):
+                        matches.append(entry)
+                        if len(matches) >= limit:
+                            return matches
+            return matches
+
+    def stats(self) -> Dict[str, int]:
+        """索引统计：已索引的API数、错误码条目数及不同错误码/子错误码数"""
+        with self._lock:
+            return {
+                "apis": len(self._by_api),
+                "entries": sum(len(entries) for entries in self._by_api.values()),
+                "codes": len(self._postings),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_api.clear()
+            self._postings.clear()
+
+    def build(
+        self,
+        paths: Iterable[str],
+        load: Callable[[str], Optional[Dict[str, Any]]],
+        max_workers: int = 8,
+    ) -> Dict[str, int]:
+        """
+        批量构建索引，已索引的API跳过
+
+        Args:
+            paths: API路径列表
+            load: 按API路径获取结构化API定义的函数，获取失败时返回None（获取的定义应已写入索引，
+                未写入时在此补充写入）
+            max_workers: 最大并发数，限制在 1~MAX_BUILD_WORKERS 之间
+
+        Returns:
+            Dict[str, int]: 统计信息（total/skipped/indexed/failed）
+        """
+        unique = list(dict.fromkeys(paths))
+        pending = [path for path in unique if not self.contains(path)]
+        stats = {
+            "total": len(unique),
+            "skipped": len(unique) - len(pending),
+            "indexed": 0,
+            "failed": 0,
+        }
+
+        def build_one(path: str) -> str:
+            try:
+                spec = load(path)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"错误码索引构建失败 {path}: {str(e)}")
+                return "failed"
+            if spec is None:
+                return "failed"
+            indexed_path = spec.get("path") or path
+            if not self.contains(indexed_path):
+                self.add_spec({**spec, "path": indexed_path})
+            return "indexed"
+
+        workers = min(max(max_workers, 1), MAX_BUILD_WORKERS, max(len(pending), 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for outcome in executor.map(build_one, pending):
+                stats[outcome] += 1
+        return stats
+
+
+_default_index = ErrorCodeIndex()
+
+
+def get_error_index() -> ErrorCodeIndex:
+    """获取进程内的全局错误码索引"""
+    return _default_index
@@ -0,0 +1,146 @@
+"""
+任务执行层
+功能：将密钥生成、证书下载/解析等CPU密集型函数提交到可配置的线程池或进程池中执行，
+避免阻塞服务的事件循环；限制排队中的任务数，支持超时，并上报执行指标
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from tools.config import Config
+from tools.metrics import Metrics
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class ExecutorError(RuntimeError):
+    """任务未能执行完成（排队已满或超时）"""
+
+
+class ExecutorBusyError(ExecutorError):
+    """排队中的任务数已达上限"""
+
+
+class ExecutorTimeoutError(ExecutorError):
+    """任务执行超时"""
+
+
+def _init_process_worker() -> None:
+    # 子进程中不启用RSA密钥预生成池，池中的密钥只由主进程取用
+    Config.KEY_POOL_SIZE = 0
+
+
+_executors: Dict[str, Executor] = {}
+_executors_lock = threading.Lock()
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def get_executor(kind: Optional[str] = None) -> Executor:
+    """获取指定类型（thread/process）的共享执行器，默认使用 Config.EXECUTOR_KIND"""
+    kind = (kind or Config.EXECUTOR_KIND).lower()
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"不支持的执行器类型: {kind}")
+    with _executors_lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            workers = Config.EXECUTOR_WORKERS or os.cpu_count() or 1
+            if kind == "process":
+                # 使用spawn启动子进程，避免fork复制父进程中的线程状态及内存中的密钥
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_worker,
+                )
+            else:
+                executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="yop-executor"
+                )
+            _executors[kind] = executor
+        return executor
+
+
+def shutdown() -> None:
+    """关闭全部共享执行器"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _acquire_slot() -> None:
+    global _in_flight  # pylint: disable=global-statement
+    with _in_flight_lock:
+        if _in_flight >= Config.EXECUTOR_MAX_QUEUE:
+            Metrics.incr("executor.rejected")
+            raise ExecutorBusyError("服务繁忙，排队中的任务过多，请稍后重试")
+        _in_flight += 1
+        Metrics.set("executor.in_flight", _in_flight)
+
+
+def _release_slot(_: Any = None) -> None:
+    global _in_flight  # pylint: disable=global-statement
+    with _in_flight_lock:
+        _in_flight -= 1
+        Metrics.set("executor.in_flight", _in_flight)
+
+
+async def run_blocking(
+    func: Callable[..., Any],
+    *args: Any,
+    kind: Optional[str] = None,
+    timeout: Optional[float] = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    在共享执行器中执行阻塞函数并等待结果
+
+    使用进程池时 func 须为模块级函数，参数及返回值须可序列化
+
+    Args:
+        func: 需要执行的函数
+        *args: 位置参数
+        kind: 执行器类型（thread/process），默认使用 Config.EXECUTOR_KIND
+        timeout: 超时时间（秒），默认使用 Config.EXECUTOR_TIMEOUT，0表示不限制
+        **kwargs: 关键字参数
+
+    Returns:
+        Any: 函数返回值
+
+    Raises:
+        ExecutorBusyError: 排队中的任务数已达 Config.EXECUTOR_MAX_QUEUE
+        ExecutorTimeoutError: 任务执行超时
+    """
+    _acquire_slot()
+    try:
+        future = get_executor(kind).submit(functools.partial(func, *args, **kwargs))
+    except Exception:
+        _release_slot()
+        raise
+    # 超时后任务仍会在池中继续运行，直到其结束时才释放排队名额
+    future.add_done_callback(_release_slot)
+    Metrics.incr("executor.submitted")
+
+    timeout = Config.EXECUTOR_TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    try:
+        result = await asyncio.wait_for(
+            asyncio.wrap_future(future), timeout=timeout or None
+        )
+    except asyncio.TimeoutError as e:
+        Metrics.incr("executor.timeouts")
+        raise ExecutorTimeoutError(f"任务执行超时（{timeout}秒）") from e
+    except Exception:
+        Metrics.incr("executor.failed")
+        raise
+    finally:
+        Metrics.incr("executor.seconds", time.monotonic() - started)
+    Metrics.incr("executor.completed")
+    return result
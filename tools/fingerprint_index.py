@@ -0,0 +1,380 @@
+"""
+密钥/证书指纹索引
+功能：以公钥 SubjectPublicKeyInfo(DER) 的SHA-256指纹为键，为 keys/ 下的密钥文件及 certs/ 下的
+证书(.cer/.pem)和PFX文件建立持久化索引；按文件大小及修改时间增量更新，
+按密钥、证书序列号或指纹查找匹配项只需一次哈希查找。查找时只在索引目录有文件增删（目录修改时间变化）
+或调用方要求时才重新扫描目录
+"""
+
+import binascii
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from cryptography import x509
+from cryptography.exceptions import UnsupportedAlgorithm
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from tools import key_cache, sm2_engine
+from tools.config import Config
+from tools.metrics import Metrics
+
+INDEX_VERSION = 1
+KEY_EXTENSIONS = (".txt", ".key")
+CERT_EXTENSIONS = (".cer", ".pem", ".crt")
+PFX_EXTENSIONS = (".pfx", ".p12")
+_FINGERPRINT_PATTERN = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+def spki_fingerprint(public_key: Any) -> str:
+    """计算公钥 SubjectPublicKeyInfo(DER) 的SHA-256十六进制指纹"""
+    if isinstance(public_key, sm2_engine.Sm2PublicKey):
+        der = public_key.to_der()
+    else:
+        der = public_key.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    return hashlib.sha256(der).hexdigest()
+
+
+def certificate_fingerprint(certificate: x509.Certificate) -> str:
+    """计算证书公钥的指纹，SM2证书的公钥由SM2引擎从证书DER中提取"""
+    try:
+        return spki_fingerprint(certificate.public_key())
+    except UnsupportedAlgorithm:
+        return spki_fingerprint(
+            sm2_engine.public_key_from_certificate(
+                certificate.public_bytes(serialization.Encoding.DER)
+            )
+        )
+
+
+def key_fingerprint(key_b64: str) -> Optional[str]:
+    """
+    计算Base64编码的公钥或私钥字符串对应的公钥指纹，无法解析时返回None
+
+    Returns:
+        Optional[str]: 公钥SPKI的SHA-256指纹（私钥取其对应公钥）
+    """
+    key_b64 = "".join(key_b64.split())
+    try:
+        return spki_fingerprint(key_cache.load_public_key(key_b64))
+    except (ValueError, TypeError, binascii.Error, UnsupportedAlgorithm):
+        pass
+    try:
+        return spki_fingerprint(key_cache.load_private_key(key_b64).public_key())
+    except (ValueError, TypeError, binascii.Error, UnsupportedAlgorithm):
+        pass
+    # cryptography 不支持SM2曲线，回退到SM2引擎
+    for load in (sm2_engine.load_public_key, sm2_engine.load_private_key):
+        try:
+            key = load(key_b64)
+        except (ValueError, TypeError):
+            continue
+        if isinstance(key, sm2_engine.Sm2PrivateKey):
+            key = key.public_key()
+        return spki_fingerprint(key)
+    return None
+
+
+def _key_file_kind(name: str, key_b64: str) -> str:
+    if "私钥" in name or "private" in name.lower():
+        return "privateKey"
+    if "公钥" in name or "public" in name.lower():
+        return "publicKey"
+    try:
+        key_cache.load_public_key(key_b64)
+        return "publicKey"
+    except UnsupportedAlgorithm:
+        # 可解析为SubjectPublicKeyInfo但曲线不受支持（如SM2公钥）
+        return "publicKey"
+    except (ValueError, TypeError, binascii.Error):
+        return "privateKey"
+
+
+class FingerprintIndex:
+    """
+    持久化指纹索引
+
+    Args:
+        index_path: 索引文件路径
+        roots: 需要索引的目录列表
+    """
+
+    def __init__(self, index_path: str, roots: List[str]):
+        self.index_path = index_path
+        self.roots = roots
+        self._lock = threading.RLock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._by_fingerprint: Dict[str, List[str]] = {}
+        # 证书序列号（文件名） -> 指纹
+        self._by_serial: Dict[str, Set[str]] = {}
+        # 上次扫描时各目录的修改时间，为None时尚未扫描
+        self._dir_mtimes: Optional[Dict[str, int]] = None
+        self._load()
+
+    # ------------------------------------------------------------------ 查询
+    def lookup(
+        self, query: str, pwd: Optional[str] = None, refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        按密钥（Base64公钥/私钥）、证书序列号或指纹查找匹配的密钥及证书文件
+
+        索引目录中有文件增删、提供了PFX密码或 refresh=True 时先增量更新索引；
+        文件被原地修改（目录修改时间不变）时需指定 refresh=True
+
+        Args:
+            query: Base64编码的公钥/私钥、证书序列号（文件名）或64位十六进制指纹
+            pwd: PFX证书密码，仅用于索引没有同名公钥证书的PFX文件
+            refresh: 是否强制增量更新索引
+
+        Returns:
+            Dict[str, Any]: 包含 message、fingerprints 及 matches（每项包含 path、kind、
+                serialNo、fingerprint）
+        """
+        if refresh or pwd is not None or self._dirs_changed():
+            self.refresh(pwd)
+        query = query.strip()
+        with self._lock:
+            if _FINGERPRINT_PATTERN.match(query):
+                fingerprints = [query.lower()]
+            else:
+                fingerprints = sorted(self._by_serial.get(query, ()))
+                if not fingerprints:
+                    fingerprint = key_fingerprint(query)
+                    fingerprints = [fingerprint] if fingerprint else []
+            matches = [
+                dict(self._files[path], path=path)
+                for fingerprint in fingerprints
+                for path in self._by_fingerprint.get(fingerprint, [])
+            ]
+        Metrics.incr("fingerprint_index.lookups")
+        if not fingerprints:
+            message = (
+                "无法识别的查询条件，请输入Base64编码的密钥、证书序列号或SHA-256指纹"
+            )
+        else:
+            message = f"找到 {len(matches)} 个匹配的密钥/证书文件"
+        return {"message": message, "fingerprints": fingerprints, "matches": matches}
+
+    # ------------------------------------------------------------------ 索引
+    def refresh(self, pwd: Optional[str] = None) -> Dict[str, int]:
+        """
+        增量更新索引：只重新计算新增或大小/修改时间有变化的文件，并移除已删除的文件；
+        尚无指纹的PFX在提供密码或出现带指纹的同名公钥证书时重新索引
+
+        Returns:
+            Dict[str, int]: 更新统计（files/indexed/removed）
+        """
+        with self._lock:
+            seen = set()
+            indexed = 0
+            pfx_paths = []
+            for path in self._walk():
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = self._files.get(path)
+                unchanged = (
+                    entry is not None
+                    and entry["size"] == stat.st_size
+                    and entry["mtime_ns"] == stat.st_mtime_ns
+                )
+                is_pfx = os.path.splitext(path)[1].lower() in PFX_EXTENSIONS
+                if unchanged and (entry.get("fingerprint") or not is_pfx):
+                    continue
+                if is_pfx:
+                    pfx_paths.append((path, stat, unchanged))
+                    continue
+                self._files[path] = self._index_file(path, stat)
+                indexed += 1
+            # PFX优先使用同名公钥证书的指纹，因此在其他文件之后处理
+            for path, stat, unchanged in pfx_paths:
+                if (
+                    unchanged
+                    and pwd is None
+                    and self._sibling_fingerprint(path) is None
+                ):
+                    continue
+                self._files[path] = self._index_pfx(path, stat, pwd)
+                indexed += 1
+
+            removed = [path for path in self._files if path not in seen]
+            for path in removed:
+                del self._files[path]
+            if indexed or removed:
+                self._rebuild()
+                self._save()
+            Metrics.incr("fingerprint_index.indexed", indexed)
+            return {"files": len(seen), "indexed": indexed, "removed": len(removed)}
+
+    def _dirs_changed(self) -> bool:
+        """索引目录是否有文件增删（各目录修改时间或目录本身的增删）"""
+        with self._lock:
+            if self._dir_mtimes is None:
+                return True
+            for directory, mtime_ns in self._dir_mtimes.items():
+                try:
+                    if os.stat(directory).st_mtime_ns != mtime_ns:
+                        return True
+                except OSError:
+                    return True
+            return any(
+                os.path.isdir(root) and os.path.normpath(root) not in self._dir_mtimes
+                for root in self.roots
+            )
+
+    def _walk(self) -> List[str]:
+        extensions = KEY_EXTENSIONS + CERT_EXTENSIONS + PFX_EXTENSIONS
+        paths = []
+        dir_mtimes: Dict[str, int] = {}
+        for root in self.roots:
+            for dirpath, _, filenames in os.walk(root):
+                try:
+                    dir_mtimes[os.path.normpath(dirpath)] = os.stat(dirpath).st_mtime_ns
+                except OSError:
+                    continue
+                paths.extend(
+                    os.path.normpath(os.path.join(dirpath, name))
+                    for name in filenames
+                    if os.path.splitext(name)[1].lower() in extensions
+                )
+        self._dir_mtimes = dir_mtimes
+        return sorted(paths)
+
+    def _index_file(self, path: str, stat: os.stat_result) -> Dict[str, Any]:
+        name, ext = os.path.splitext(os.path.basename(path))
+        entry: Dict[str, Any] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "serialNo": None,
+            "fingerprint": None,
+        }
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if ext.lower() in KEY_EXTENSIONS:
+                key_b64 = data.decode("utf-8").strip()
+                entry["kind"] = _key_file_kind(name, key_b64)
+                entry["fingerprint"] = key_fingerprint(key_b64)
+            else:
+                entry["kind"] = "certificate"
+                entry["serialNo"] = name
+                if data.lstrip().startswith(b"-----BEGIN"):
+                    certificate = x509.load_pem_x509_certificate(data)
+                else:
+                    certificate = x509.load_der_x509_certificate(data)
+                entry["fingerprint"] = certificate_fingerprint(certificate)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            entry.setdefault("kind", "unknown")
+            entry["error"] = str(e)
+        return entry
+
+    def _index_pfx(
+        self, path: str, stat: os.stat_result, pwd: Optional[str]
+    ) -> Dict[str, Any]:
+        name = os.path.splitext(os.path.basename(path))[0]
+        entry: Dict[str, Any] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "kind": "pfx",
+            "serialNo": name,
+            "fingerprint": None,
+        }
+        # 本工具生成的PFX与同名 .cer 证书保存在同一目录，直接复用其指纹，无需解密PFX
+        fingerprint = self._sibling_fingerprint(path)
+        if fingerprint is not None:
+            entry["fingerprint"] = fingerprint
+            return entry
+        if pwd is None:
+            entry["error"] = "未找到同名公钥证书，需提供PFX密码才能建立索引"
+            return entry
+        try:
+            with open(path, "rb") as f:
+                _, certificate, _ = pkcs12.load_key_and_certificates(
+                    f.read(), pwd.encode("utf-8")
+                )
+            if certificate is not None:
+                entry["fingerprint"] = certificate_fingerprint(certificate)
+        except (OSError, ValueError) as e:
+            entry["error"] = str(e)
+        return entry
+
+    def _sibling_fingerprint(self, path: str) -> Optional[str]:
+        """PFX同名公钥证书的指纹，没有时返回None"""
+        for ext in CERT_EXTENSIONS:
+            sibling = self._files.get(os.path.splitext(path)[0] + ext)
+            if sibling and sibling.get("fingerprint"):
+                return sibling["fingerprint"]
+        return None
+
+    # ------------------------------------------------------------------ 持久化
+    def _rebuild(self) -> None:
+        self._by_fingerprint = {}
+        self._by_serial = {}
+        for path, entry in self._files.items():
+            if entry.get("fingerprint"):
+                self._by_fingerprint.setdefault(entry["fingerprint"], []).append(path)
+                if entry.get("serialNo"):
+                    self._by_serial.setdefault(entry["serialNo"], set()).add(
+                        entry["fingerprint"]
+                    )
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._files = data.get("files", {})
+                self._rebuild()
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"指纹索引文件损坏，将重新建立：{str(e)}")
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": INDEX_VERSION, "files": self._files}, f, ensure_ascii=False
+            )
+        os.replace(tmp_path, self.index_path)
+
+
+_default_index: Optional[FingerprintIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> FingerprintIndex:
+    """获取默认指纹索引（索引 ./keys/ 及证书保存目录）"""
+    global _default_index  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_index is None:
+            _default_index = FingerprintIndex(
+                Config.FINGERPRINT_INDEX_PATH,
+                [
+                    Config.KEY_SAVE_PATH,
+                    Config.RSA_CERT_SAVE_PATH,
+                    Config.SM2_CERT_SAVE_PATH,
+                ],
+            )
+        return _default_index
+
+
+def lookup_fingerprint(
+    query: str, pwd: Optional[str] = None, refresh: bool = False
+) -> Dict[str, Any]:
+    """在默认指纹索引中按密钥、证书序列号或指纹查找匹配的密钥及证书文件"""
+    if not query or not query.strip():
+        return {"message": "查询条件不能为空", "fingerprints": [], "matches": []}
+    return get_fingerprint_index().lookup(query, pwd, refresh)
@@ -1,9 +1,36 @@
+"""
+PKCS#10证书请求生成
+功能：RSA(SHA256withRSA)及SM2(SM3withSM2)证书请求的唯一实现。生成结果按（私钥SHA-256指纹、
+密钥类型、主题）缓存在有界LRU缓存中，同一私钥重复下载证书（如CFCA下载重试）时不会重新解析私钥、
+重新签名；批量生成时分布在与CPU核数相当的进程池（spawn启动）中并行执行，结果写回本进程的缓存
+"""
+
 import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from typing import Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from cryptography import x509
 from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.x509.oid import NameOID
+
+from tools import key_cache, sm2_engine
+from tools.metrics import Metrics
+
+# 证书请求缓存容量
+CSR_CACHE_SIZE = 256
+# CFCA证书下载使用的证书请求主题
+CFCA_SUBJECT = x509.Name(
+    [x509.NameAttribute(NameOID.COMMON_NAME, "certificate request")]
+)
+
+_csr_cache: "OrderedDict[Tuple[str, str, bytes], str]" = OrderedDict()
+_csr_lock = threading.Lock()
 
 
 class KeyType(Enum):
@@ -21,17 +48,10 @@ def get_signature_alg(key_type: KeyType) -> str:
 
 def string2_public_key(pub_key: str, key_type: KeyType) -> Any:
     try:
-        decoded_key = base64.b64decode(pub_key)
         if key_type == KeyType.RSA2048:
-            return serialization.load_der_public_key(decoded_key)
+            return key_cache.load_public_key(pub_key)
         if key_type == KeyType.SM2:
-            # 对于SM2，使用EC算法和BouncyCastle
-            # sm2_obj = sm2.CryptSM2(
-            #     public_key=binascii.hexlify(decoded_key).decode(),
-            #     private_key=None
-            # )
-            # return sm2_obj
-            return serialization.load_der_public_key(decoded_key)
+            return sm2_engine.load_public_key(pub_key)
         raise RuntimeError("不支持的算法")
     except Exception as e:
         raise RuntimeError(f"没有此类算法: {e}") from e
@@ -39,58 +59,172 @@ def string2_public_key(pub_key: str, key_type: KeyType) -> Any:
 
 def string2_private_key(pri_key: str, key_type: KeyType) -> Any:
     try:
-        decoded_key = base64.b64decode(pri_key)
         if key_type == KeyType.RSA2048:
-            return serialization.load_der_private_key(decoded_key, password=None)
+            return key_cache.load_private_key(pri_key)
         if key_type == KeyType.SM2:
-            # 对于SM2，使用EC算法
-            # sm2_obj = sm2.CryptSM2(
-            #     public_key=None,
-            #     private_key=binascii.hexlify(decoded_key).decode()
-            # )
-            # return sm2_obj
-            return serialization.load_der_private_key(decoded_key, password=None)
+            return sm2_engine.load_private_key(pri_key)
         raise RuntimeError("不支持的算法")
     except Exception as e:
         raise RuntimeError(f"没有此类算法: {e}") from e
 
 
-def gen_p10(pri_key: str, pub_key: str, key_type: KeyType) -> str:
-    # 第一步：根据算法将公钥字符串转换为公钥对象
-    # public_key = string2_public_key(pub_key, key_type)  # 暂时不使用
-    _ = pub_key  # 避免未使用变量警告
+def _cache_key(
+    pri_key: str, key_type: KeyType, subject: x509.Name
+) -> Tuple[str, str, bytes]:
+    # 以私钥内容的SHA-256为键，缓存中不保存明文私钥
+    digest = hashlib.sha256("".join(pri_key.split()).encode("utf-8")).hexdigest()
+    return digest, key_type.value, subject.public_bytes()
 
-    # 第二步：根据算法将私钥字符串转换为私钥对象
-    private_key = string2_private_key(pri_key, key_type)
 
-    try:
-        # 第三步：生成X500Principal对象并创建签名
-        x500_name = x509.Name([])  # 空的X500Principal
+def _cache_put(key: Tuple[str, str, bytes], csr: str) -> None:
+    with _csr_lock:
+        _csr_cache[key] = csr
+        _csr_cache.move_to_end(key)
+        while len(_csr_cache) > CSR_CACHE_SIZE:
+            _csr_cache.popitem(last=False)
 
-        # 第四步：创建PKCS10CertificationRequestBuilder
-        builder = x509.CertificateSigningRequestBuilder()
-        builder = builder.subject_name(x500_name)
 
-        # 第五步：根据签名算法决定签名方式
+def _build_p10(pri_key: str, key_type: KeyType, subject: x509.Name) -> str:
+    private_key = string2_private_key(pri_key, key_type)
+    try:
         if key_type == KeyType.RSA2048:
-            sign_algorithm = hashes.SHA256()
-            # signature_algorithm = x509.RSASignatureWithSHA256()
+            csr = (
+                x509.CertificateSigningRequestBuilder()
+                .subject_name(subject)
+                .sign(private_key, hashes.SHA256())
+            )
+            csr_der = csr.public_bytes(serialization.Encoding.DER)
         elif key_type == KeyType.SM2:
-            sign_algorithm = hashes.SHA256()  # SM2使用SHA256作为替代
+            # cryptography 不支持SM2曲线，使用SM2引擎以SM3withSM2签名
+            csr_der = sm2_engine.build_csr(private_key, subject.public_bytes())
         else:
             raise RuntimeError("不支持的算法")
-
-        # 第六步：构建CSR请求并进行签名
-        csr = builder.sign(private_key, sign_algorithm)
-
-        # 获取DER格式的CSR并进行base64编码
-        csr_der = csr.public_bytes(serialization.Encoding.DER)
+        # 对DER格式的CSR进行base64编码
         return base64.b64encode(csr_der).decode("utf-8")
-
     except Exception as e:
         raise RuntimeError(f"生成P10请求失败: {e}") from e
 
 
+def gen_p10(
+    pri_key: str,
+    pub_key: str,
+    key_type: KeyType,
+    subject: Optional[x509.Name] = None,
+) -> str:
+    """
+    生成Base64编码（DER）的PKCS#10证书请求，同一私钥、密钥类型及主题的结果从缓存返回
+
+    Args:
+        pri_key: Base64编码的私钥
+        pub_key: Base64编码的公钥（证书请求中的公钥取自私钥，不使用该参数）
+        key_type: 密钥类型，可传入本模块或 cert_utils 中取值相同的 KeyType
+        subject: 证书请求主题，默认为空主题
+
+    Raises:
+        RuntimeError: 私钥无法解析或签名失败
+    """
+    _ = pub_key  # 证书请求中的公钥取自私钥
+    key_type = KeyType(key_type.value)
+    subject = subject if subject is not None else x509.Name([])
+    key = _cache_key(pri_key, key_type, subject)
+    with _csr_lock:
+        csr = _csr_cache.get(key)
+        if csr is not None:
+            _csr_cache.move_to_end(key)
+    if csr is not None:
+        Metrics.incr("p10.cache_hits")
+        return csr
+    Metrics.incr("p10.cache_misses")
+    csr = _build_p10(pri_key, key_type, subject)
+    _cache_put(key, csr)
+    return csr
+
+
+def _gen_p10_worker(
+    pri_key: str, key_type_value: str, subject: str
+) -> Tuple[Optional[str], Optional[str]]:
+    # x509.Name 不能跨进程传递，以RFC 4514字符串传递主题；缓存及指标由调用方在本进程中更新
+    try:
+        csr = _build_p10(
+            pri_key, KeyType(key_type_value), x509.Name.from_rfc4514_string(subject)
+        )
+        return csr, None
+    except Exception as e:  # pylint: disable=broad-except
+        return None, str(e)
+
+
+def gen_p10_batch(
+    private_keys: Sequence[str],
+    key_type: KeyType,
+    subject: Optional[x509.Name] = None,
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    批量生成证书请求：已缓存的直接返回，其余在进程池中并行生成（只有一个私钥时在本进程中生成），
+    结果写回本进程的缓存
+
+    Args:
+        private_keys: Base64编码的私钥列表
+        key_type: 密钥类型
+        subject: 证书请求主题，默认为空主题（须可用RFC 4514字符串无损表示）
+        max_workers: 进程数，默认为CPU核数
+
+    Returns:
+        List[Dict[str, Optional[str]]]: 与输入顺序一致，每项包含 certReq 及 message（失败时的错误信息）
+    """
+    key_type = KeyType(key_type.value)
+    subject = subject if subject is not None else x509.Name([])
+    results: List[Dict[str, Optional[str]]] = [
+        {"certReq": None, "message": None} for _ in private_keys
+    ]
+    pending: Dict[Tuple[str, str, bytes], List[int]] = {}
+    for index, pri_key in enumerate(private_keys):
+        key = _cache_key(pri_key, key_type, subject)
+        with _csr_lock:
+            csr = _csr_cache.get(key)
+        if csr is not None:
+            Metrics.incr("p10.cache_hits")
+            results[index]["certReq"] = csr
+        else:
+            # 同一私钥只生成一次
+            pending.setdefault(key, []).append(index)
+    if not pending:
+        return results
+
+    subject_str = subject.rfc4514_string()
+    if x509.Name.from_rfc4514_string(subject_str) != subject:
+        raise ValueError(f"不支持的证书请求主题: {subject_str}")
+    keys = list(pending)
+    inputs = [private_keys[pending[key][0]] for key in keys]
+    workers = min(len(keys), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        # 启动进程池的开销大于单个证书请求的生成
+        outputs = [
+            _gen_p10_worker(pri_key, key_type.value, subject_str) for pri_key in inputs
+        ]
+    else:
+        # 使用spawn启动子进程，避免fork复制父进程中的线程状态及内存中的密钥
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            outputs = list(
+                executor.map(
+                    _gen_p10_worker,
+                    inputs,
+                    [key_type.value] * len(inputs),
+                    [subject_str] * len(inputs),
+                    chunksize=max(1, len(inputs) // (workers * 4)),
+                )
+            )
+    for key, (csr, error) in zip(keys, outputs):
+        Metrics.incr("p10.cache_misses")
+        if csr is not None:
+            _cache_put(key, csr)
+        for index in pending[key]:
+            results[index] = {"certReq": csr, "message": error}
+    return results
+
+
 if __name__ == "__main__":
     # 示例RSA密钥（注释掉的长行）
     # pri_key = "MIIEpAIBAAKCAQEAw/21Fbt4/qq924888iha86Qvz9R65UWVj+9JU+gyaE/YUo//eyW37Jg/3jXfL4yPaWcPb7sz6PlhWsxRCSqN4eaEYyCL9/CqGC7S4+r/HeeAusTZBKjRh8nnWUSaRWk0EugzMb0DpMN+HD86HcF40/+bDYzgajcmns+JFbVXNuTvUmjZlPlKmG1i3rTCEZWEzOiIUIGZULIp5lTNDOYUQ5yBhkY1xy9cK8k1kZaBVDZb/b8FXqJ3yE41HITKyUFIEOUPVZlmzO5k6QBM/1ysbATF6hwWIirf9yUti9U8i6GVSv4wZHtLDDVQTC5XcvVtUhbLTOToLl+jAKddMBNYrQIDAQABAoIBABx9SDHpBv0J58A/MY5H1HS/JJ4S1mx2cXezQlb6lT05ggn6WZpWkMZJGVudPBym03/wVbuZnEGc4ox2z77D20z/m7XnGMGJT8hlIg20brIzoTBFBgDZ419YN5Nv1/cIBGRNMYfk4F82daH4hOOnaH90k97j4AlAjBIgu94Wdp+JZVAaAWopvuWOTvIpPCK17YGMCvOTsZ7EoqFdQMVQkz6cuQDY7s7CcxlaxJ/LV1o+UBcF43Z1qBZDwk6d0WpPhUZi0KHxJk6CASDzHUCZS9wbLnpwW3PJxjnkpknF0oihENQDvWCjKbSS+TbIjAIGNKRUk+ebL842J/kHQhIC5zECgYEA+LTHKzK9zm78aZGKc3y8hFEp8I5a5pTTj5keaAA70iQqzvwuaeR4BAqFMhVtijmamQFFAZW+zzN97nfBzjjhhSHjgS7boYcDiU6SBjt7G5ctm90Uh1M/HY4lVZ0xBfBQ7DPal2oD2S86GzfCe+dBtKD1QyYjIcGQiUNq7ASch1kCgYEAyb0oZGLRuh8d5dHbOhe6X/0UgQH4H3zOe2X6gYTbJqrprfuQPAFsp/yPwQqSP1Wu2HYyHjfC+vzXP1ZwTKB47Nf5WGLcWD9dmW5hX0s/45ZtnuAd4NiJAL/oeRn/QyFrTj79L7WCygZ0O6E2WMhcWtNcS6SqRw10CdbW3JkyxXUCgYEAy5mazwdsERoUswu9jwuXfK7BKbgwPEGr7AuKs9M1JbQMA4S5LmElyxEdt0GJejXsFMPQTRrcqN1bg6QwWXWBUa7Lg07r6BESWQ6kRkvdXVnmsYlMK/h/W9+pOqxDnLv+U0+j7H6ShfK+m9eK9En+JTP7dKw86H6Ap440cuDXj4kCgYANeGvyCAco/lrotZKF1n/DWQq9cnw23gaLhsurSku30UG5NEr1NsMilGKk6SfKwtXh7kJ6cg6645cby5HEDBMG/YTQugkse06sqAooasXhVHINYbmdAdhkDGxhabL5sImRt/L/9Ia/Jp8sPB983iQMjIBlLKGSDPvqjEXchP424QKBgQCdupR37xfxdjP4Va1NxrjaxsWg2hgM1j7zLs6mvFtjatFqA9d8UWFQkkBnegaObnMrgYrm7oX/ntVORvfVPoJQ//U91L+Ysr+xvqTzgx36KHqLQXqCxPk2e3Dco6KjDeUYhr1ko5ogBgQZGElTYZTJbKXOCJS30GpjtaZzmtuo6w=="  # noqa: E501
@@ -98,13 +232,8 @@ if __name__ == "__main__":
     # key_type = KeyType.RSA2048
 
     # SM2密钥示例
-    PRI_KEY = (
-        "MIGEAgEAMBAGByqGSM49AgEGBSuBBAAKBG0wawIBAQQgDQKlS7bO/Kk5ki6EX2jc7fwpBZdQSfLLkydhhpfNJp+h"
-        "RANCAASvzBZG6h3rpDOLy9Fx5yW3Pa6Od3CngeFK5f8uUlPHrtxLmNl0CHBserrsk/fFJanzIKpEEIisR7AOykJ2wqgr"
-    )
-    PUB_KEY = (
-        "MFYwEAYHKoZIzj0CAQYFK4EEAAoDQgAEr8wWRuod66Qzi8vRcecltz2ujndwp4HhSuX/LlJTx67cS5jZdAhwbHq67JP3"
-        "xSWp8yCqRBCIrEewDspCdsKoKw=="
-    )
+    SM2_KEY = sm2_engine.generate_private_key()
+    PRI_KEY = SM2_KEY.to_base64()
+    PUB_KEY = SM2_KEY.public_key().to_base64()
     KEY_TYPE = KeyType.SM2
     print(gen_p10(pri_key=PRI_KEY, pub_key=PUB_KEY, key_type=KEY_TYPE))
@@ -0,0 +1,345 @@
+"""
+HTML转markdown工具
+功能：将文档站点返回的HTML页面转换为markdown，去除脚本、样式及导航等页面框架内容，
+并按源文档哈希缓存转换结果（缓存键需要完整页面，因此页面下载完成后再整体转换）
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from tools.doc_store import content_hash, get_doc_store
+from tools.metrics import Metrics
+
+# 整个元素（含子元素）都会被丢弃的标签
+DROP_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "head",
+    "nav",
+    "footer",
+    "aside",
+    "svg",
+    "form",
+    "button",
+    "iframe",
+}
+# 表示页面框架（导航、目录、面包屑等）的 class/id 关键字，按 class 名或其中以 - _ 分隔的单词整体匹配
+CHROME_MARKERS = {"sidebar", "navbar", "breadcrumb", "toc", "menu", "navigation"}
+# 正文容器，其中的 <header> 通常包含页面标题，不作为页面框架丢弃
+CONTENT_TAGS = {"main", "article"}
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "wbr"}
+BLOCK_TAGS = {
+    "p",
+    "div",
+    "section",
+    "article",
+    "main",
+    "body",
+    "dl",
+    "dt",
+    "dd",
+    "figure",
+    "figcaption",
+    "blockquote",
+}
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN_SEPARATORS = re.compile(r"[-_]")
+
+
+class HtmlToMarkdown(HTMLParser):
+    """
+    增量HTML转markdown转换器
+
+    通过 feed() 逐块输入HTML，每次调用返回已确定的markdown片段，close() 返回剩余内容
+    """
+
+    def __init__(self, base_url: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self._out: List[str] = []
+        self._sinks: List[List[str]] = []  # 表格单元格等需要暂存文本的位置
+        self._drop_stack: List[str] = []
+        self._content_depth = 0
+        self._pending_newlines = 0
+        self._at_line_start = True
+        self._started = False
+        self._pre_depth = 0
+        self._lists: List[List[int]] = []  # 每层列表: [是否有序, 当前序号]
+        self._links: List[Optional[str]] = []
+        self._table: Optional[List[List[str]]] = None
+        self._row: Optional[List[str]] = None
+
+    # ------------------------------------------------------------------ 对外接口
+    def feed(self, data: str) -> str:  # type: ignore[override]
+        super().feed(data)
+        return self._drain()
+
+    def close(self) -> str:
+        super().close()
+        if self._table is not None:
+            self._flush_table()
+        return self._drain().rstrip() + "\n" if self._started else ""
+
+    # ------------------------------------------------------------------ 解析回调
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self._drop_stack:
+            if tag == self._drop_stack[-1] or tag in DROP_TAGS:
+                if tag not in VOID_TAGS:
+                    self._drop_stack.append(tag)
+            return
+        attr_map = {k: v or "" for k, v in attrs}
+        if (
+            tag in DROP_TAGS
+            or (tag == "header" and not self._content_depth)
+            or self._is_chrome(attr_map)
+        ):
+            if tag not in VOID_TAGS:
+                self._drop_stack.append(tag)
+            return
+        if tag in CONTENT_TAGS:
+            self._content_depth += 1
+
+        if tag in HEADING_TAGS:
+            self._block(2)
+            self._write("#" * HEADING_TAGS[tag] + " ")
+        elif tag in BLOCK_TAGS:
+            self._block(2)
+            if tag == "blockquote":
+                self._write("> ")
+        elif tag == "br":
+            self._newline(1)
+        elif tag == "hr":
+            self._block(2)
+            self._write("---")
+            self._block(2)
+        elif tag in ("ul", "ol"):
+            self._block(1 if self._lists else 2)
+            self._lists.append([tag == "ol", 0])
+        elif tag == "li":
+            self._newline(1)
+            indent = "  " * max(len(self._lists) - 1, 0)
+            if self._lists and self._lists[-1][0]:
+                self._lists[-1][1] += 1
+                self._write(f"{indent}{self._lists[-1][1]}. ", raw=True)
+            else:
+                self._write(f"{indent}- ", raw=True)
+        elif tag == "pre":
+            self._block(2)
+            self._write("```\n", raw=True)
+            self._pre_depth += 1
+        elif tag == "code" and not self._pre_depth:
+            self._write("`")
+        elif tag in ("strong", "b"):
+            self._write("**")
+        elif tag in ("em", "i"):
+            self._write("*")
+        elif tag == "a":
+            href = attr_map.get("href", "")
+            self._links.append(href if href and not href.startswith("#") else None)
+            if self._links[-1]:
+                self._write("[")
+        elif tag == "img":
+            alt = attr_map.get("alt", "")
+            src = attr_map.get("src", "")
+            if src:
+                self._write(f"![{alt}]({self._resolve(src)})")
+        elif tag == "table":
+            self._block(2)
+            self._table = []
+        elif tag == "tr" and self._table is not None:
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._sinks.append([])
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._drop_stack:
+            if tag == self._drop_stack[-1]:
+                self._drop_stack.pop()
+            return
+        if tag in CONTENT_TAGS and self._content_depth:
+            self._content_depth -= 1
+
+        if tag in HEADING_TAGS or tag in BLOCK_TAGS:
+            self._block(2)
+        elif tag in ("ul", "ol") and self._lists:
+            self._lists.pop()
+            self._block(1 if self._lists else 2)
+        elif tag == "pre" and self._pre_depth:
+            self._pre_depth -= 1
+            if not self._at_line_start:
+                self._write("\n", raw=True)
+            self._write("```")
+            self._block(2)
+        elif tag == "code" and not self._pre_depth:
+            self._write("`")
+        elif tag in ("strong", "b"):
+            self._write("**")
+        elif tag in ("em", "i"):
+            self._write("*")
+        elif tag == "a" and self._links:
+            href = self._links.pop()
+            if href:
+                self._write(f"]({self._resolve(href)})")
+        elif tag in ("td", "th") and self._row is not None and self._sinks:
+            cell = "".join(self._sinks.pop())
+            self._row.append(_WHITESPACE.sub(" ", cell).strip().replace("|", "\\|"))
+        elif tag == "tr" and self._table is not None and self._row is not None:
+            if self._row:
+                self._table.append(self._row)
+            self._row = None
+        elif tag == "table" and self._table is not None:
+            self._flush_table()
+
+    def handle_data(self, data: str) -> None:
+        if self._drop_stack:
+            return
+        if self._pre_depth:
+            self._write(data, raw=True)
+            return
+        text = _WHITESPACE.sub(" ", data)
+        if self._at_line_start and not self._sinks:
+            text = text.lstrip()
+        if text:
+            self._write(text)
+
+    # ------------------------------------------------------------------ 输出辅助
+    def _is_chrome(self, attrs: Dict[str, str]) -> bool:
+        if attrs.get("role") in ("navigation", "banner", "contentinfo"):
+            return True
+        for token in f"{attrs.get('class', '')} {attrs.get('id', '')}".lower().split():
+            if token in CHROME_MARKERS or not CHROME_MARKERS.isdisjoint(
+                _TOKEN_SEPARATORS.split(token)
+            ):
+                return True
+        return False
+
+    def _resolve(self, href: str) -> str:
+        return urljoin(self.base_url, href) if self.base_url else href
+
+    def _block(self, newlines: int) -> None:
+        if not self._sinks:
+            self._pending_newlines = max(self._pending_newlines, newlines)
+
+    def _newline(self, newlines: int) -> None:
+        if self._sinks:
+            self._sinks[-1].append(" ")
+        else:
+            self._pending_newlines = max(self._pending_newlines, newlines)
+
+    def _write(self, text: str, raw: bool = False) -> None:
+        if self._sinks:
+            self._sinks[-1].append(text)
+            return
+        if not raw and (self._at_line_start or self._pending_newlines):
+            text = text.lstrip(" ")
+            if not text:
+                return
+        if self._pending_newlines and self._started:
+            self._out.append("\n" * self._pending_newlines)
+        self._pending_newlines = 0
+        self._out.append(text)
+        self._started = True
+        self._at_line_start = text.endswith("\n")
+
+    def _flush_table(self) -> None:
+        rows = self._table or []
+        self._table = None
+        self._row = None
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        lines = []
+        for index, row in enumerate(rows):
+            cells = row + [""] * (width - len(row))
+            lines.append("| " + " | ".join(cells) + " |")
+            if index == 0:
+                lines.append("|" + " --- |" * width)
+        self._block(2)
+        self._write("\n".join(lines))
+        self._block(2)
+
+    def _drain(self) -> str:
+        text = "".join(self._out)
+        self._out = []
+        return text
+
+
+def looks_like_html(content: str) -> bool:
+    """判断内容是否为HTML页面"""
+    head = content.lstrip()[:512].lower()
+    return head.startswith(("<!doctype html", "<html")) or (
+        "<body" in head or "<head" in head
+    )
+
+
+def convert_chunks(chunks: Iterable[str], base_url: str = "") -> Iterator[str]:
+    """逐块转换HTML，每输入一块即产出已确定的markdown片段"""
+    converter = HtmlToMarkdown(base_url)
+    for chunk in chunks:
+        piece = converter.feed(chunk)
+        if piece:
+            yield piece
+    tail = converter.close()
+    if tail:
+        yield tail
+
+
+_CACHE_SIZE = 64
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def html_to_markdown(html: str, base_url: str = "") -> str:
+    """
+    将HTML页面转换为markdown，结果按源文档哈希缓存于内存及本地文档缓存
+
+    Args:
+        html: HTML页面内容
+        base_url: 用于将相对链接转为绝对链接的页面地址
+
+    Returns:
+        str: 转换后的markdown内容
+    """
+    source_hash = content_hash(base_url + "\n" + html)
+    with _cache_lock:
+        if source_hash in _cache:
+            _cache.move_to_end(source_hash)
+            Metrics.incr("html2md.cache_hits")
+            return _cache[source_hash]
+
+    store = get_doc_store()
+    markdown = store.get_derived("markdown", source_hash) if store else None
+    if markdown is None:
+        converter = HtmlToMarkdown(base_url)
+        markdown = converter.feed(html) + converter.close()
+        Metrics.incr("html2md.conversions")
+        Metrics.incr("html2md.bytes_in", len(html.encode("utf-8")))
+        Metrics.incr("html2md.bytes_out", len(markdown.encode("utf-8")))
+        if store is not None:
+            try:
+                store.put_derived("markdown", source_hash, markdown)
+            except (OSError, ValueError) as e:
+                print(f"文档缓存写入失败：{str(e)}")
+    else:
+        Metrics.incr("html2md.cache_hits")
+
+    with _cache_lock:
+        _cache[source_hash] = markdown
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return markdown
@@ -6,6 +6,11 @@ from typing import Any, Dict, Optional, Union
 
 import httpx
 
+from tools.compression import StreamDecoder, accept_encoding
+from tools.doc_store import get_doc_store
+from tools.metrics import Metrics
+from tools.product_tree import api_doc_id, get_product_tree
+
 
 class HttpUtils:
     """HTTP工具类，提供同步下载文件、获取内容等功能"""
@@ -24,10 +29,15 @@ class HttpUtils:
         """
         try:
             with httpx.Client(http2=True, timeout=timeout) as client:  # 启用HTTP/2加速
-                response = client.get(url)
-                response.raise_for_status()  # 自动检测4xx/5xx错误
-                content = response.text
+                # 显式声明支持的压缩编码，由 read_decoded_text 流式解压
+                with client.stream(
+                    "GET", url, headers={"Accept-Encoding": accept_encoding()}
+                ) as response:
+                    response.raise_for_status()  # 自动检测4xx/5xx错误
+                    content = HttpUtils.read_decoded_text(response)
+                    validators = HttpUtils.validators(response)
             print(f"已获取内容，长度: {len(content)} 字符")
+            HttpUtils.cache_document(url, content, **validators)
             return content
         except httpx.HTTPStatusError as e:
             print(f"HTTP错误 {e.response.status_code}")
@@ -36,6 +46,109 @@ class HttpUtils:
             print(f"请求失败：{str(e)}")
             return f"HTTP请求失败: {str(e)}"
 
+    @staticmethod
+    def read_decoded_text(response: httpx.Response) -> str:
+        """
+        按 Content-Encoding 逐块解压流式响应，并记录压缩前后的字节数
+
+        Args:
+            response: 以 stream 方式打开、尚未读取响应体的响应对象
+
+        Returns:
+            str: 解压并解码后的文本内容
+        """
+        decoder = StreamDecoder(response.headers.get("Content-Encoding"))
+        chunks = []
+        compressed_bytes = 0
+        for raw_chunk in response.iter_raw():
+            compressed_bytes += len(raw_chunk)
+            chunks.append(decoder.decompress(raw_chunk))
+        chunks.append(decoder.flush())
+        body = b"".join(chunks)
+
+        Metrics.incr("http.responses")
+        Metrics.incr("http.bytes_compressed", compressed_bytes)
+        Metrics.incr("http.bytes_decompressed", len(body))
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+    @staticmethod
+    def validators(response: httpx.Response) -> Dict[str, str]:
+        """提取响应中用于条件请求的校验信息（ETag、Last-Modified）"""
+        result = {}
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag:
+            result["etag"] = etag
+        if last_modified:
+            result["last_modified"] = last_modified
+        return result
+
+    @staticmethod
+    def revalidate(
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        发送条件GET请求，校验文档是否有更新；未更新时服务端返回304，不传输响应体
+
+        Args:
+            url: 文档地址
+            etag: 上次获取时的ETag
+            last_modified: 上次获取时的Last-Modified
+            timeout: 超时时间（秒）
+
+        Returns:
+            Dict[str, Any]: 包含 status（HTTP状态码，请求异常时为0）、
+                content（有更新时的文本内容）、validators（新的校验信息）、error（错误信息）
+        """
+        headers = {"Accept-Encoding": accept_encoding()}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        result: Dict[str, Any] = {
+            "status": 0,
+            "content": None,
+            "validators": {},
+            "error": None,
+        }
+        try:
+            with httpx.Client(http2=True, timeout=timeout) as client:
+                with client.stream("GET", url, headers=headers) as response:
+                    result["status"] = response.status_code
+                    if response.status_code == 304:
+                        Metrics.incr("http.not_modified")
+                        return result
+                    response.raise_for_status()
+                    result["content"] = HttpUtils.read_decoded_text(response)
+                    result["validators"] = HttpUtils.validators(response)
+        except httpx.HTTPStatusError as e:
+            result["error"] = f"HTTP请求失败: HTTP {e.response.status_code}"
+        except Exception as e:  # 保持通用异常处理，单个文档失败不影响整体校验
+            result["error"] = f"HTTP请求失败: {str(e)}"
+        return result
+
+    @staticmethod
+    def cache_document(url: str, content: str, **meta: Any) -> None:
+        """
+        将获取到的文档写入本地文档缓存（未启用缓存时忽略），写入失败不影响返回结果；
+        API文档同时记录产品目录树中的 historyCount，作为之后变更检测的基准
+        """
+        store = get_doc_store()
+        if store is None:
+            return
+        doc_id = api_doc_id(url)
+        if doc_id is not None and "history_count" not in meta:
+            hint = get_product_tree().history_hints().get(doc_id)
+            if hint is not None:
+                meta["history_count"] = hint
+        try:
+            store.put(url, content, **meta)
+        except (OSError, ValueError) as e:
+            print(f"文档缓存写入失败：{str(e)}")
+
     @staticmethod
     def download_file(url: str, save_path: str, timeout: Optional[int] = None) -> str:
         """
@@ -0,0 +1,110 @@
+"""
+密钥解析缓存
+功能：统一将Base64编码的DER密钥字符串解析为 cryptography 密钥对象，并以有界LRU缓存解析结果。
+缓存键为密钥内容的SHA-256摘要，缓存中不保存明文密钥字符串。
+注意：调用方传入的Base64字符串及解码出的DER均为不可变对象，Python无法可靠地清除其内容，
+它们在被垃圾回收前仍留在内存中；本模块不对密钥明文做清零承诺
+"""
+
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+
+from tools.config import Config
+from tools.metrics import Metrics
+
+
+class KeyCache:
+    """有界LRU密钥对象缓存"""
+
+    def __init__(self, max_size: int = Config.KEY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_private_key(self, key_b64: str) -> Any:
+        """将Base64编码的DER(PKCS8/PKCS1)私钥解析为私钥对象"""
+        return self._load(
+            "private",
+            key_b64,
+            lambda der: serialization.load_der_private_key(
+                der, password=None, backend=default_backend()
+            ),
+        )
+
+    def load_public_key(self, key_b64: str) -> Any:
+        """将Base64编码的DER(SubjectPublicKeyInfo)公钥解析为公钥对象"""
+        return self._load(
+            "public",
+            key_b64,
+            lambda der: serialization.load_der_public_key(der, default_backend()),
+        )
+
+    def clear(self) -> None:
+        """清空缓存，释放全部密钥对象"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计（容量、当前大小、命中率）"""
+        hits = Metrics.get("key_cache.hits")
+        misses = Metrics.get("key_cache.misses")
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "size": size,
+            "maxSize": self.max_size,
+            "hits": hits,
+            "misses": misses,
+            "hitRate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def _load(self, kind: str, key_b64: str, parse: Callable[[bytes], Any]) -> Any:
+        der = base64.b64decode(key_b64)
+        hasher = hashlib.sha256(kind.encode("ascii"))
+        hasher.update(der)
+        cache_key = hasher.hexdigest()
+
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                Metrics.incr("key_cache.hits")
+                return self._entries[cache_key]
+
+        Metrics.incr("key_cache.misses")
+        key = parse(der)
+        with self._lock:
+            self._entries[cache_key] = key
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                Metrics.incr("key_cache.evictions")
+        return key
+
+
+_default_cache: Optional[KeyCache] = None
+_default_lock = threading.Lock()
+
+
+def get_key_cache() -> KeyCache:
+    """获取进程内共享的密钥缓存"""
+    global _default_cache  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = KeyCache(Config.KEY_CACHE_SIZE)
+        return _default_cache
+
+
+def load_private_key(key_b64: str) -> Any:
+    """使用共享缓存解析Base64编码的私钥"""
+    return get_key_cache().load_private_key(key_b64)
+
+
+def load_public_key(key_b64: str) -> Any:
+    """使用共享缓存解析Base64编码的公钥"""
+    return get_key_cache().load_public_key(key_b64)
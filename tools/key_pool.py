@@ -0,0 +1,197 @@
+"""
+RSA密钥预生成池
+功能：在后台进程中预先生成RSA-2048私钥并保存在内存中，生成密钥对时直接取用，
+请求路径上只需序列化；池中密钥数低于低水位时补充至容量上限，每个密钥只会被取出一次。
+生成失败时按指数退避重试，生成进程异常退出时重新创建进程池。
+素数生成期间持有GIL，因此放在独立进程中执行，避免阻塞服务线程
+"""
+
+import multiprocessing
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, Optional
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from tools.config import Config
+from tools.metrics import Metrics
+
+# 生成失败后的重试间隔（秒），连续失败时翻倍，直至上限
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+
+def _generate_rsa_key_der() -> bytes:
+    """在子进程中生成RSA-2048私钥，返回PKCS8 DER编码"""
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048, backend=default_backend()
+    )
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+class RsaKeyPool:
+    """
+    有界RSA私钥池
+
+    Args:
+        size: 池容量上限（同时也是内存占用上限）
+        low_water: 低水位，池中密钥数低于该值时后台补充至 size
+    """
+
+    def __init__(self, size: int, low_water: Optional[int] = None):
+        self.size = size
+        self.low_water = size // 2 if low_water is None else min(low_water, size)
+        self._keys: Deque[Any] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stopped = False
+
+    def start(self) -> None:
+        """启动后台补充线程及密钥生成进程（幂等）"""
+        with self._cond:
+            if self._thread is not None or self.size <= 0:
+                return
+            self._stopped = False
+            self._executor = self._new_executor()
+            self._thread = threading.Thread(
+                target=self._refill_loop, name="yop-rsa-key-pool", daemon=True
+            )
+            self._thread.start()
+
+    @staticmethod
+    def _new_executor() -> ProcessPoolExecutor:
+        # 使用spawn启动子进程，避免fork复制父进程内存中已生成的密钥
+        return ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def stop(self) -> None:
+        """停止后台补充线程及密钥生成进程，并丢弃池中剩余密钥"""
+        with self._cond:
+            self._stopped = True
+            self._keys.clear()
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+        if thread is not None:
+            thread.join()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def take(self) -> Optional[Any]:
+        """
+        取出一个预生成的RSA私钥，池为空时返回None（由调用方同步生成）
+
+        Returns:
+            Optional[Any]: RSA私钥对象，每个密钥只会返回一次
+        """
+        with self._cond:
+            key = self._keys.popleft() if self._keys else None
+            Metrics.set("key_pool.size", len(self._keys))
+            if len(self._keys) < self.low_water:
+                self._cond.notify()
+        Metrics.incr("key_pool.hits" if key is not None else "key_pool.misses")
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            available = len(self._keys)
+        return {
+            "size": self.size,
+            "lowWater": self.low_water,
+            "available": available,
+            "hits": Metrics.get("key_pool.hits"),
+            "misses": Metrics.get("key_pool.misses"),
+        }
+
+    def _refill_loop(self) -> None:
+        refilling = True
+        delay = RETRY_DELAY
+        while True:
+            with self._cond:
+                while not self._stopped and not refilling:
+                    self._cond.wait()
+                    refilling = len(self._keys) < self.low_water
+                if self._stopped:
+                    return
+            # 生成密钥时不持有锁，取用方不会被阻塞
+            try:
+                key = self._generate()
+            except Exception as e:  # pylint: disable=broad-except
+                Metrics.incr("key_pool.errors")
+                # 后台线程的日志写入stderr：stdio传输模式下stdout为JSON-RPC消息流
+                print(
+                    f"预生成RSA密钥失败，{delay:g}秒后重试：{str(e)}", file=sys.stderr
+                )
+                if not self._backoff(delay, isinstance(e, BrokenProcessPool)):
+                    return
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+            delay = RETRY_DELAY
+            with self._cond:
+                if self._stopped:
+                    return
+                self._keys.append(key)
+                Metrics.incr("key_pool.generated")
+                Metrics.set("key_pool.size", len(self._keys))
+                refilling = len(self._keys) < self.size
+
+    def _backoff(self, delay: float, broken: bool) -> bool:
+        """等待重试间隔（stop() 时提前结束），生成进程已失效时重新创建；返回是否继续补充"""
+        deadline = time.monotonic() + delay
+        with self._cond:
+            while not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._stopped:
+                return False
+            old_executor = None
+            if broken:
+                old_executor, self._executor = self._executor, self._new_executor()
+        if old_executor is not None:
+            old_executor.shutdown(wait=False, cancel_futures=True)
+        return True
+
+    def _generate(self) -> Any:
+        """在子进程中生成密钥，并在当前进程中还原为私钥对象"""
+        assert self._executor is not None
+        der = self._executor.submit(_generate_rsa_key_der).result()
+        # 密钥由本进程的子进程刚刚生成，跳过耗时的RSA参数校验
+        return serialization.load_der_private_key(
+            der, password=None, unsafe_skip_rsa_key_validation=True
+        )
+
+
+_default_pool: Optional[RsaKeyPool] = None
+_default_lock = threading.Lock()
+
+
+def get_key_pool() -> Optional[RsaKeyPool]:
+    """获取按 Config.KEY_POOL_SIZE 配置的默认密钥池（首次调用时启动），未启用时返回None"""
+    global _default_pool  # pylint: disable=global-statement
+    if Config.KEY_POOL_SIZE <= 0:
+        return None
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = RsaKeyPool(Config.KEY_POOL_SIZE, Config.KEY_POOL_LOW_WATER)
+            _default_pool.start()
+        return _default_pool
+
+
+def take_rsa_key() -> Optional[Any]:
+    """从默认密钥池取出一个RSA私钥，未启用或池为空时返回None"""
+    pool = get_key_pool()
+    return pool.take() if pool is not None else None
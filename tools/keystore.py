@@ -0,0 +1,393 @@
+"""
+加密密钥库
+功能：将多个密钥对保存在同一个加密文件中（默认 ./keys/keystore.json），按别名及公钥指纹建立索引。
+主密钥由口令经 scrypt 派生，每个私钥以 AES-256-GCM 单独加密（别名及指纹作为附加认证数据）；
+密钥库在会话中只需解锁一次，解密后的私钥对象保存在有界LRU缓存中，
+签名或生成证书请求时无需重复执行KDF及解密。其他工具以 keystore:<别名或指纹> 引用库中的私钥
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from tools import key_cache, sm2_engine
+from tools.config import Config
+from tools.fingerprint_index import key_fingerprint
+from tools.metrics import Metrics
+
+KEYSTORE_VERSION = 1
+KEYSTORE_REF_PREFIX = "keystore:"
+# scrypt 参数：约32MB内存，单次派生在百毫秒量级
+SCRYPT_N = 2**15
+SCRYPT_R = 8
+SCRYPT_P = 1
+_CHECK_PLAINTEXT = b"yop-mcp-keystore"
+
+
+class KeystoreError(ValueError):
+    """密钥库操作失败（未解锁、口令错误、密钥不存在等）"""
+
+
+def is_keystore_ref(value: Optional[str]) -> bool:
+    """判断字符串是否为密钥库引用（keystore:<别名或指纹>）"""
+    return bool(value) and value.strip().startswith(KEYSTORE_REF_PREFIX)
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _derive_key(password: str, kdf: Dict[str, Any]) -> bytes:
+    return Scrypt(
+        salt=base64.b64decode(kdf["salt"]),
+        length=32,
+        n=kdf["n"],
+        r=kdf["r"],
+        p=kdf["p"],
+    ).derive(password.encode("utf-8"))
+
+
+def _aad(alias: str, fingerprint: str) -> bytes:
+    return f"{alias}\n{fingerprint}".encode("utf-8")
+
+
+class Keystore:
+    """
+    加密密钥库
+
+    Args:
+        path: 密钥库文件路径
+        cache_size: 解密后私钥对象的缓存容量
+    """
+
+    def __init__(self, path: str, cache_size: int = 64):
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._aead: Optional[AESGCM] = None
+        self._keys: "OrderedDict[str, Any]" = OrderedDict()
+
+    # ------------------------------------------------------------------ 会话
+    @property
+    def unlocked(self) -> bool:
+        return self._aead is not None
+
+    def unlock(self, password: str) -> None:
+        """
+        使用口令解锁密钥库（文件不存在时以该口令新建），会话内只需执行一次
+
+        Raises:
+            KeystoreError: 口令为空、错误或密钥库文件损坏
+        """
+        if not password:
+            raise KeystoreError("密钥库口令不能为空")
+        with self._lock:
+            data = self._read()
+            if data is None:
+                kdf = {
+                    "name": "scrypt",
+                    "salt": _b64(os.urandom(16)),
+                    "n": SCRYPT_N,
+                    "r": SCRYPT_R,
+                    "p": SCRYPT_P,
+                }
+                aead = AESGCM(_derive_key(password, kdf))
+                nonce = os.urandom(12)
+                data = {
+                    "version": KEYSTORE_VERSION,
+                    "kdf": kdf,
+                    "check": {
+                        "nonce": _b64(nonce),
+                        "ciphertext": _b64(aead.encrypt(nonce, _CHECK_PLAINTEXT, None)),
+                    },
+                    "entries": {},
+                }
+                self._data = data
+                self._write()
+            else:
+                aead = AESGCM(_derive_key(password, data["kdf"]))
+                try:
+                    aead.decrypt(
+                        base64.b64decode(data["check"]["nonce"]),
+                        base64.b64decode(data["check"]["ciphertext"]),
+                        None,
+                    )
+                except InvalidTag as e:
+                    raise KeystoreError("密钥库口令错误") from e
+                self._data = data
+            self._aead = aead
+            self._keys.clear()
+        Metrics.incr("keystore.unlocks")
+
+    def lock(self) -> None:
+        """锁定密钥库，丢弃主密钥及缓存的私钥对象"""
+        with self._lock:
+            self._aead = None
+            self._keys.clear()
+
+    def _require_unlocked(self) -> AESGCM:
+        if self._aead is None:
+            raise KeystoreError(
+                "密钥库未解锁，请先调用 yeepay_yop_unlock_keystore "
+                "或设置环境变量 YOP_MCP_KEYSTORE_PASSWORD"
+            )
+        return self._aead
+
+    # ------------------------------------------------------------------ 读写
+    def _read(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise KeystoreError(f"读取密钥库失败: {str(e)}") from e
+        if data.get("version") != KEYSTORE_VERSION:
+            raise KeystoreError(f"不支持的密钥库版本: {data.get('version')}")
+        return data
+
+    def _write(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # ------------------------------------------------------------------ 密钥
+    def add(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        private_key: str,
+        public_key: str,
+        algorithm: str,
+        key_format: str = "pkcs8",
+        alias: str = "",
+    ) -> Dict[str, Any]:
+        """
+        加密保存一对密钥
+
+        Args:
+            private_key: Base64编码的私钥
+            public_key: Base64编码的公钥
+            algorithm: 密钥算法，RSA 或 SM2
+            key_format: 私钥格式，pkcs8 或 pkcs1
+            alias: 别名，为空时使用 算法_指纹前16位
+
+        Returns:
+            Dict[str, Any]: 密钥条目的元数据（alias、fingerprint、algorithm 等，不含私钥）
+        """
+        return self.add_many([(private_key, public_key, alias)], algorithm, key_format)[
+            0
+        ]
+
+    def add_many(
+        self,
+        key_pairs: List[Tuple[str, str, str]],
+        algorithm: str,
+        key_format: str = "pkcs8",
+    ) -> List[Dict[str, Any]]:
+        """
+        加密保存多对密钥，只写入一次密钥库文件
+
+        Args:
+            key_pairs: (私钥, 公钥, 别名) 列表，别名可为空
+            algorithm: 密钥算法，RSA 或 SM2
+            key_format: 私钥格式，pkcs8 或 pkcs1
+
+        Returns:
+            List[Dict[str, Any]]: 各密钥条目的元数据，顺序与输入一致
+        """
+        algorithm = algorithm.upper()
+        prepared = []
+        for private_key, public_key, alias in key_pairs:
+            fingerprint = key_fingerprint(public_key)
+            if fingerprint is None:
+                raise KeystoreError("无法解析公钥")
+            alias = alias.strip() or f"{algorithm}_{fingerprint[:16]}"
+            prepared.append((private_key, public_key, alias, fingerprint))
+
+        with self._lock:
+            aead = self._require_unlocked()
+            assert self._data is not None
+            entries = self._data["entries"]
+            aliases = [item[2] for item in prepared]
+            for alias in aliases:
+                if alias in entries or aliases.count(alias) > 1:
+                    raise KeystoreError(f"别名已存在: {alias}")
+            created_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+            for private_key, public_key, alias, fingerprint in prepared:
+                nonce = os.urandom(12)
+                ciphertext = aead.encrypt(
+                    nonce, private_key.encode("utf-8"), _aad(alias, fingerprint)
+                )
+                entries[alias] = {
+                    "algorithm": algorithm,
+                    "format": key_format.lower(),
+                    "fingerprint": fingerprint,
+                    "publicKey": public_key,
+                    "createdAt": created_at,
+                    "nonce": _b64(nonce),
+                    "ciphertext": _b64(ciphertext),
+                }
+            self._write()
+            result = [self._metadata(alias, entries[alias]) for alias in aliases]
+        Metrics.incr("keystore.added", len(result))
+        return result
+
+    @staticmethod
+    def _metadata(alias: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "alias": alias,
+            "algorithm": entry["algorithm"],
+            "format": entry["format"],
+            "fingerprint": entry["fingerprint"],
+            "publicKey": entry["publicKey"],
+            "createdAt": entry["createdAt"],
+        }
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """列出密钥库中的全部密钥（不含私钥），未解锁时只读取公开的索引信息"""
+        with self._lock:
+            data = self._data if self._data is not None else self._read()
+        if data is None:
+            return []
+        return [
+            self._metadata(alias, entry)
+            for alias, entry in sorted(data["entries"].items())
+        ]
+
+    def _resolve(self, ref: str) -> str:
+        """按别名、完整指纹或指纹前缀（至少8位）查找条目，返回别名"""
+        ref = ref.strip()
+        if ref.startswith(KEYSTORE_REF_PREFIX):
+            ref = ref[len(KEYSTORE_REF_PREFIX) :].strip()
+        assert self._data is not None
+        entries = self._data["entries"]
+        if ref in entries:
+            return ref
+        if len(ref) >= 8:
+            matches = [
+                alias
+                for alias, entry in entries.items()
+                if entry["fingerprint"].startswith(ref.lower())
+            ]
+            if len(matches) == 1:
+                return matches[0]
+            if len(matches) > 1:
+                raise KeystoreError(f"指纹前缀匹配到多个密钥: {ref}")
+        raise KeystoreError(f"密钥库中不存在该密钥: {ref}")
+
+    def export_private_key(self, ref: str) -> str:
+        """解密并返回Base64编码的私钥"""
+        with self._lock:
+            aead = self._require_unlocked()
+            alias = self._resolve(ref)
+            entry = self._data["entries"][alias]  # type: ignore[index]
+            try:
+                plain = aead.decrypt(
+                    base64.b64decode(entry["nonce"]),
+                    base64.b64decode(entry["ciphertext"]),
+                    _aad(alias, entry["fingerprint"]),
+                )
+            except InvalidTag as e:
+                raise KeystoreError(f"密钥条目已损坏或被篡改: {alias}") from e
+        Metrics.incr("keystore.decrypts")
+        return plain.decode("utf-8")
+
+    def load_private_key(self, ref: str) -> Any:
+        """返回私钥对象（RSA为cryptography私钥，SM2为SM2引擎私钥），按别名缓存"""
+        with self._lock:
+            self._require_unlocked()
+            alias = self._resolve(ref)
+            key = self._keys.get(alias)
+            if key is not None:
+                self._keys.move_to_end(alias)
+                Metrics.incr("keystore.cache_hits")
+                return key
+            algorithm = self._data["entries"][alias]["algorithm"]  # type: ignore[index]
+        private_key = self.export_private_key(alias)
+        if algorithm == "SM2":
+            key = sm2_engine.load_private_key(private_key)
+        else:
+            key = key_cache.load_private_key(private_key)
+        with self._lock:
+            self._keys[alias] = key
+            while len(self._keys) > self.cache_size:
+                self._keys.popitem(last=False)
+        Metrics.incr("keystore.cache_misses")
+        return key
+
+
+_default_keystore: Optional[Keystore] = None
+_default_lock = threading.Lock()
+
+
+def get_keystore() -> Keystore:
+    """
+    获取 Config.KEYSTORE_PATH 对应的默认密钥库；未解锁且设置了 YOP_MCP_KEYSTORE_PASSWORD 时自动解锁
+    """
+    global _default_keystore  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_keystore is None or _default_keystore.path != Config.KEYSTORE_PATH:
+            _default_keystore = Keystore(Config.KEYSTORE_PATH, Config.KEY_CACHE_SIZE)
+        keystore = _default_keystore
+    if not keystore.unlocked and Config.KEYSTORE_PASSWORD:
+        keystore.unlock(Config.KEYSTORE_PASSWORD)
+    return keystore
+
+
+def unlock_keystore(password: str) -> Dict[str, Any]:
+    """
+    解锁默认密钥库（不存在时新建）
+
+    Returns:
+        Dict[str, Any]: 包含 message、path 及 keys（密钥元数据列表）
+    """
+    keystore = get_keystore()
+    try:
+        keystore.unlock(password)
+    except KeystoreError as e:
+        return {"message": f"解锁密钥库失败: {str(e)}", "path": keystore.path}
+    entries = keystore.entries()
+    return {
+        "message": f"密钥库已解锁，共 {len(entries)} 个密钥",
+        "path": keystore.path,
+        "keys": entries,
+    }
+
+
+def list_keystore() -> Dict[str, Any]:
+    """
+    列出默认密钥库中的密钥（别名、算法、指纹、公钥），无需解锁
+
+    Returns:
+        Dict[str, Any]: 包含 message、path、unlocked 及 keys
+    """
+    try:
+        keystore = get_keystore()
+        entries = keystore.entries()
+    except KeystoreError as e:
+        return {"message": str(e), "path": Config.KEYSTORE_PATH, "keys": []}
+    return {
+        "message": f"共 {len(entries)} 个密钥",
+        "path": keystore.path,
+        "unlocked": keystore.unlocked,
+        "keys": entries,
+    }
+
+
+def resolve_private_key(private_key: str) -> str:
+    """将密钥库引用解析为Base64编码的私钥，其他输入原样返回"""
+    if not is_keystore_ref(private_key):
+        return private_key
+    return get_keystore().export_private_key(private_key)
@@ -0,0 +1,49 @@
+"""
+运行指标工具
+功能：以线程安全的方式累计计数类指标（字节数、命中次数等），供各工具模块上报和查询
+"""
+
+import threading
+from typing import Dict
+
+
+class Metrics:
+    """进程内计数器集合，指标名使用点分形式，如 http.bytes_compressed"""
+
+    _lock = threading.Lock()
+    _counters: Dict[str, float] = {}
+
+    @classmethod
+    def incr(cls, name: str, value: float = 1) -> None:
+        """累加指定指标"""
+        with cls._lock:
+            cls._counters[name] = cls._counters.get(name, 0) + value
+
+    @classmethod
+    def set(cls, name: str, value: float) -> None:
+        """设置指定指标的当前值（用于队列深度等瞬时量）"""
+        with cls._lock:
+            cls._counters[name] = value
+
+    @classmethod
+    def get(cls, name: str) -> float:
+        """获取指定指标的当前值，未上报过时返回0"""
+        with cls._lock:
+            return cls._counters.get(name, 0)
+
+    @classmethod
+    def snapshot(cls, prefix: str = "") -> Dict[str, float]:
+        """获取指标快照，可按前缀过滤"""
+        with cls._lock:
+            return {
+                name: value
+                for name, value in cls._counters.items()
+                if name.startswith(prefix)
+            }
+
+    @classmethod
+    def reset(cls, prefix: str = "") -> None:
+        """清除指标，可按前缀过滤"""
+        with cls._lock:
+            for name in [n for n in cls._counters if n.startswith(prefix)]:
+                del cls._counters[name]
@@ -0,0 +1,408 @@
+"""
+产品目录树
+功能：将 docs/docking-product-tree.json 加载为紧凑的内存结构——节点与API记录使用 __slots__ 类，
+字符串驻留，location/uri 通过父节点指针按需推导，全部API保存在一个扁平列表中；
+并支持写出/读取可内存映射的二进制快照，以便快速启动
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from tools.config import Config
+
+SNAPSHOT_MAGIC = b"YOPT"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sHIII")  # magic, version, 字符串数, 节点数, API数
+# 节点: code, name, desc, parent（字符串及节点均以下标引用，-1表示空）
+_NODE = struct.Struct("<iiii")
+# API: apiId, method, path, title, uriMethod, operationId, historyCount, spiCount, node
+_API = struct.Struct("<iiiiiiiii")
+_API_DOC_PATTERN = re.compile(r"/docs-v3/api/([^/]+)\.md$")
+
+
+def api_doc_id(url: str) -> Optional[str]:
+    """从docs-v3 API文档地址中提取文档标识，如 post_rest_v1.0_aggpay_pre-pay"""
+    match = _API_DOC_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+class CatalogNode:
+    """产品目录节点"""
+
+    __slots__ = ("code", "name", "desc", "parent", "children", "apis")
+
+    def __init__(
+        self,
+        code: str,
+        name: str,
+        desc: Optional[str] = None,
+        parent: Optional["CatalogNode"] = None,
+    ):
+        self.code = code
+        self.name = name
+        self.desc = desc
+        self.parent = parent
+        self.children: List["CatalogNode"] = []
+        self.apis: List["ApiRecord"] = []
+
+    @property
+    def location(self) -> str:
+        """节点路径，如 MERCHANT_MANAGE/_DEFAULT/merchant-netin"""
+        codes = []
+        node: Optional[CatalogNode] = self
+        while node is not None:
+            codes.append(node.code)
+            node = node.parent
+        return "/".join(reversed(codes))
+
+    def __repr__(self) -> str:
+        return f"CatalogNode({self.location!r})"
+
+
+class ApiRecord:
+    """API记录"""
+
+    __slots__ = (
+        "api_id",
+        "method",
+        "path",
+        "title",
+        "uri_method",
+        "operation_id",
+        "history_count",
+        "spi_count",
+        "node",
+    )
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        api_id: str,
+        method: str,
+        path: str,
+        title: str,
+        uri_method: str,
+        operation_id: str,
+        history_count: int,
+        spi_count: int,
+        node: CatalogNode,
+    ):
+        self.api_id = api_id
+        self.method = method
+        self.path = path
+        self.title = title
+        self.uri_method = uri_method
+        self.operation_id = operation_id
+        self.history_count = history_count
+        self.spi_count = spi_count
+        self.node = node
+
+    @property
+    def uri(self) -> str:
+        """文档URI，如 options__yos__v1.0__sys__merchant__qual__upload"""
+        return self.uri_method + self.path.replace("/", "__")
+
+    @property
+    def location(self) -> str:
+        return self.node.location + "/" + self.uri
+
+    def doc_ids(self) -> List[str]:
+        """可能的docs-v3文档标识，如 post_rest_v1.0_aggpay_pre-pay"""
+        suffix = self.path.replace("/", "_")
+        methods = [m.strip().lower() for m in self.method.split(",")]
+        methods.append(self.uri_method)
+        return [m + suffix for m in dict.fromkeys(methods) if m]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "apiId": self.api_id,
+            "method": self.method,
+            "path": self.path,
+            "title": self.title,
+            "uri": self.uri,
+            "historyCount": self.history_count,
+            "spiCount": self.spi_count,
+            "location": self.location,
+            "operationId": self.operation_id,
+        }
+
+    def __repr__(self) -> str:
+        return f"ApiRecord({self.method} {self.path})"
+
+
+class ProductTree:
+    """产品目录树：roots 为顶层节点，nodes/apis 为扁平列表"""
+
+    def __init__(self) -> None:
+        self.roots: List[CatalogNode] = []
+        self.nodes: List[CatalogNode] = []
+        self.apis: List[ApiRecord] = []
+        self._by_path: Optional[Dict[str, List[ApiRecord]]] = None
+        self._history: Optional[Dict[str, int]] = None
+
+    # ------------------------------------------------------------------ 查询
+    def iter_apis(self) -> Iterator[ApiRecord]:
+        return iter(self.apis)
+
+    def find_all_by_path(self, path: str) -> List[ApiRecord]:
+        """按API路径查找全部记录（同一API可能挂在多个产品下，各记录的请求方式可能不同）"""
+        if self._by_path is None:
+            by_path: Dict[str, List[ApiRecord]] = {}
+            for api in self.apis:
+                by_path.setdefault(api.path, []).append(api)
+            self._by_path = by_path
+        return self._by_path.get(path, [])
+
+    def find_by_path(self, path: str) -> Optional[ApiRecord]:
+        """按API路径查找，如 /rest/v1.0/aggpay/pre-pay；有多条记录时返回第一条"""
+        records = self.find_all_by_path(path)
+        return records[0] if records else None
+
+    def doc_ids_for_path(self, path: str) -> List[str]:
+        """API路径全部记录的docs-v3文档标识（去重并保持顺序），路径未收录时返回空列表"""
+        return list(
+            dict.fromkeys(
+                doc_id
+                for api in self.find_all_by_path(path)
+                for doc_id in api.doc_ids()
+            )
+        )
+
+    def history_hints(self) -> Dict[str, int]:
+        """docs-v3文档标识到 historyCount 的映射"""
+        if self._history is None:
+            self._history = {
+                doc_id: api.history_count
+                for api in self.apis
+                for doc_id in api.doc_ids()
+            }
+        return self._history
+
+    # ------------------------------------------------------------------ 加载
+    @classmethod
+    def from_json(cls, json_path: str) -> "ProductTree":
+        """从JSON文件加载"""
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        tree = cls()
+        intern = sys.intern
+
+        def add_node(raw: Dict[str, Any], parent: Optional[CatalogNode]) -> None:
+            desc = raw.get("desc")
+            node = CatalogNode(
+                intern(raw["code"]),
+                intern(raw["name"]),
+                intern(desc) if desc is not None else None,
+                parent,
+            )
+            tree.nodes.append(node)
+            if parent is None:
+                tree.roots.append(node)
+            else:
+                parent.children.append(node)
+            for item in raw.get("items", []):
+                path = item["path"]
+                uri = item.get("uri", "")
+                api = ApiRecord(
+                    intern(item.get("apiId", "")),
+                    intern(item.get("method", "")),
+                    intern(path),
+                    intern(item.get("title", "")),
+                    intern(uri.split("__", 1)[0]),
+                    intern(item.get("operationId", "")),
+                    int(item.get("historyCount") or 0),
+                    int(item.get("spiCount") or 0),
+                    node,
+                )
+                node.apis.append(api)
+                tree.apis.append(api)
+            for child in raw.get("children", []):
+                add_node(child, node)
+
+        for raw_root in data:
+            add_node(raw_root, None)
+        return tree
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path: str) -> "ProductTree":
+        """从二进制快照加载（内存映射读取）"""
+        with open(snapshot_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return cls._parse_snapshot(mm)
+
+    @classmethod
+    def _parse_snapshot(cls, buf: Any) -> "ProductTree":
+        magic, version, n_strings, n_nodes, n_apis = _HEADER.unpack_from(buf, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("不支持的产品目录快照格式")
+        offset = _HEADER.size
+        # 字符串表：按字符（而非字节）计的偏移量，整体解码一次后切片
+        ends = struct.unpack_from(f"<{n_strings}I", buf, offset)
+        offset += 4 * n_strings
+        (blob_size,) = struct.unpack_from("<I", buf, offset)
+        offset += 4
+        blob = bytes(buf[offset : offset + blob_size]).decode("utf-8")
+        offset += blob_size
+        intern = sys.intern
+        strings = []
+        start = 0
+        for end in ends:
+            strings.append(intern(blob[start:end]))
+            start = end
+
+        tree = cls()
+        for code, name, desc, parent in _NODE.iter_unpack(
+            buf[offset : offset + _NODE.size * n_nodes]
+        ):
+            parent_node = tree.nodes[parent] if parent >= 0 else None
+            node = CatalogNode(
+                strings[code],
+                strings[name],
+                strings[desc] if desc >= 0 else None,
+                parent_node,
+            )
+            tree.nodes.append(node)
+            if parent_node is None:
+                tree.roots.append(node)
+            else:
+                parent_node.children.append(node)
+        offset += _NODE.size * n_nodes
+        for fields in _API.iter_unpack(buf[offset : offset + _API.size * n_apis]):
+            node = tree.nodes[fields[8]]
+            api = ApiRecord(
+                strings[fields[0]],
+                strings[fields[1]],
+                strings[fields[2]],
+                strings[fields[3]],
+                strings[fields[4]],
+                strings[fields[5]],
+                fields[6],
+                fields[7],
+                node,
+            )
+            node.apis.append(api)
+            tree.apis.append(api)
+        return tree
+
+    def write_snapshot(self, snapshot_path: str) -> None:
+        """写出二进制快照"""
+        string_index: Dict[str, int] = {}
+        strings: List[str] = []
+
+        def ref(value: Optional[str]) -> int:
+            if value is None:
+                return -1
+            if value not in string_index:
+                string_index[value] = len(strings)
+                strings.append(value)
+            return string_index[value]
+
+        node_index = {id(node): i for i, node in enumerate(self.nodes)}
+        node_rows = [
+            _NODE.pack(
+                ref(node.code),
+                ref(node.name),
+                ref(node.desc),
+                node_index[id(node.parent)] if node.parent is not None else -1,
+            )
+            for node in self.nodes
+        ]
+        api_rows = [
+            _API.pack(
+                ref(api.api_id),
+                ref(api.method),
+                ref(api.path),
+                ref(api.title),
+                ref(api.uri_method),
+                ref(api.operation_id),
+                api.history_count,
+                api.spi_count,
+                node_index[id(api.node)],
+            )
+            for api in self.apis
+        ]
+        ends = []
+        total = 0
+        for value in strings:
+            total += len(value)
+            ends.append(total)
+        blob = "".join(strings).encode("utf-8")
+
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    SNAPSHOT_MAGIC,
+                    SNAPSHOT_VERSION,
+                    len(strings),
+                    len(self.nodes),
+                    len(self.apis),
+                )
+            )
+            f.write(struct.pack(f"<{len(ends)}I", *ends))
+            f.write(struct.pack("<I", len(blob)))
+            f.write(blob)
+            f.writelines(node_rows)
+            f.writelines(api_rows)
+        os.replace(tmp_path, snapshot_path)
+
+    @classmethod
+    def load(
+        cls,
+        json_path: str = Config.PRODUCT_TREE_PATH,
+        snapshot_path: Optional[str] = None,
+    ) -> "ProductTree":
+        """
+        加载产品目录树：快照存在且不早于JSON文件时读取快照，否则解析JSON
+
+        Args:
+            json_path: 产品目录树JSON文件路径
+            snapshot_path: 二进制快照路径，默认为JSON文件同名的 .bin 文件
+        """
+        snapshot_path = snapshot_path or os.path.splitext(json_path)[0] + ".bin"
+        try:
+            if os.path.getmtime(snapshot_path) >= os.path.getmtime(json_path):
+                return cls.from_snapshot(snapshot_path)
+        except (OSError, ValueError, struct.error):
+            pass
+        return cls.from_json(json_path)
+
+
+_default_tree: Optional[ProductTree] = None
+_default_lock = threading.Lock()
+
+
+def get_product_tree() -> ProductTree:
+    """获取默认产品目录树（进程内只加载一次），文件不存在时返回空树"""
+    global _default_tree  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_tree is None:
+            try:
+                _default_tree = ProductTree.load()
+            except (OSError, ValueError) as e:
+                print(f"加载产品目录树失败：{str(e)}")
+                _default_tree = ProductTree()
+        return _default_tree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="YOP MCP 产品目录树工具")
+    parser.add_argument("command", choices=["build-snapshot"])
+    parser.add_argument("--json", default=Config.PRODUCT_TREE_PATH)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.json)[0] + ".bin"
+    tree = ProductTree.from_json(args.json)
+    tree.write_snapshot(output)
+    print(f"已写出快照 {output}: {len(tree.nodes)} 个节点, {len(tree.apis)} 个API")
+
+
+if __name__ == "__main__":
+    main()
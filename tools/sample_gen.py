@@ -0,0 +1,324 @@
+"""
+SDK调用示例生成
+功能：根据结构化的API定义（见 api_spec）生成 Java、PHP、.NET、TypeScript、Node.js、Python、Go
+各语言SDK的调用示例代码。各语言模板在模块加载时编译一次，生成时只做参数替换，
+API定义已缓存时不需要网络请求，也不消耗大模型token
+"""
+
+import json
+import re
+from string import Template
+from typing import Any, Callable, Dict, List
+
+from tools.metrics import Metrics
+
+
+class _SampleTemplate(Template):
+    """以 @ 为占位符前缀（PHP、Go 等代码中大量出现 $）"""
+
+    delimiter = "@"
+
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_DESCRIPTION_LIMIT = 40
+
+
+def _double_quote(value: str) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _single_quote(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _object_key(name: str, quote: Callable[[str], str]) -> str:
+    return name if _IDENTIFIER_RE.match(name) else quote(name)
+
+
+# 各语言的SDK、字符串字面量写法、行尾注释前缀、完整代码模板、参数行模板及请求方式对应的调用方法；
+# param 为表单参数行，json 为JSON请求体行（为None时以对象字面量传参，调用方法区分JSON请求）
+_LANGUAGES: Dict[str, Dict[str, Any]] = {
+    "java": {
+        "sdk": "yop-java-sdk",
+        "quote": _double_quote,
+        "comment": " // ",
+        "param": _SampleTemplate(
+            "        request.addParameter(@name, @value);@comment"
+        ),
+        "json": _SampleTemplate("        request.setContent(@body);"),
+        "calls": {},
+        "template": _SampleTemplate(
+            """import com.yeepay.yop.sdk.service.common.YopClient;
+import com.yeepay.yop.sdk.service.common.YopClientBuilder;
+import com.yeepay.yop.sdk.service.common.request.YopRequest;
+import com.yeepay.yop.sdk.service.common.response.YopResponse;
+
+public class YopSample {
+
+    // @title
+    public static void main(String[] args) throws Exception {
+        YopClient yopClient = YopClientBuilder.builder().build();
+        YopRequest request = new YopRequest(@path, @method);
+@params
+        YopResponse response = yopClient.request(request);
+        System.out.println(response.getStringResult());
+    }
+}
+"""
+        ),
+    },
+    "php": {
+        "sdk": "yop-php-sdk",
+        "quote": _single_quote,
+        "comment": " // ",
+        "param": _SampleTemplate("$request->addParam(@name, @value);@comment"),
+        "json": _SampleTemplate("$request->setContent(@body);"),
+        "calls": {"GET": "get", "POST": "post", "JSON": "post"},
+        "template": _SampleTemplate("""<?php
+require_once './lib/YopRequest.php';
+require_once './lib/YopRsaClient.php';
+
+// @title
+$request = new YopRequest('app_xxx', getenv('YOP_APP_PRIVATE_KEY'));
+@params
+$response = YopRsaClient::@call(@path, $request);
+print_r($response);
+"""),
+    },
+    "dotnet": {
+        "sdk": "yop-dotnet-sdk",
+        "quote": _double_quote,
+        "comment": " // ",
+        "param": _SampleTemplate("request.addParam(@name, @value);@comment"),
+        "json": _SampleTemplate("request.setContent(@body);"),
+        "calls": {"GET": "get", "POST": "post", "JSON": "post"},
+        "template": _SampleTemplate("""using System;
+using SDK.yop.client;
+
+// @title
+YopRequest request = new YopRequest("app_xxx", Environment.GetEnvironmentVariable("YOP_APP_PRIVATE_KEY"));
+@params
+YopResponse response = YopRsaClient.@call(@path, request);
+Console.WriteLine(response.result);
+"""),
+    },
+    "typescript": {
+        "sdk": "yop-typescript-sdk",
+        "quote": _single_quote,
+        "comment": " // ",
+        "param": _SampleTemplate("  @key: @value,@comment"),
+        "json": None,
+        "calls": {"GET": "get", "POST": "post", "JSON": "postJson"},
+        "template": _SampleTemplate("""import { YopClient } from 'yop-typescript-sdk';
+
+// @title
+const yopClient = new YopClient({
+  appKey: 'app_xxx',
+  appPrivateKey: process.env.YOP_APP_PRIVATE_KEY ?? '',
+});
+
+const params = {
+@params
+};
+
+const response = await yopClient.@call(@path, params);
+console.log(response);
+"""),
+    },
+    "nodejs": {
+        "sdk": "yop-nodejs-sdk",
+        "quote": _single_quote,
+        "comment": " // ",
+        "param": _SampleTemplate("  @key: @value,@comment"),
+        "json": None,
+        "calls": {"GET": "get", "POST": "post", "JSON": "postJson"},
+        "template": _SampleTemplate("""const { YopClient } = require('yop-nodejs-sdk');
+
+// @title
+const yopClient = new YopClient({
+  appKey: 'app_xxx',
+  appPrivateKey: process.env.YOP_APP_PRIVATE_KEY,
+});
+
+const params = {
+@params
+};
+
+yopClient
+  .@call(@path, params)
+  .then((response) => console.log(response))
+  .catch((error) => console.error(error));
+"""),
+    },
+    "python": {
+        "sdk": "yop-python-sdk",
+        "quote": _double_quote,
+        "comment": "  # ",
+        "param": _SampleTemplate("    @name: @value,@comment"),
+        "json": None,
+        "calls": {"GET": "get", "POST": "post", "JSON": "post_json"},
+        "template": _SampleTemplate(
+            """from client.yop_client_config import YopClientConfig
+from client.yopclient import YopClient
+
+# @title
+client_config = YopClientConfig(config_file="config/yop_sdk_config_rsa_prod.json")
+yop_client = YopClient(client_config)
+
+params = {
+@params
+}
+response = yop_client.@call(@path, params)
+print(response)
+"""
+        ),
+    },
+    "go": {
+        "sdk": "yop-go-sdk",
+        "quote": _double_quote,
+        "comment": " // ",
+        "param": _SampleTemplate("\tyopRequest.AddParam(@name, @value)@comment"),
+        "json": _SampleTemplate("\tyopRequest.Content = @body"),
+        "calls": {"GET": "GET_HTTP_METHOD", "POST": "POST_HTTP_METHOD"},
+        "template": _SampleTemplate("""package main
+
+import (
+\t"fmt"
+\t"os"
+
+\t"github.com/yop-platform/yop-go-sdk/yop/client"
+\t"github.com/yop-platform/yop-go-sdk/yop/constants"
+\t"github.com/yop-platform/yop-go-sdk/yop/request"
+)
+
+// @title
+func main() {
+\tvar priKey = request.IsvPriKey{Value: os.Getenv("YOP_APP_PRIVATE_KEY"), CertType: request.RSA2048}
+\tvar yopRequest = request.NewYopRequest(constants.@call, @path)
+\tyopRequest.AppId = "app_xxx"
+\tyopRequest.IsvPriKey = priKey
+@params
+\tyopResp, err := client.DefaultClient.Request(yopRequest)
+\tif err != nil {
+\t\tfmt.Println(err)
+\t\treturn
+\t}
+\tfmt.Println(yopResp.Result)
+}
+"""),
+    },
+}
+
+LANGUAGE_ALIASES = {
+    "java": "java",
+    "php": "php",
+    "dotnet": "dotnet",
+    ".net": "dotnet",
+    "net": "dotnet",
+    "c#": "dotnet",
+    "csharp": "dotnet",
+    "typescript": "typescript",
+    "ts": "typescript",
+    "nodejs": "nodejs",
+    "node": "nodejs",
+    "node.js": "nodejs",
+    "javascript": "nodejs",
+    "js": "nodejs",
+    "python": "python",
+    "py": "python",
+    "go": "go",
+    "golang": "go",
+}
+
+
+def _example_value(param: Dict[str, Any]) -> Any:
+    example = param.get("example")
+    if example:
+        return example
+    param_type = (param.get("type") or "").lower()
+    if "object" in param_type or "map" in param_type:
+        return {}
+    if "array" in param_type or "list" in param_type:
+        return []
+    return ""
+
+
+def _comment(param: Dict[str, Any], prefix: str) -> str:
+    parts = []
+    if param.get("required"):
+        parts.append("必填")
+    description = param.get("description") or ""
+    if len(description) > _DESCRIPTION_LIMIT:
+        description = description[:_DESCRIPTION_LIMIT] + "…"
+    if description:
+        parts.append(description)
+    return prefix + " ".join(parts) if parts else ""
+
+
+def _literal(value: Any, quote: Callable[[str], str]) -> str:
+    if isinstance(value, str):
+        return quote(value)
+    # 对象/数组参数以JSON字符串传递
+    return quote(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+
+def render_sample(spec: Dict[str, Any], language: str) -> Dict[str, Any]:
+    """
+    根据API定义生成SDK调用示例代码
+
+    Args:
+        spec: 结构化的API定义（见 api_spec.parse_api_spec）
+        language: 语言，java、php、dotnet、typescript、nodejs、python、go（支持 c#、ts、node、golang 等别名）
+
+    Returns:
+        Dict[str, Any]: 包含 message、language、sdk、method、path 及 code
+    """
+    key = LANGUAGE_ALIASES.get(language.strip().lower())
+    if key is None:
+        return {
+            "message": f"不支持的语言: {language}，可选值: " + "、".join(_LANGUAGES)
+        }
+    if not spec.get("path"):
+        return {"message": "API定义中缺少请求路径，无法生成示例代码"}
+
+    config = _LANGUAGES[key]
+    quote: Callable[[str], str] = config["quote"]
+    method = (spec.get("method") or "POST").split(",")[0].strip().upper()
+    is_json = "json" in (spec.get("contentType") or "").lower()
+    # 只填写顶层参数，嵌套参数由对象参数的值表示
+    params = [p for p in spec.get("requestParams", []) if not p.get("level")]
+
+    lines: List[str] = []
+    if is_json and config["json"] is not None:
+        body = {param["name"]: _example_value(param) for param in params}
+        lines.append(
+            config["json"].substitute(body=quote(json.dumps(body, ensure_ascii=False)))
+        )
+    else:
+        for param in params:
+            lines.append(
+                config["param"].substitute(
+                    name=quote(param["name"]),
+                    key=_object_key(param["name"], quote),
+                    value=_literal(_example_value(param), quote),
+                    comment=_comment(param, config["comment"]),
+                )
+            )
+
+    call_key = "JSON" if is_json and "JSON" in config["calls"] else method
+    code = config["template"].substitute(
+        title=spec.get("title") or spec["path"],
+        path=quote(spec["path"]),
+        method=quote(method),
+        call=config["calls"].get(call_key, config["calls"].get("POST", "post")),
+        params="\n".join(lines),
+    )
+    Metrics.incr(f"sample_gen.{key}")
+    return {
+        "message": "示例代码生成成功",
+        "language": key,
+        "sdk": config["sdk"],
+        "method": method,
+        "path": spec["path"],
+        "code": code,
+    }
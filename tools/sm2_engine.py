@@ -0,0 +1,446 @@
+"""
+SM2国密算法引擎
+功能：基于 gmssl 提供的SM2曲线参数及SM3摘要，实现SM2密钥生成、SM3withSM2签名及验签。
+基点G的倍点运算使用预计算的固定窗口表（64×15个仿射点），签名时无需倍点运算；
+公钥同样在首次使用时建立倍点表并以有界LRU缓存，重复验签同一公钥时只需点加运算。
+密钥以PKCS8/SubjectPublicKeyInfo(DER)编码，签名以DER编码的(r, s)表示
+"""
+
+import base64
+import secrets
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from Cryptodome.Util.asn1 import (
+    DerBitString,
+    DerInteger,
+    DerObjectId,
+    DerOctetString,
+    DerSequence,
+)
+from gmssl import sm3
+from gmssl.sm2 import default_ecc_table
+
+from tools.config import Config
+from tools.metrics import Metrics
+
+P = int(default_ecc_table["p"], 16)
+N = int(default_ecc_table["n"], 16)
+A = int(default_ecc_table["a"], 16)
+B = int(default_ecc_table["b"], 16)
+GX = int(default_ecc_table["g"][:64], 16)
+GY = int(default_ecc_table["g"][64:], 16)
+
+# 默认用户身份标识（GM/T 0009）
+DEFAULT_UID = b"1234567812345678"
+EC_PUBLIC_KEY_OID = "1.2.840.10045.2.1"
+SM2_CURVE_OID = "1.2.156.10197.1.301"
+SM3_WITH_SM2_OID = "1.2.156.10197.1.501"
+
+_WINDOW_BITS = 4
+_WINDOWS = 256 // _WINDOW_BITS
+
+Point = Tuple[int, int]
+_Jacobian = Tuple[int, int, int]
+
+
+# ------------------------------------------------------------------ 曲线运算
+def _double(point: _Jacobian) -> _Jacobian:
+    """Jacobian坐标倍点（a = -3）"""
+    x, y, z = point
+    if not y or not z:
+        return (1, 1, 0)
+    delta = z * z % P
+    gamma = y * y % P
+    beta = x * gamma % P
+    alpha = 3 * (x - delta) * (x + delta) % P
+    x3 = (alpha * alpha - 8 * beta) % P
+    z3 = ((y + z) * (y + z) - gamma - delta) % P
+    y3 = (alpha * (4 * beta - x3) - 8 * gamma * gamma) % P
+    return (x3, y3, z3)
+
+
+def _add(p1: _Jacobian, p2: _Jacobian) -> _Jacobian:
+    """Jacobian坐标点加"""
+    x1, y1, z1 = p1
+    x2, y2, z2 = p2
+    if not z1:
+        return p2
+    if not z2:
+        return p1
+    z1z1 = z1 * z1 % P
+    z2z2 = z2 * z2 % P
+    u1 = x1 * z2z2 % P
+    u2 = x2 * z1z1 % P
+    s1 = y1 * z2 * z2z2 % P
+    s2 = y2 * z1 * z1z1 % P
+    h = (u2 - u1) % P
+    r = (s2 - s1) % P
+    if not h:
+        return _double(p1) if not r else (1, 1, 0)
+    hh = h * h % P
+    hhh = h * hh % P
+    v = u1 * hh % P
+    x3 = (r * r - hhh - 2 * v) % P
+    y3 = (r * (v - x3) - s1 * hhh) % P
+    z3 = z1 * z2 * h % P
+    return (x3, y3, z3)
+
+
+def _add_affine(p1: _Jacobian, p2: Point) -> _Jacobian:
+    """Jacobian坐标点与仿射坐标点相加"""
+    x1, y1, z1 = p1
+    if not z1:
+        return (p2[0], p2[1], 1)
+    x2, y2 = p2
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    h = (u2 - x1) % P
+    r = (s2 - y1) % P
+    if not h:
+        return _double(p1) if not r else (1, 1, 0)
+    hh = h * h % P
+    hhh = h * hh % P
+    v = x1 * hh % P
+    x3 = (r * r - hhh - 2 * v) % P
+    y3 = (r * (v - x3) - y1 * hhh) % P
+    z3 = z1 * h % P
+    return (x3, y3, z3)
+
+
+def _to_affine(points: List[_Jacobian]) -> List[Point]:
+    """批量转换为仿射坐标（Montgomery批量求逆，只做一次模逆运算）"""
+    prefix = []
+    acc = 1
+    for _, _, z in points:
+        prefix.append(acc)
+        acc = acc * z % P
+    inv = pow(acc, -1, P)
+    result: List[Point] = [(0, 0)] * len(points)
+    for index in range(len(points) - 1, -1, -1):
+        x, y, z = points[index]
+        z_inv = inv * prefix[index] % P
+        inv = inv * z % P
+        z_inv2 = z_inv * z_inv % P
+        result[index] = (x * z_inv2 % P, y * z_inv2 * z_inv % P)
+    return result
+
+
+def is_on_curve(point: Point) -> bool:
+    """检查点是否在SM2曲线上"""
+    x, y = point
+    return 0 <= x < P and 0 <= y < P and (y * y - x * x * x - A * x - B) % P == 0
+
+
+class _PointTable:
+    """固定窗口倍点表：rows[i][j-1] = j·2^(4i)·Q"""
+
+    def __init__(self, point: Point):
+        base: _Jacobian = (point[0], point[1], 1)
+        jacobians = []
+        for _ in range(_WINDOWS):
+            row = [base]
+            for _ in range(14):
+                row.append(_add(row[-1], base))
+            jacobians.extend(row)
+            # 下一行的基点为当前基点的16倍
+            base = _add(row[-1], base)
+        affine = _to_affine(jacobians)
+        self.rows = [affine[i * 15 : (i + 1) * 15] for i in range(_WINDOWS)]
+
+    def multiply(self, k: int) -> _Jacobian:
+        acc: _Jacobian = (1, 1, 0)
+        for row in self.rows:
+            digit = k & 15
+            if digit:
+                acc = _add_affine(acc, row[digit - 1])
+            k >>= _WINDOW_BITS
+        return acc
+
+
+_g_table: Optional[_PointTable] = None
+_g_lock = threading.Lock()
+_point_tables: "OrderedDict[Point, _PointTable]" = OrderedDict()
+_point_lock = threading.Lock()
+
+
+def _base_table() -> _PointTable:
+    global _g_table  # pylint: disable=global-statement
+    with _g_lock:
+        if _g_table is None:
+            _g_table = _PointTable((GX, GY))
+        return _g_table
+
+
+def _point_table(point: Point) -> _PointTable:
+    with _point_lock:
+        table = _point_tables.get(point)
+        if table is not None:
+            _point_tables.move_to_end(point)
+            Metrics.incr("sm2.table_hits")
+            return table
+    Metrics.incr("sm2.table_misses")
+    table = _PointTable(point)
+    with _point_lock:
+        _point_tables[point] = table
+        while len(_point_tables) > Config.KEY_CACHE_SIZE:
+            _point_tables.popitem(last=False)
+    return table
+
+
+def base_multiply(k: int) -> Point:
+    """计算 k·G（使用预计算表）"""
+    return _to_affine([_base_table().multiply(k % N)])[0]
+
+
+# ------------------------------------------------------------------ 密钥
+class Sm2PublicKey:
+    """SM2公钥"""
+
+    def __init__(self, point: Point):
+        if not is_on_curve(point):
+            raise ValueError("公钥不在SM2曲线上")
+        self.point = point
+        self._z_values: dict = {}
+
+    def z_value(self, uid: bytes = DEFAULT_UID) -> bytes:
+        """计算 Z = SM3(ENTL || ID || a || b || xG || yG || xA || yA)，按ID缓存"""
+        z = self._z_values.get(uid)
+        if z is None:
+            data = (
+                (len(uid) * 8).to_bytes(2, "big")
+                + uid
+                + b"".join(
+                    value.to_bytes(32, "big")
+                    for value in (A, B, GX, GY, self.point[0], self.point[1])
+                )
+            )
+            z = sm3_digest(data)
+            self._z_values[uid] = z
+        return z
+
+    def to_bytes(self) -> bytes:
+        """未压缩点编码 04 || x || y"""
+        return (
+            b"\x04"
+            + self.point[0].to_bytes(32, "big")
+            + self.point[1].to_bytes(32, "big")
+        )
+
+    def to_der(self) -> bytes:
+        """SubjectPublicKeyInfo(DER)编码"""
+        algorithm = DerSequence(
+            [
+                DerObjectId(EC_PUBLIC_KEY_OID).encode(),
+                DerObjectId(SM2_CURVE_OID).encode(),
+            ]
+        )
+        return DerSequence(
+            [algorithm.encode(), DerBitString(self.to_bytes()).encode()]
+        ).encode()
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_der()).decode("utf-8")
+
+    def verify(self, signature: bytes, data: bytes, uid: bytes = DEFAULT_UID) -> bool:
+        """验证DER编码的SM3withSM2签名"""
+        try:
+            r, s = decode_signature(signature)
+        except ValueError:
+            return False
+        if not (1 <= r < N and 1 <= s < N):
+            return False
+        t = (r + s) % N
+        if not t:
+            return False
+        e = int.from_bytes(sm3_digest(self.z_value(uid) + data), "big")
+        point = _add(_base_table().multiply(s), _point_table(self.point).multiply(t))
+        if not point[2]:
+            return False
+        x1 = _to_affine([point])[0][0]
+        Metrics.incr("sm2.verified")
+        return (e + x1) % N == r
+
+
+class Sm2PrivateKey:
+    """SM2私钥"""
+
+    def __init__(self, d: int, point: Optional[Point] = None):
+        if not 1 <= d < N - 1:
+            raise ValueError("SM2私钥超出范围")
+        self.d = d
+        self._public_key = Sm2PublicKey(point or base_multiply(d))
+        # 签名时使用的 (1 + d)^-1 mod n
+        self._inv_1_d = pow(1 + d, -1, N)
+
+    def public_key(self) -> Sm2PublicKey:
+        return self._public_key
+
+    def to_der(self) -> bytes:
+        """PKCS8(DER)编码，内含 ECPrivateKey 及公钥"""
+        ec_private_key = DerSequence(
+            [
+                1,
+                DerOctetString(self.d.to_bytes(32, "big")).encode(),
+                DerBitString(self._public_key.to_bytes(), explicit=1).encode(),
+            ]
+        )
+        algorithm = DerSequence(
+            [
+                DerObjectId(EC_PUBLIC_KEY_OID).encode(),
+                DerObjectId(SM2_CURVE_OID).encode(),
+            ]
+        )
+        return DerSequence(
+            [0, algorithm.encode(), DerOctetString(ec_private_key.encode()).encode()]
+        ).encode()
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_der()).decode("utf-8")
+
+    def sign(self, data: bytes, uid: bytes = DEFAULT_UID) -> bytes:
+        """计算SM3withSM2签名，返回DER编码的(r, s)"""
+        e = int.from_bytes(sm3_digest(self._public_key.z_value(uid) + data), "big")
+        table = _base_table()
+        while True:
+            k = secrets.randbelow(N - 1) + 1
+            x1 = _to_affine([table.multiply(k)])[0][0]
+            r = (e + x1) % N
+            if not r or r + k == N:
+                continue
+            s = self._inv_1_d * (k - r * self.d) % N
+            if s:
+                Metrics.incr("sm2.signed")
+                return encode_signature(r, s)
+
+
+def generate_private_key() -> Sm2PrivateKey:
+    """生成SM2私钥"""
+    return Sm2PrivateKey(secrets.randbelow(N - 2) + 1)
+
+
+# ------------------------------------------------------------------ 编码
+def sm3_digest(data: bytes) -> bytes:
+    """计算SM3摘要"""
+    return bytes.fromhex(sm3.sm3_hash(list(data)))
+
+
+def encode_signature(r: int, s: int) -> bytes:
+    return DerSequence([DerInteger(r).encode(), DerInteger(s).encode()]).encode()
+
+
+def decode_signature(signature: bytes) -> Tuple[int, int]:
+    """解析DER编码的签名，兼容64字节 r || s 格式"""
+    if len(signature) == 64:
+        return int.from_bytes(signature[:32], "big"), int.from_bytes(
+            signature[32:], "big"
+        )
+    seq = DerSequence()
+    seq.decode(signature, strict=True)
+    if len(seq) != 2:
+        raise ValueError("签名格式错误")
+    return int(seq[0]), int(seq[1])
+
+
+def _decode_point(data: bytes) -> Point:
+    if len(data) != 65 or data[0] != 4:
+        raise ValueError("仅支持未压缩格式的SM2公钥")
+    return int.from_bytes(data[1:33], "big"), int.from_bytes(data[33:], "big")
+
+
+def _check_algorithm(algorithm_der: bytes) -> None:
+    algorithm = DerSequence()
+    algorithm.decode(algorithm_der)
+    oids = [DerObjectId().decode(item).value for item in algorithm]
+    if oids != [EC_PUBLIC_KEY_OID, SM2_CURVE_OID]:
+        raise ValueError("不是SM2密钥")
+
+
+def public_key_from_der(der: bytes) -> Sm2PublicKey:
+    """解析SubjectPublicKeyInfo(DER)编码的SM2公钥"""
+    spki = DerSequence()
+    try:
+        spki.decode(der, nr_elements=2)
+        _check_algorithm(spki[0])
+        point = _decode_point(DerBitString().decode(spki[1]).value)
+    except (TypeError, IndexError) as e:
+        raise ValueError(f"SM2公钥格式错误: {e}") from e
+    return Sm2PublicKey(point)
+
+
+def private_key_from_der(der: bytes) -> Sm2PrivateKey:
+    """解析PKCS8(DER)编码的SM2私钥"""
+    pkcs8 = DerSequence()
+    ec_private_key = DerSequence()
+    try:
+        pkcs8.decode(der)
+        _check_algorithm(pkcs8[1])
+        ec_private_key.decode(DerOctetString().decode(pkcs8[2]).payload)
+        d = int.from_bytes(DerOctetString().decode(ec_private_key[1]).payload, "big")
+    except (TypeError, IndexError) as e:
+        raise ValueError(f"SM2私钥格式错误: {e}") from e
+    if not 0 < d < N - 1:
+        raise ValueError("SM2私钥超出取值范围")
+    return Sm2PrivateKey(d)
+
+
+def public_key_from_certificate(cert_der: bytes) -> Sm2PublicKey:
+    """从DER编码的X.509证书中提取SM2公钥"""
+    certificate = DerSequence()
+    certificate.decode(cert_der)
+    tbs = DerSequence()
+    tbs.decode(certificate[0])
+    # version 为 [0] EXPLICIT，存在时 SubjectPublicKeyInfo 为第7个字段
+    index = 6 if tbs[0][0] == 0xA0 else 5
+    return public_key_from_der(tbs[index])
+
+
+_key_objects: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+_key_lock = threading.Lock()
+
+
+def _load_cached(kind: str, key_b64: str, parse) -> object:
+    key_b64 = "".join(key_b64.split())
+    cache_key = (kind, key_b64)
+    with _key_lock:
+        key = _key_objects.get(cache_key)
+        if key is not None:
+            _key_objects.move_to_end(cache_key)
+            return key
+    key = parse(base64.b64decode(key_b64))
+    with _key_lock:
+        _key_objects[cache_key] = key
+        while len(_key_objects) > Config.KEY_CACHE_SIZE:
+            _key_objects.popitem(last=False)
+    return key
+
+
+def load_private_key(key_b64: str) -> Sm2PrivateKey:
+    """解析Base64编码的PKCS8 SM2私钥（有界缓存）"""
+    return _load_cached("private", key_b64, private_key_from_der)  # type: ignore
+
+
+def load_public_key(key_b64: str) -> Sm2PublicKey:
+    """解析Base64编码的SubjectPublicKeyInfo SM2公钥（有界缓存）"""
+    return _load_cached("public", key_b64, public_key_from_der)  # type: ignore
+
+
+def build_csr(private_key: Sm2PrivateKey, subject_der: bytes) -> bytes:
+    """
+    生成SM3withSM2签名的PKCS#10证书请求
+
+    Args:
+        private_key: SM2私钥
+        subject_der: DER编码的主题名称（如 x509.Name(...).public_bytes()）
+
+    Returns:
+        bytes: DER编码的证书请求
+    """
+    info = DerSequence(
+        [0, subject_der, private_key.public_key().to_der(), b"\xa0\x00"]
+    ).encode()
+    algorithm = DerSequence([DerObjectId(SM3_WITH_SM2_OID).encode()]).encode()
+    signature = DerBitString(private_key.sign(info)).encode()
+    return DerSequence([info, algorithm, signature]).encode()
@@ -0,0 +1,300 @@
+"""
+YOP请求签名工具
+功能：按 yop-auth-v3 协议生成请求的规范请求串(canonical request)及 Authorization 等鉴权请求头，
+支持 RSA(SHA256withRSA) 及 SM2(SM3withSM2) 签名。
+解析后的私钥对象通过密钥缓存复用，参数名、请求头名及请求路径的URI编码结果以有界LRU缓存复用，
+批量签名时同一私钥只解析一次
+"""
+
+import base64
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from tools import key_cache, sm2_engine
+from tools.keystore import get_keystore, is_keystore_ref
+from tools.metrics import Metrics
+
+PROTOCOL_VERSION = "yop-auth-v3"
+DEFAULT_EXPIRED_SECONDS = 1800
+MAX_BATCH_REQUESTS = 10000
+# 参与签名的请求头，按ASCII顺序排列
+SIGNED_HEADERS = ("x-yop-appkey", "x-yop-content-sha256", "x-yop-request-id")
+# 算法到安全需求(securityReq)及签名后缀的映射
+SECURITY_REQS = {
+    "RSA": ("YOP-RSA2048-SHA256", "$SHA256"),
+    "SM2": ("YOP-SM2-SM3", "$SM3"),
+}
+
+
+# 只缓存较短的参数名、请求头名及请求路径；参数值、请求头的值可能包含敏感数据，每次直接编码不进入缓存
+_NAME_CACHE_SIZE = 1024
+_MAX_CACHED_NAME_LENGTH = 256
+
+
+def uri_encode(value: str, encode_slash: bool = True) -> str:
+    """按RFC 3986对字符串做百分号编码，仅保留非保留字符 A-Z a-z 0-9 - _ . ~"""
+    return quote(value, safe="" if encode_slash else "/")
+
+
+_uri_encode_cached = lru_cache(maxsize=_NAME_CACHE_SIZE)(uri_encode)
+
+
+def _encode_name(name: str, encode_slash: bool = True) -> str:
+    """编码参数名、请求头名或请求路径，较短时复用缓存的结果"""
+    if len(name) > _MAX_CACHED_NAME_LENGTH:
+        return uri_encode(name, encode_slash)
+    return _uri_encode_cached(name, encode_slash)
+
+
+def canonical_query_string(params: Optional[Dict[str, Any]]) -> str:
+    """
+    生成规范查询串：参数名、参数值分别URI编码后按 "名=值" 排序，以 & 连接
+
+    值为列表时展开为多个同名参数，值为None的参数不参与签名
+    """
+    pairs = []
+    for name, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            if item is None:
+                continue
+            pairs.append(f"{_encode_name(str(name))}={uri_encode(str(item).strip())}")
+    return "&".join(sorted(pairs))
+
+
+def content_sha256(
+    method: str, params: Optional[Dict[str, Any]], body: Optional[str]
+) -> str:
+    """计算请求内容摘要：JSON请求为报文体，POST表单请求为规范参数串，GET请求为空串"""
+    if body is not None:
+        payload = body
+    elif method == "POST":
+        payload = canonical_query_string(params)
+    else:
+        payload = ""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _canonical_headers(headers: Dict[str, str]) -> str:
+    return "\n".join(
+        sorted(
+            f"{_encode_name(name.strip().lower())}:{uri_encode(value.strip())}"
+            for name, value in headers.items()
+        )
+    )
+
+
+def _rsa_signer(private_key: Any) -> Callable[[bytes], bytes]:
+    if not isinstance(private_key, rsa.RSAPrivateKey):
+        raise ValueError("私钥不是RSA私钥")
+    return lambda data: private_key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+
+
+def _sm2_signer(private_key: Any) -> Callable[[bytes], bytes]:
+    if not isinstance(private_key, sm2_engine.Sm2PrivateKey):
+        raise ValueError("私钥不是SM2私钥")
+    return private_key.sign
+
+
+# 算法到签名函数构造器的映射
+_SIGNER_FACTORIES: Dict[str, Callable[[Any], Callable[[bytes], bytes]]] = {
+    "RSA": _rsa_signer,
+    "SM2": _sm2_signer,
+}
+
+
+def load_signing_key(private_key: str, algorithm: str = "RSA") -> Any:
+    """
+    解析签名私钥：支持Base64编码的私钥字符串、./keys/ 下保存私钥字符串的文件路径，
+    或密钥库引用 keystore:<别名或指纹>（使用密钥库缓存的私钥对象）；
+    SM2私钥由SM2引擎解析（cryptography 不支持SM2曲线）
+
+    Raises:
+        ValueError: 私钥为空或无法解析，密钥库未解锁或不存在该密钥
+    """
+    private_key = private_key.strip()
+    if not private_key:
+        raise ValueError("私钥不能为空")
+    if is_keystore_ref(private_key):
+        return get_keystore().load_private_key(private_key)
+    if os.path.isfile(private_key):
+        with open(private_key, "r", encoding="utf-8") as f:
+            private_key = f.read()
+    private_key = "".join(private_key.split())
+    if algorithm.upper() == "SM2":
+        return sm2_engine.load_private_key(private_key)
+    return key_cache.load_private_key(private_key)
+
+
+def _build_signer(algorithm: str, private_key: str) -> Tuple[str, str, Callable]:
+    algorithm = algorithm.upper()
+    if algorithm not in _SIGNER_FACTORIES:
+        raise ValueError(f"不支持的签名算法: {algorithm}")
+    security_req, suffix = SECURITY_REQS[algorithm]
+    return (
+        security_req,
+        suffix,
+        _SIGNER_FACTORIES[algorithm](load_signing_key(private_key, algorithm)),
+    )
+
+
+def _sign_one(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    signer: Tuple[str, str, Callable],
+    app_key: str,
+    method: str,
+    uri: str,
+    params: Optional[Dict[str, Any]] = None,
+    body: Optional[Any] = None,
+    request_id: Optional[str] = None,
+    timestamp: Optional[str] = None,
+    expired_seconds: int = DEFAULT_EXPIRED_SECONDS,
+) -> Dict[str, Any]:
+    security_req, suffix, sign = signer
+    method = method.strip().upper()
+    if not uri or not uri.strip():
+        raise ValueError("请求路径不能为空")
+    if body is not None and not isinstance(body, str):
+        body = json.dumps(body, ensure_ascii=False, separators=(",", ":"))
+    timestamp = timestamp or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    request_id = request_id or str(uuid.uuid4())
+
+    auth_string = f"{PROTOCOL_VERSION}/{app_key}/{timestamp}/{expired_seconds}"
+    headers = {
+        "x-yop-appkey": app_key,
+        "x-yop-content-sha256": content_sha256(method, params, body),
+        "x-yop-request-id": request_id,
+    }
+    # POST请求的参数已包含在内容摘要中，规范查询串为空
+    query = "" if method == "POST" else canonical_query_string(params)
+    canonical_request = "\n".join(
+        [
+            auth_string,
+            method,
+            _encode_name(uri.strip(), encode_slash=False),
+            query,
+            _canonical_headers(headers),
+        ]
+    )
+    signature = (
+        base64.urlsafe_b64encode(sign(canonical_request.encode("utf-8")))
+        .decode("ascii")
+        .rstrip("=")
+    )
+    headers["Authorization"] = (
+        f"{security_req} {auth_string}/{';'.join(SIGNED_HEADERS)}/{signature}{suffix}"
+    )
+    Metrics.incr("yop_signer.signed")
+    return {"headers": headers, "canonicalRequest": canonical_request}
+
+
+def sign_request(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    app_key: str,
+    method: str,
+    uri: str,
+    private_key: str,
+    params: Optional[Dict[str, Any]] = None,
+    body: Optional[Any] = None,
+    algorithm: str = "RSA",
+    request_id: Optional[str] = None,
+    timestamp: Optional[str] = None,
+    expired_seconds: int = DEFAULT_EXPIRED_SECONDS,
+) -> Dict[str, Any]:
+    """
+    为单个YOP请求生成鉴权请求头
+
+    Args:
+        app_key: 应用标识(appKey)
+        method: 请求方法，GET或POST
+        uri: 请求路径，如 /rest/v1.0/aggpay/pre-pay
+        private_key: Base64编码的商户私钥，或保存私钥的文件路径
+        params: 请求参数（表单或查询参数）
+        body: JSON请求的报文体（字符串或可序列化对象），为None时按表单请求签名
+        algorithm: 签名算法，支持 RSA 及 SM2
+        request_id: 请求标识，为空时自动生成
+        timestamp: ISO 8601格式的请求时间，为空时使用当前UTC时间
+        expired_seconds: 签名有效时长（秒）
+
+    Returns:
+        Dict[str, Any]: 包含 message、headers（需附加到请求上的鉴权请求头）及 canonicalRequest
+    """
+    try:
+        signer = _build_signer(algorithm, private_key)
+        result = _sign_one(
+            signer,
+            app_key,
+            method,
+            uri,
+            params,
+            body,
+            request_id,
+            timestamp,
+            expired_seconds,
+        )
+    except (ValueError, TypeError, OSError) as e:
+        return {"message": f"请求签名失败: {str(e)}"}
+    return {"message": "签名成功", **result}
+
+
+def sign_requests_batch(
+    app_key: str,
+    requests: List[Dict[str, Any]],
+    private_key: str,
+    algorithm: str = "RSA",
+    expired_seconds: int = DEFAULT_EXPIRED_SECONDS,
+) -> Dict[str, Any]:
+    """
+    使用同一私钥批量签名YOP请求，私钥只解析一次
+
+    Args:
+        app_key: 应用标识(appKey)
+        requests: 请求列表，每项包含 method、uri，可选 params、body、requestId、timestamp
+        private_key: Base64编码的商户私钥，或保存私钥的文件路径
+        algorithm: 签名算法，支持 RSA 及 SM2
+        expired_seconds: 签名有效时长（秒）
+
+    Returns:
+        Dict[str, Any]: 包含 message 及 results（与输入顺序一致，每项包含 headers、
+            canonicalRequest，失败时为 message）
+    """
+    if not requests:
+        return {"message": "未提供需要签名的请求", "results": []}
+    if len(requests) > MAX_BATCH_REQUESTS:
+        return {"message": f"单批最多签名{MAX_BATCH_REQUESTS}个请求", "results": []}
+    try:
+        signer = _build_signer(algorithm, private_key)
+    except (ValueError, TypeError, OSError) as e:
+        return {"message": f"请求签名失败: {str(e)}", "results": []}
+
+    results = []
+    failed = 0
+    for request in requests:
+        try:
+            results.append(
+                _sign_one(
+                    signer,
+                    app_key,
+                    request.get("method", "POST"),
+                    request.get("uri", ""),
+                    request.get("params"),
+                    request.get("body"),
+                    request.get("requestId"),
+                    request.get("timestamp"),
+                    expired_seconds,
+                )
+            )
+        except (ValueError, TypeError) as e:
+            failed += 1
+            results.append({"message": f"请求签名失败: {str(e)}"})
+    return {
+        "message": f"批量签名完成：成功 {len(results) - failed} 个，失败 {failed} 个",
+        "results": results,
+    }
@@ -1,11 +1,41 @@
 import json
-from typing import Any, Dict, Optional
-
-from mcp.server.fastmcp import FastMCP
-
-from tools.cert_key_parser import parse_certificates
-from tools.cert_utils import download_cert, gen_key_pair
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp import Context, FastMCP
+
+from tools.api_resolver import resolve_api_uri
+from tools.api_spec import API_DOC_BASE_URL, api_spec, cached_spec
+from tools.callback_verifier import verify_callback, verify_callbacks_batch
+from tools.cert_batch import download_certs_batch
+from tools.cert_inventory import list_certs
+from tools.cert_key_parser import parse_certificates, parse_certificates_dir
+from tools.cert_monitor import cert_expiry_status, get_cert_monitor
+from tools.cert_utils import (
+    CertUtils,
+    complete_cert_download,
+    gen_key_pair,
+    gen_key_pairs_batch,
+    prepare_cert_download,
+)
+from tools.cfca_client import get_cfca_client
+from tools.config import Config
+from tools.doc_changes import doc_changes
+from tools.error_index import get_error_index
+from tools.executor import ExecutorError, run_blocking
+from tools.fingerprint_index import lookup_fingerprint
+from tools.html_to_markdown import html_to_markdown, looks_like_html
 from tools.http_utils import HttpUtils
+from tools.key_pool import get_key_pool
+from tools.keystore import (
+    KeystoreError,
+    is_keystore_ref,
+    list_keystore,
+    resolve_private_key,
+    unlock_keystore,
+)
+from tools.product_tree import get_product_tree
+from tools.sample_gen import render_sample
+from tools.yop_signer import sign_request, sign_requests_batch
 
 # Create an MCP server
 mcp = FastMCP("yop-mcp")
@@ -63,7 +93,9 @@ def yeepay_yop_product_detail_and_associated_apis(product_code: str) -> str:
 
 
 @mcp.tool()
-def yeepay_yop_api_detail(api_uri: str) -> str:
+def yeepay_yop_api_detail(  # pylint: disable=redefined-builtin
+    api_uri: str, format: str = "markdown"
+) -> str:
     """
     通过此工具，获取易宝支付开放平台(YOP)的API接口的详细定义，包含基本信息、请求参数、请求示例、
     响应参数、响应示例、错误码、回调、示例代码等信息，内容中包含链接时可以调用工具yeepay_yop_link_detail进一步获取其详细内容
@@ -71,17 +103,86 @@ def yeepay_yop_api_detail(api_uri: str) -> str:
     Args:
         api_uri: str - API的URI路径， 例如：/rest/v1.0/aggpay/pre-pay,
             https://open.yeepay.com/docs-v3/api/post_rest_v1.0_aggpay_pre-pay.md,
-            https://open.yeepay.com/docs-v2/apis/user-scan/post__rest__v1.0__aggpay__pre-pay/index.html
+            https://open.yeepay.com/docs-v2/apis/user-scan/post__rest__v1.0__aggpay__pre-pay/index.html；
+            URI路径有误（缺少版本号、拼写错误等）时自动更正为最相近的API，无法确定时按原路径获取并附加相近的API列表
+        format: str - 返回格式，"markdown"（默认，原始文档）或 "json"（结构化定义：method、path、
+            contentType、requestParams/responseParams（name、type、required、description）、
+            errorCodes（code、subCode、description、solution）及请求/响应示例，内容更精简）
 
     Returns:
         str: 易宝支付开放平台(YOP)的API接口的详细定义，包含基本信息、请求参数、请求示例、
-            响应参数、响应示例、错误码、回调、示例代码等信息(markdown格式)
+            响应参数、响应示例、错误码、回调、示例代码等信息(markdown格式，或JSON格式的结构化定义)
+
+    """
+    resolved, note, suggestions = _resolve_api_uri(api_uri)
+    response = _fetch_api_doc(resolved)
+    if response.startswith("HTTP请求失败"):
+        return _append_suggestions(response, api_uri, suggestions)
+    # 无论返回格式，获取的API文档均解析登记（按文档哈希缓存），其错误码同时写入全局错误码索引
+    spec = _api_spec(response, resolved)
+    if format.lower() == "json":
+        if note:
+            spec = {**spec, "resolvedFrom": api_uri.strip()}
+        if suggestions:
+            spec = {**spec, "suggestions": suggestions}
+        return json.dumps(spec, ensure_ascii=False, separators=(",", ":"))
+    response = f"{note}\n\n{response}" if note else response
+    return _append_suggestions(response, api_uri, suggestions)
+
+
+def _resolve_api_uri(api_uri: str) -> Tuple[str, str, List[Dict[str, Any]]]:
+    """
+    发起请求前将URI路径解析为产品目录中已知的API路径（容忍缺少版本号、分隔符或前缀错误、拼写错误等）
 
+    Returns:
+        Tuple[str, str, List[Dict[str, Any]]]: 待获取的URI、更正说明（路径被更正时）及相近的API
+            （无法确定时仍按原路径获取，相近的API附加在结果中）
     """
+    api_uri = api_uri.strip()
+    if api_uri.startswith("http") or "/" not in api_uri:
+        return api_uri, "", []
+    resolution = resolve_api_uri(api_uri)
+    if resolution["path"] is None:
+        # 无法确定时按原路径获取（产品目录可能尚未收录新API），相近的API附加在结果中
+        return api_uri, "", resolution["suggestions"]
+    if resolution["matchedBy"] == "exact":
+        return resolution["path"], "", []
+    return (
+        resolution["path"],
+        f"> 未找到API {api_uri}，已返回最相近的API {resolution['path']}",
+        [],
+    )
+
+
+def _append_suggestions(
+    content: str, api_uri: str, suggestions: List[Dict[str, Any]]
+) -> str:
+    """在结果末尾附加相近的API列表"""
+    if not suggestions:
+        return content
+    lines = [
+        f"- {item['method']} {item['path']} {item['title']}" for item in suggestions
+    ]
+    return f"{content}\n\n> 未能确定API {api_uri.strip()}，相近的API：\n" + "\n".join(
+        lines
+    )
+
+
+def _api_spec(document: str, api_uri: str) -> Dict[str, Any]:
+    """解析API文档；以URI路径获取的文档同时按该路径登记，供离线查找"""
+    path = api_uri.strip() if api_uri.strip().startswith("/") else ""
+    return api_spec(document, path=path)
+
 
+def _fetch_api_doc(api_uri: str) -> str:
+    """按API的URI路径或文档地址依次尝试各文档地址，返回API的markdown文档"""
     api_uri = api_uri.strip()
     response = "HTTP请求失败"
 
+    doc_ids = get_product_tree().doc_ids_for_path(api_uri)
+    if doc_ids:
+        return _download_api_doc(doc_ids)
+
     if api_uri.startswith("http"):
         if api_uri.endswith(".md"):
             response = HttpUtils.download_content(api_uri)
@@ -129,6 +230,121 @@ def yeepay_yop_api_detail(api_uri: str) -> str:
     return response
 
 
+def _download_api_doc(doc_ids: List[str]) -> str:
+    """按产品目录树中的文档标识下载API文档，只请求该API实际存在的文档地址"""
+    response = "HTTP请求失败"
+    for doc_id in doc_ids:
+        response = HttpUtils.download_content(API_DOC_BASE_URL + doc_id + ".md")
+        if not response.startswith("HTTP请求失败"):
+            break
+    return response
+
+
+@mcp.tool()
+def yeepay_yop_gen_sample(api_uri: str, language: str = "java") -> Dict[str, Any]:
+    """
+    通过此工具，生成调用易宝支付开放平台(YOP)指定API的SDK示例代码。示例代码根据API文档中的请求方式、
+    请求路径及请求参数由模板生成（必填参数附注释），API文档已缓存时不发起网络请求
+
+    Args:
+        api_uri: str - API的URI路径，例如：/rest/v1.0/aggpay/pre-pay，路径有误时自动更正为最相近的API，
+            无法确定时按原路径获取并附加相近的API
+        language: str - 语言，可选值：java、php、dotnet、typescript、nodejs、python、go，默认为 java
+
+    Returns:
+        Dict包含:
+        - message: 响应信息
+        - language: 语言
+        - sdk: 使用的SDK（如 yop-java-sdk）
+        - method: 请求方式
+        - path: 请求路径
+        - code: 示例代码
+        - cached: 是否直接使用了已缓存的API定义（未发起网络请求）
+        - resolvedFrom: 路径被更正时的原始URI
+        - suggestions: 无法确定API时相近的API（path、method、title、score）
+    """
+    resolved, note, suggestions = _resolve_api_uri(api_uri)
+    spec = cached_spec(resolved) if resolved.startswith("/") else None
+    cached = spec is not None
+    if spec is None:
+        document = _fetch_api_doc(resolved)
+        if document.startswith("HTTP请求失败"):
+            failure: Dict[str, Any] = {
+                "message": _append_suggestions(document, api_uri, suggestions)
+            }
+            if suggestions:
+                failure["suggestions"] = suggestions
+            return failure
+        spec = _api_spec(document, resolved)
+    result = {**render_sample(spec, language), "cached": cached}
+    if note:
+        result["resolvedFrom"] = api_uri.strip()
+    if suggestions:
+        result["suggestions"] = suggestions
+    return result
+
+
+def _load_api_spec(path: str) -> Optional[Dict[str, Any]]:
+    """获取API定义：优先使用已缓存的定义，否则按产品目录树中的文档标识下载API文档"""
+    spec = cached_spec(path)
+    if spec is not None:
+        return spec
+    doc_ids = get_product_tree().doc_ids_for_path(path)
+    if not doc_ids:
+        return None
+    document = _download_api_doc(doc_ids)
+    if document.startswith("HTTP请求失败"):
+        return None
+    return api_spec(document, path=path)
+
+
+@mcp.tool()
+async def yeepay_yop_lookup_error_code(
+    code: str = "", build: bool = False, concurrency: int = 8
+) -> Dict[str, Any]:
+    """
+    通过此工具，查询易宝支付开放平台(YOP)的错误码或子错误码的含义、解决方案及所属API。
+    查询只读内存中的错误码索引：获取过的API文档会自动加入索引，build=True 时先按产品目录中的全部API
+    批量构建索引（已缓存的文档不发起网络请求，耗时较长，只需执行一次）
+
+    Args:
+        code: str - 错误码、子错误码或关键字，例如：40044、isp.code.order-closed、订单已关闭；为空时只返回索引统计
+        build: bool - 是否先批量构建全部API的错误码索引，默认为False
+        concurrency: int - 批量构建时的最大并发请求数，默认为8，最大为32
+
+    Returns:
+        Dict包含:
+        - message: 响应信息
+        - matches: 匹配的错误码列表，每项包含 code、subCode、description、solution、api(API路径)、
+          method、title
+        - stats: 索引统计（apis/entries/codes）
+        - build: 批量构建统计（total/skipped/indexed/failed），仅 build=True 时返回
+    """
+    index = get_error_index()
+    result: Dict[str, Any] = {}
+    if build:
+        paths = [api.path for api in get_product_tree().iter_apis()]
+        # 批量构建耗时取决于需下载的文档数，不受执行器默认超时限制
+        result["build"] = await _offload(
+            index.build, paths, _load_api_spec, concurrency, kind="thread", timeout=0
+        )
+        if "message" in result["build"]:
+            return {"message": result["build"]["message"], **result}
+
+    matches = index.lookup(code) if code.strip() else []
+    stats = index.stats()
+    if not code.strip():
+        message = f"错误码索引已包含 {stats['apis']} 个API"
+    elif matches:
+        message = f"找到 {len(matches)} 条匹配的错误码"
+    else:
+        message = (
+            f"未找到错误码: {code}（已索引 {stats['apis']} 个API），"
+            "可使用 build=True 构建全部API的错误码索引"
+        )
+    return {"message": message, "matches": matches, "stats": stats, **result}
+
+
 @mcp.tool()
 def yeepay_yop_sdk_and_tools_guide() -> str:
     """
@@ -146,13 +362,21 @@ def yeepay_yop_sdk_and_tools_guide() -> str:
         return "HTTP请求失败, url: https://open.yeepay.com/docs-v3/platform/llms.txt"
 
 
+def _html_page_to_markdown(content: str, url: str, raw: bool) -> str:
+    """HTML页面默认转换为markdown，raw为True或内容不是HTML时原样返回"""
+    if raw or content.startswith("HTTP请求失败") or not looks_like_html(content):
+        return content
+    return html_to_markdown(content, base_url=url)
+
+
 @mcp.tool()
-def yeepay_yop_link_detail(url: str) -> str:
+def yeepay_yop_link_detail(url: str, raw: bool = False) -> str:
     """
     通过此工具，获取易宝支付开放平台(YOP)的各个子页面或者外部链接的详细内容，内容中包含链接时可以调用工具yeepay_yop_link_detail进一步获取其详细内容
 
     Args:
         url: str - 易宝支付开放平台(YOP)的子页面的URL地址
+        raw: bool - 是否返回原始内容，默认为False（HTML页面会转换为markdown）
 
     Returns:
         str: 易宝支付开放平台(YOP)的各个子页面的详细内容
@@ -160,19 +384,22 @@ def yeepay_yop_link_detail(url: str) -> str:
     """
     try:
         if url.startswith("http"):
-            return HttpUtils.download_content(url)
+            return _html_page_to_markdown(HttpUtils.download_content(url), url, raw)
 
         url = ("https://open.yeepay.com/" + url).replace("//", "/")
-        return HttpUtils.download_content(url)
+        return _html_page_to_markdown(HttpUtils.download_content(url), url, raw)
     except (ValueError, TypeError, ConnectionError):
         return "HTTP请求失败, url: " + url
 
 
 @mcp.tool()
-def yeepay_yop_java_sdk_user_guide() -> str:
+def yeepay_yop_java_sdk_user_guide(raw: bool = False) -> str:
     """
     通过此工具，获取易宝支付开放平台(YOP)的yop-java-sdk的使用说明，内容中包含链接时可以调用工具yeepay_yop_link_detail进一步获取其详细内容
 
+    Args:
+        raw: bool - 是否返回原始HTML内容，默认为False（转换为markdown）
+
     Returns:
         str: 易宝支付开放平台(YOP)的yop-java-sdk的使用说明(markdown格式)
 
@@ -184,11 +411,14 @@ def yeepay_yop_java_sdk_user_guide() -> str:
             )
         )
         platform_version = platform_info.get("data").get("docVersion")
-        return HttpUtils.download_content(
+        guide_url = (
             "https://open.yeepay.com/apis/docs/platform/"
             + platform_version
             + "/sdk_guide/java-sdk-guide.html"
         )
+        return _html_page_to_markdown(
+            HttpUtils.download_content(guide_url), guide_url, raw
+        )
     except (ValueError, TypeError, ConnectionError):
         return HttpUtils.download_content(
             "https://open.yeepay.com/docs-v3/platform/201.md"
@@ -196,8 +426,48 @@ def yeepay_yop_java_sdk_user_guide() -> str:
 
 
 @mcp.tool()
-def yeepay_yop_gen_key_pair(
-    algorithm: str = "RSA", key_format: str = "pkcs8", storage_type: str = "file"
+def yeepay_yop_doc_changes(since: str = "") -> Dict[str, Any]:
+    """
+    通过此工具，增量校验已获取过的易宝支付开放平台(YOP)文档是否有更新，仅返回发生变更的文档及其diff，
+    未变更的文档通过条件请求校验，不会重新下载（需设置环境变量YOP_MCP_DOC_CACHE_PATH启用文档缓存）
+
+    Args:
+        since: str - 起始时间，ISO 8601格式（如 2025-07-01）或Unix时间戳，为空时仅返回本次校验发现的变更
+
+    Returns:
+        Dict包含:
+        - message: 响应信息
+        - stats: 校验统计（checked/notModified/skipped/changed/failed）
+        - changes: 变更列表，每项包含 url、detectedAt、oldHash、newHash、diff(unified diff)
+    """
+    return doc_changes(since=since)
+
+
+async def _offload(
+    func: Callable[..., Dict[str, Any]],
+    *args: Any,
+    kind: Optional[str] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """在执行器中运行CPU密集型工具函数，排队已满或超时时返回错误信息"""
+    try:
+        result: Dict[str, Any] = await run_blocking(func, *args, kind=kind, **kwargs)
+        return result
+    except ExecutorError as e:
+        return {"message": str(e)}
+
+
+def _key_kind(private_key: str) -> Optional[str]:
+    """引用密钥库的私钥需在主进程中解析（会话解锁状态及私钥缓存只存在于主进程）"""
+    return "thread" if is_keystore_ref(private_key) else None
+
+
+@mcp.tool()
+async def yeepay_yop_gen_key_pair(
+    algorithm: str = "RSA",
+    key_format: str = "pkcs8",
+    storage_type: str = "file",
+    alias: str = "",
 ) -> Dict[str, Any]:
     """
     根据密钥算法生成非对称加密的密钥对（公钥和私钥），并保存到本地路径
@@ -205,15 +475,100 @@ def yeepay_yop_gen_key_pair(
     参数:
         algorithm: 密钥算法，可选值为 "RSA" 或 "SM2"，默认为 "RSA"
         key_format: 密钥格式，可选值为 "pkcs8"或"pkcs1"，默认为 "pkcs8"
-        storage_type: 密钥存储类型，"file"或"string"，默认为 "file"
+        storage_type: 密钥存储类型，"file"、"string"或"keystore"，默认为 "file"；
+            "keystore" 时私钥加密保存到密钥库（需先解锁），结果中不返回私钥，
+            其他工具可通过 privateKeyRef（keystore:<别名>）引用该私钥
+        alias: 保存到密钥库时使用的别名，为空时使用 算法_公钥指纹前16位
+    """
+    # 启用RSA密钥预生成池时只需序列化，在线程中执行以便取用主进程中的密钥池；
+    # 保存到密钥库时同样需要在主进程中执行
+    pooled = algorithm.upper() == "RSA" and get_key_pool() is not None
+    in_process = pooled or storage_type.lower() == "keystore"
+    return await _offload(
+        gen_key_pair,
+        kind="thread" if in_process else None,
+        algorithm=algorithm,
+        format=key_format,
+        storage_type=storage_type,
+        alias=alias,
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_gen_key_pairs_batch(
+    count: int,
+    algorithm: str = "RSA",
+    key_format: str = "pkcs8",
+    storage_type: str = "file",
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """
+    批量生成非对称加密的密钥对（用于批量开通子商户等场景），多进程并行生成并上报进度
+
+    参数:
+        count: 生成数量，1~1000
+        algorithm: 密钥算法，可选值为 "RSA" 或 "SM2"，默认为 "RSA"
+        key_format: 密钥格式，可选值为 "pkcs8"或"pkcs1"，默认为 "pkcs8"
+        storage_type: 密钥存储类型，"file"、"string"或"keystore"，默认为 "file"；
+            "file" 时每对密钥保存为 ./keys/应用私钥RSA2048_<公钥指纹>.txt 等唯一文件名，
+            "keystore" 时全部加密保存到密钥库（需先解锁）
+
+    Returns:
+        Dict包含:
+        - message: 响应信息
+        - count: 成功生成的数量
+        - keyPairs: 密钥对列表，每项包含 privateKey、publicKey、privateCert、publicCert
     """
-    return gen_key_pair(
-        algorithm=algorithm, format=key_format, storage_type=storage_type
+
+    async def report(done: int, total: int) -> None:
+        if ctx is not None:
+            await ctx.report_progress(done, total)
+
+    return await gen_key_pairs_batch(
+        count,
+        algorithm=algorithm,
+        format=key_format,
+        storage_type=storage_type,
+        progress=report,
     )
 
 
 @mcp.tool()
-def yeepay_yop_download_cert(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+async def yeepay_yop_unlock_keystore(password: str) -> Dict[str, Any]:
+    """
+    解锁本地加密密钥库（不存在时以该口令新建），服务进程内只需解锁一次；
+    之后可使用 storage_type="keystore" 生成密钥，并在签名、下载证书等工具中以
+    keystore:<别名或公钥指纹> 代替私钥
+
+    Args:
+        password: 密钥库口令
+
+    Returns:
+        Dict包含:
+        - message: 响应信息
+        - path: 密钥库文件路径
+        - keys: 密钥列表，每项包含 alias、algorithm、format、fingerprint、publicKey、createdAt
+    """
+    return await _offload(unlock_keystore, kind="thread", password=password)
+
+
+@mcp.tool()
+async def yeepay_yop_list_keystore() -> Dict[str, Any]:
+    """
+    列出本地加密密钥库中的密钥（不含私钥，无需解锁）
+
+    Returns:
+        Dict包含:
+        - message: 响应信息
+        - path: 密钥库文件路径
+        - unlocked: 是否已解锁
+        - keys: 密钥列表，每项包含 alias、algorithm、format、fingerprint、publicKey、createdAt
+    """
+    return await _offload(list_keystore, kind="thread")
+
+
+@mcp.tool()
+async def yeepay_yop_download_cert(  # pylint: disable=too-many-arguments,too-many-positional-arguments
     algorithm: str = "RSA",
     serial_no: str = "",
     auth_code: str = "",
@@ -228,7 +583,7 @@ def yeepay_yop_download_cert(  # pylint: disable=too-many-arguments,too-many-pos
         algorithm: 密钥算法，可选值为 "RSA" 或 "SM2"，默认为 "RSA"
         serial_no: cfca证书序列号
         auth_code: cfca证书授权码
-        private_key: Base64 编码后的私钥字符串
+        private_key: Base64 编码后的私钥字符串，或密钥库引用 keystore:<别名或公钥指纹>
         public_key: Base64 编码后的公钥字符串
         pwd: 密码，长度：12~16位
 
@@ -238,7 +593,18 @@ def yeepay_yop_download_cert(  # pylint: disable=too-many-arguments,too-many-pos
         - pfxCert: 私钥证书路径(.pfx)
         - pubCert: 公钥证书路径(.cer)
     """
-    return download_cert(
+    if is_keystore_ref(private_key):
+        try:
+            private_key = await run_blocking(
+                resolve_private_key, private_key, kind="thread"
+            )
+        except (ExecutorError, KeystoreError) as e:
+            return {"message": str(e)}
+    # 参数校验及证书请求在线程中运行，证书请求缓存在服务进程中，CFCA下载重试时直接复用；
+    # PFX生成在执行器中运行，CFCA接口通过共享的持久连接调用
+    prepared = await _offload(
+        prepare_cert_download,
+        kind="thread",
         algorithm=algorithm,
         serial_no=serial_no,
         auth_code=auth_code,
@@ -246,10 +612,60 @@ def yeepay_yop_download_cert(  # pylint: disable=too-many-arguments,too-many-pos
         public_key=public_key,
         pwd=pwd,
     )
+    if "message" in prepared:
+        return prepared
+    cert = prepared["cert"]
+    if cert is None:
+        downloaded = await get_cfca_client().download(
+            serial_no, auth_code, prepared["certReq"]
+        )
+        if downloaded.error_msg:
+            return {"message": downloaded.error_msg}
+        cert = downloaded.cert
+    return await _offload(
+        complete_cert_download,
+        algorithm=algorithm,
+        serial_no=serial_no,
+        private_key=private_key,
+        pwd=pwd,
+        cert=cert,
+    )
 
 
 @mcp.tool()
-def yeepay_yop_parse_certificates(
+async def yeepay_yop_download_certs_batch(
+    items: Optional[List[Dict[str, str]]] = None,
+    csv_path: str = "",
+    concurrency: int = Config.CFCA_DOWNLOAD_CONCURRENCY,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """
+    批量激活并下载CFCA证书，并保存到本地路径；已成功的证书记录在状态文件中，重新调用时自动跳过
+
+    Args:
+        items: 证书列表，每项包含 serialNo(证书序列号)、authCode(授权码)、privateKey、publicKey
+            (Base64编码的密钥)、pwd(12~16位密码)，可选 algorithm("RSA"或"SM2"，默认为"RSA")
+        csv_path: CSV文件路径，表头字段同上，可与 items 同时使用
+        concurrency: CFCA下载接口的最大并发请求数，默认为8
+
+    Returns:
+        Dict包含:
+        - message: 响应信息
+        - stats: 统计（success/skipped/failed）
+        - results: 每个证书的结果，包含 serialNo、status、message、pfxCert、pubCert
+    """
+
+    async def report(done: int, total: int) -> None:
+        if ctx is not None:
+            await ctx.report_progress(done, total)
+
+    return await download_certs_batch(
+        items=items, csv_path=csv_path, concurrency=concurrency, progress=report
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_parse_certificates(
     algorithm: str = "RSA",
     pfx_cert: Optional[str] = None,
     pub_cert: Optional[str] = None,
@@ -272,8 +688,229 @@ def yeepay_yop_parse_certificates(
                 'publicKey': Base64编码后的公钥字符串
             }
     """
-    return parse_certificates(
-        algorithm=algorithm, pfx_cert=pfx_cert, pub_cert=pub_cert, pwd=pwd
+    return await _offload(
+        parse_certificates,
+        algorithm=algorithm,
+        pfx_cert=pfx_cert,
+        pub_cert=pub_cert,
+        pwd=pwd,
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_parse_certificates_dir(
+    path: str = "", pwd: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    并行解析目录（含子目录）下的全部证书文件（.pfx/.p12/.cer/.pem），解析结果按文件路径、大小、
+    修改时间及密码缓存，重复扫描未变化的文件时不再重新解析
+
+    Args:
+        path (str): 证书目录，为空时解析 ./certs/rsa/ 及 ./certs/sm2/
+        pwd (str, optional): PFX证书的密码，默认为None
+
+    Returns:
+        dict: 包含 message、stats（files/parsed/cached/failed）及 certificates 列表，
+            每项包含 path、name、keyType、publicKey、privateKey、error
+    """
+    # 目录解析自行在进程池中并行，此处使用线程执行，并在主进程中保留解析结果缓存
+    return await _offload(
+        parse_certificates_dir, kind="thread", path=path or None, pwd=pwd
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_lookup_fingerprint(
+    query: str, pwd: Optional[str] = None, refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    按公钥SPKI的SHA-256指纹查找匹配的本地密钥及证书文件（./keys/、./certs/rsa/、./certs/sm2/）。
+    索引持久化保存，目录中有文件增删时增量更新，匹配只需一次哈希查找
+
+    Args:
+        query (str): Base64编码的公钥或私钥、证书序列号，或64位十六进制指纹
+        pwd (str, optional): PFX证书密码，仅用于索引没有同名 .cer 证书的PFX文件
+        refresh (bool): 是否强制增量更新索引（文件被原地修改时使用），默认为False
+
+    Returns:
+        dict: 包含 message、fingerprints 及 matches 列表，
+            每项包含 path、kind(privateKey/publicKey/certificate/pfx)、serialNo、fingerprint
+    """
+    return await _offload(
+        lookup_fingerprint, kind="thread", query=query, pwd=pwd, refresh=refresh
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_list_certs(
+    filter: str = "",  # pylint: disable=redefined-builtin
+    expiring_within: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    查询本地已下载的CFCA证书清单（./certs/rsa/、./certs/sm2/），结果来自SQLite索引，
+    查询前只对新增或变化的证书文件增量更新
+
+    Args:
+        filter (str): 按证书序列号、主题、颁发者或算法(RSA/SM2)模糊匹配，为空时返回全部证书
+        expiring_within (float, optional): 只返回在指定天数内到期（含已过期）的证书
+
+    Returns:
+        dict: 包含 message、stats（files/updated/removed）及 certificates 列表（按到期时间升序），
+            每项包含 serialNo、algorithm、subject、issuer、notBefore、notAfter、expired、pubCert、pfxCert
+    """
+    return await _offload(
+        list_certs, kind="thread", keyword=filter, expiring_within=expiring_within
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_cert_expiry_status(
+    days: Optional[float] = None, refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    查询本地CFCA证书（./certs/rsa/、./certs/sm2/）的到期状态，列出在预警天数内到期或已过期的证书。
+    启用后台监控（环境变量 YOP_MCP_CERT_MONITOR_INTERVAL）时直接返回最近一次检查结果，
+    检查时只解析新增或变化的证书文件
+
+    Args:
+        days (float, optional): 预警天数，为空时使用 YOP_MCP_CERT_EXPIRY_DAYS（默认30天）
+        refresh (bool): 是否立即重新检查，而不是返回后台监控最近一次的结果
+
+    Returns:
+        dict: 包含 message、checkedAt、warnDays、expired、expiring、monitor 及 certificates 列表
+            （按到期时间升序，每项包含 serialNo、algorithm、notAfter、daysLeft、expired、pubCert 等）
+    """
+    return await _offload(
+        cert_expiry_status, kind="thread", warn_days=days, refresh=refresh
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_sign_request(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    app_key: str,
+    method: str,
+    uri: str,
+    private_key: str,
+    params: Optional[Dict[str, Any]] = None,
+    body: Optional[str] = None,
+    algorithm: str = "RSA",
+) -> Dict[str, Any]:
+    """
+    按 yop-auth-v3 协议为YOP API请求生成鉴权请求头（YOP-RSA2048-SHA256 或 YOP-SM2-SM3），
+    可用于核对商户自行实现的签名或直接调试接口
+
+    Args:
+        app_key (str): 应用标识(appKey)
+        method (str): 请求方法，GET或POST
+        uri (str): 请求路径，如 /rest/v1.0/aggpay/pre-pay
+        private_key (str): Base64编码的商户私钥，保存私钥的文件路径（如 ./keys/ 下的私钥文件），
+            或密钥库引用 keystore:<别名或公钥指纹>
+        params (dict, optional): 表单或查询参数
+        body (str, optional): JSON请求的报文体，为空时按表单请求签名
+        algorithm (str): 签名算法，支持 RSA 及 SM2
+
+    Returns:
+        dict: 包含 message、headers（Authorization、x-yop-appkey、x-yop-content-sha256、
+            x-yop-request-id）及 canonicalRequest（规范请求串）
+    """
+    return await _offload(
+        sign_request,
+        kind=_key_kind(private_key),
+        app_key=app_key,
+        method=method,
+        uri=uri,
+        private_key=private_key,
+        params=params,
+        body=body,
+        algorithm=algorithm,
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_sign_requests_batch(
+    app_key: str,
+    requests: List[Dict[str, Any]],
+    private_key: str,
+    algorithm: str = "RSA",
+) -> Dict[str, Any]:
+    """
+    使用同一私钥批量签名YOP API请求，私钥只解析一次
+
+    Args:
+        app_key (str): 应用标识(appKey)
+        requests (list): 请求列表，每项包含 method、uri，可选 params、body、requestId、timestamp
+        private_key (str): Base64编码的商户私钥、保存私钥的文件路径或密钥库引用
+        algorithm (str): 签名算法，支持 RSA 及 SM2
+
+    Returns:
+        dict: 包含 message 及 results 列表（与输入顺序一致，每项包含 headers、canonicalRequest）
+    """
+    return await _offload(
+        sign_requests_batch,
+        kind=_key_kind(private_key),
+        app_key=app_key,
+        requests=requests,
+        private_key=private_key,
+        algorithm=algorithm,
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_verify_callback(
+    notification: str, private_key: str = "", platform_cert: str = ""
+) -> Dict[str, Any]:
+    """
+    解密YOP结果通知(回调)中的数字信封，并使用平台公钥验证签名（RSA商户，AES数字信封）
+
+    Args:
+        notification (str): 回调通知报文，可以是表单报文(response=...&customerIdentification=...)、
+            JSON报文或 response 参数值本身
+        private_key (str): Base64编码的商户私钥、私钥文件路径或密钥库引用(keystore:<别名>)，
+            为空时使用 ./keys/应用私钥RSA2048.txt
+        platform_cert (str): YOP平台证书路径或Base64编码的平台公钥，为空时使用环境变量
+            YOP_MCP_PLATFORM_CERT 指定的证书（默认 config/yop_platform_rsa_cert_rsa.cer）；
+            仓库不附带平台证书，需传入本参数或设置 YOP_MCP_PLATFORM_CERT
+
+    Returns:
+        dict: 包含 message、verified（签名是否有效）及 data（解密后的通知内容）
+    """
+    return await _offload(
+        verify_callback,
+        kind=_key_kind(private_key),
+        notification=notification,
+        private_key=private_key,
+        platform_cert=platform_cert,
+    )
+
+
+@mcp.tool()
+async def yeepay_yop_verify_callbacks_batch(
+    notifications: Optional[List[str]] = None,
+    log_path: str = "",
+    private_key: str = "",
+    platform_cert: str = "",
+) -> Dict[str, Any]:
+    """
+    批量解密并验证回调通知，用于重放日志中记录的通知；密钥及平台证书只解析一次
+
+    Args:
+        notifications (list, optional): 通知报文列表
+        log_path (str): 通知日志文件路径，每行一个通知，可与 notifications 同时使用
+        private_key (str): Base64编码的商户私钥、私钥文件路径或密钥库引用
+        platform_cert (str): YOP平台证书路径或Base64编码的平台公钥，为空时使用
+            YOP_MCP_PLATFORM_CERT；仓库不附带平台证书，两者须至少配置一个
+
+    Returns:
+        dict: 包含 message、stats（verified/invalid/failed）及 results 列表（与输入顺序一致，
+            每项包含 message、verified、data）
+    """
+    return await _offload(
+        verify_callbacks_batch,
+        kind=_key_kind(private_key),
+        notifications=notifications,
+        log_path=log_path,
+        private_key=private_key,
+        platform_cert=platform_cert,
     )
 
 
@@ -299,6 +936,12 @@ def yeepay_yop_parse_certificates(
 
 def main() -> None:
     """Main entry point for the YOP MCP Server."""
+    if Config.CRYPTO_PRELOAD:
+        CertUtils.preload_cert_chains()
+    # 启用时启动RSA密钥预生成池的后台补充线程
+    get_key_pool()
+    # 启用时启动证书到期监控的后台检查线程
+    get_cert_monitor()
     mcp.run(transport="stdio")
 
 